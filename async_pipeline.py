@@ -0,0 +1,415 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from batch_predictor import BatchPredictor, capture_pool_size
+from blackboard import Blackboard
+from command_publisher import command_message
+from pipeline_session import PipelineSession, SessionConfig
+from session_replay import ReplaySource
+
+# put into a subscription queue to end `async for`
+_CLOSED = object()
+
+
+class Subscription:
+    """
+    awaitable stream of Blackboard snapshots for one key
+
+    the queue is bounded: when a slow consumer lets it fill up the oldest
+    snapshot is dropped (and counted) so producers never block
+    """
+
+    def __init__(self, blackboard: "AsyncBlackboard", key: str, maxsize: int = 0):
+        self._blackboard = blackboard
+        self.key = key
+        self._queue: "asyncio.Queue" = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self._closed = False
+
+    def _offer(self, snapshot: Dict[str, Any]):
+        """event loop thread only"""
+        if self._closed:
+            return
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(snapshot)
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    async def get(self) -> Dict[str, Any]:
+        item = await self._queue.get()
+        if item is _CLOSED:
+            # keep the marker so every later get() also sees the end
+            self._queue.put_nowait(_CLOSED)
+            raise StopAsyncIteration
+        return item
+
+    def close(self):
+        if self._closed:
+            return
+        self._blackboard._unsubscribe(self)
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(_CLOSED)
+        self._closed = True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        return await self.get()
+
+
+class AsyncBlackboard(Blackboard):
+    """
+    Blackboard with awaitable subscriptions next to the usual observers
+
+    setters stay synchronous (so the existing interpreter / generator work
+    unchanged as observers); every change is also fanned out to the
+    subscriptions for its key. setters may be called from any thread,
+    delivery always happens on the event loop
+    """
+
+    def __init__(self, screen_width: Optional[int] = None, screen_height: Optional[int] = None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        super().__init__(screen_width, screen_height)
+        self._loop = loop
+        self._loop_thread: Optional[int] = None
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+
+    def _bind_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        if self._loop_thread is None:
+            self._loop_thread = threading.get_ident()
+
+    def subscribe(self, key: str, maxsize: int = 0) -> Subscription:
+        """
+        stream every change of key ("current_gaze", "current_command", ...)
+        must be called from the event loop
+        """
+        self._bind_loop()
+        subscription = Subscription(self, key, maxsize)
+        with self._data_lock:
+            self._subscriptions.setdefault(key, []).append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        with self._data_lock:
+            subscriptions = self._subscriptions.get(subscription.key, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+
+    async def wait_for(self, key: str) -> Dict[str, Any]:
+        """wait for the next change of key and return its snapshot"""
+        subscription = self.subscribe(key, maxsize=1)
+        try:
+            return await subscription.get()
+        finally:
+            subscription.close()
+
+    @staticmethod
+    def _deliver(subscriptions: List[Subscription], snapshot: Dict[str, Any]):
+        for subscription in subscriptions:
+            subscription._offer(snapshot)
+
+    def _notify_observers(self, snapshot: Dict[str, Any]):
+        # plain observers first, exactly like the threaded Blackboard
+        super()._notify_observers(snapshot)
+
+        with self._data_lock:
+            subscriptions = list(self._subscriptions.get(snapshot.get("changed"), ()))
+        if not subscriptions:
+            return
+
+        if threading.get_ident() == self._loop_thread:
+            self._deliver(subscriptions, snapshot)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, subscriptions, snapshot)
+
+
+class _PahoAsyncioAdapter:
+    """
+    drives a paho client from the asyncio loop instead of loop_start()'s thread
+    (the socket callbacks pattern from paho's loop_asyncio example)
+
+    must be created on the loop; callbacks paho makes from another thread
+    (connect() runs in an executor) are handed over to the loop
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, client):
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._client = client
+        self._misc: Optional[asyncio.Task] = None
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    def _call(self, callback, *args):
+        if threading.get_ident() == self._loop_thread:
+            callback(*args)
+        else:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def _open(self, client, sock):
+        self._loop.add_reader(sock, client.loop_read)
+        self._misc = self._loop.create_task(self._misc_loop())
+
+    def _close(self, sock):
+        self._loop.remove_reader(sock)
+        if self._misc is not None:
+            self._misc.cancel()
+
+    def _on_socket_open(self, client, userdata, sock):
+        self._call(self._open, client, sock)
+
+    def _on_socket_close(self, client, userdata, sock):
+        self._call(self._close, sock)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self._call(self._loop.add_writer, sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self._call(self._loop.remove_writer, sock)
+
+    async def _misc_loop(self):
+        import paho.mqtt.client as mqtt
+        while self._client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                break
+
+
+class AsyncMqttPublisher:
+    """
+    publishes current_command and current_provisional_command changes from an
+    AsyncBlackboard over MQTT, entirely on the event loop
+
+    backpressure: at most max_inflight QoS 1 messages wait for their PUBACK;
+    while the broker lags, commands queue in the subscription (max_pending,
+    oldest dropped first) instead of piling up inside paho
+    """
+
+    def __init__(self, blackboard: AsyncBlackboard, broker_host: str = "test.mosquitto.org",
+                 broker_port: int = 1883, topic: str = "gaze_bot/command", qos: int = 1,
+                 max_inflight: int = 20, max_pending: int = 100):
+        self._blackboard = blackboard
+        self._broker_host = broker_host
+        self._broker_port = broker_port
+        self._topic = topic
+        self._qos = qos
+        self._max_inflight = max_inflight
+        self._max_pending = max_pending
+
+        self._client = None
+        self._adapter = None
+        # one subscription (and task) per command key
+        self._subscriptions: List[Subscription] = []
+        self._tasks: List[asyncio.Task] = []
+        self._inflight: Optional[asyncio.Semaphore] = None
+        # mid --> publish time, for ack latency
+        self._unacked: Dict[int, float] = {}
+        self._ack_latencies: "deque[float]" = deque(maxlen=1000)
+        self._published = 0
+        self._acked = 0
+
+    async def start(self):
+        import paho.mqtt.client as mqtt
+        loop = asyncio.get_running_loop()
+        self._inflight = asyncio.Semaphore(self._max_inflight)
+
+        self._client = mqtt.Client()
+        self._client.on_publish = self._on_publish
+        self._adapter = _PahoAsyncioAdapter(loop, self._client)
+        # the DNS lookup and TCP handshake block --> off the loop
+        await loop.run_in_executor(None, functools.partial(self._client.connect, self._broker_host,
+                                                           self._broker_port, keepalive=60))
+
+        for key in ("current_command", "current_provisional_command"):
+            subscription = self._blackboard.subscribe(key, maxsize=self._max_pending)
+            self._subscriptions.append(subscription)
+            self._tasks.append(loop.create_task(self._run(subscription)))
+
+    def _on_publish(self, client, userdata, mid, *args):
+        sent = self._unacked.pop(mid, None)
+        if sent is None:
+            return
+        self._acked += 1
+        self._ack_latencies.append(time.perf_counter() - sent)
+        self._inflight.release()
+
+    async def _run(self, subscription: Subscription):
+        import paho.mqtt.client as mqtt
+        async for snapshot in subscription:
+            cmd = snapshot.get(subscription.key)
+            if cmd is None:
+                continue
+
+            topic, payload = command_message(cmd, self._topic)
+            if self._qos == 0:
+                self._client.publish(topic, payload, qos=0)
+                self._published += 1
+                continue
+
+            # wait here (not in paho) while too many messages are unacknowledged
+            await self._inflight.acquire()
+            info = self._client.publish(topic, payload, qos=self._qos)
+            self._published += 1
+            if info.rc == mqtt.MQTT_ERR_QUEUE_SIZE:
+                # the one failure paho does not queue, no PUBACK will free the slot
+                self._inflight.release()
+                continue
+            # any other rc != 0 (e.g. MQTT_ERR_NO_CONN) leaves the message queued in
+            # paho, it is sent and acked once the connection is back
+            self._unacked[info.mid] = time.perf_counter()
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._ack_latencies)
+        return {
+            "published": self._published,
+            "acked": self._acked,
+            "inflight": len(self._unacked),
+            "pending": sum(s.qsize() for s in self._subscriptions),
+            "dropped": sum(s.dropped for s in self._subscriptions),
+            "ack_latency_p50": latencies[len(latencies) // 2] if latencies else None,
+        }
+
+    async def close(self):
+        for subscription in self._subscriptions:
+            subscription.close()
+        for task in self._tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._client is not None:
+            self._client.disconnect()
+
+
+class AsyncPipelineSession:
+    """
+    one session on the asyncio runtime: the same stages as PipelineSession
+    on an AsyncBlackboard, a capture task instead of a source thread and an
+    AsyncMqttPublisher instead of paho's loop thread
+    """
+
+    def __init__(self, config: SessionConfig, executor: Optional[Executor] = None, predictor=None):
+        self.config = config
+        self.blackboard = AsyncBlackboard(config.screen_width, config.screen_height)
+        self._pipeline = PipelineSession(config, blackboard=self.blackboard, publish=False, predictor=predictor)
+        self.metrics = self._pipeline.metrics
+        self.source = self._pipeline.source
+        self._executor = executor
+
+        # camera capture + inference block, replays are cheap enough to run inline
+        self._offload = not isinstance(self.source, ReplaySource)
+
+        self.publisher: Optional[AsyncMqttPublisher] = None
+        if config.broker_host is not None:
+            self.publisher = AsyncMqttPublisher(self.blackboard, config.broker_host, config.broker_port,
+                                                config.command_topic())
+
+    async def run(self, stop: asyncio.Event):
+        """
+        capture until stop is set, publishing every sample on the loop
+        a failing read is recorded in the metrics and retried at the next poll, like SessionHost
+        """
+        loop = asyncio.get_running_loop()
+        self.blackboard._bind_loop()
+        try:
+            if self.publisher is not None:
+                await self.publisher.start()
+            self.source.open()
+            self.metrics.mark_started()
+
+            while not stop.is_set():
+                try:
+                    if self._offload:
+                        events = await loop.run_in_executor(self._executor, self.source.read)
+                    else:
+                        events = self.source.read()
+                    for event in events:
+                        self.blackboard.set_current_gaze(event)
+                except Exception as e:
+                    self.metrics.record_error(e)
+
+                if getattr(self.source, "finished", False):
+                    break
+                await asyncio.sleep(self.config.poll_interval)
+        finally:
+            # source, recalibrator and log; the pipeline has no publisher of its own
+            self._pipeline.close()
+            if self.publisher is not None:
+                await self.publisher.close()
+
+
+class AsyncSessionHost:
+    """
+    runs many AsyncPipelineSessions on one event loop; blocking capture work
+    goes to one shared thread pool, predictions optionally to one BatchPredictor
+    """
+
+    def __init__(self, capture_threads: Optional[int] = None, batch_size: Optional[int] = None,
+                 batch_latency: float = 0.005):
+        """
+        :param capture_threads: size of the shared capture pool, None = 8 or batch_size if larger
+        :param batch_size: largest prediction batch, None = no BatchPredictor. every capture
+                           thread has at most one frame in a batch, so it needs capture_threads >= batch_size
+        """
+        self._capture_threads = capture_pool_size(capture_threads, 8, batch_size, "capture_threads")
+        self._batch_size = batch_size
+        self._batch_latency = batch_latency
+        self._configs: List[SessionConfig] = []
+        self.sessions: List[AsyncPipelineSession] = []
+
+    def add_session(self, config: SessionConfig):
+        if any(c.session_id == config.session_id for c in self._configs):
+            raise ValueError(f"duplicate session_id '{config.session_id}'")
+        self._configs.append(config)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {s.config.session_id: s.metrics.snapshot() for s in self.sessions}
+
+    async def run(self, duration: Optional[float] = None, stop: Optional[asyncio.Event] = None):
+        """
+        run every session until duration elapses or stop is set
+        a session that fails outright (e.g. its publisher cannot connect) has the error
+        recorded in its metrics and ends, the other sessions keep running
+        """
+        stop = stop if stop is not None else asyncio.Event()
+        predictor = BatchPredictor(self._batch_size, self._batch_latency) if self._batch_size else None
+        try:
+            with ThreadPoolExecutor(max_workers=self._capture_threads) as executor:
+                self.sessions = [AsyncPipelineSession(config, executor, predictor) for config in self._configs]
+                tasks = [asyncio.create_task(self._run_session(session, stop)) for session in self.sessions]
+                if duration is not None:
+                    asyncio.get_running_loop().call_later(duration, stop.set)
+                try:
+                    await asyncio.gather(*tasks)
+                finally:
+                    # cancelled from outside: no session may outlive the executor and predictor
+                    stop.set()
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            if predictor is not None:
+                predictor.close()
+
+    @staticmethod
+    async def _run_session(session: AsyncPipelineSession, stop: asyncio.Event):
+        try:
+            await session.run(stop)
+        except Exception as e:
+            session.metrics.record_error(e)
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class _Request:
+    __slots__ = ("estimator", "features", "future", "submitted")
+
+    def __init__(self, estimator, features, future: Future, submitted: float):
+        self.estimator = estimator
+        self.features = features
+        self.future = future
+        self.submitted = submitted
+
+
+class BatchPredictor:
+    """
+    micro-batching layer in front of GazeEstimator.predict
+
+    every GazeSource in the process submits its feature vector here instead of
+    calling predict([features]) itself. a worker thread collects requests until
+    max_batch are waiting, every registered stream has one waiting, or the oldest
+    has waited max_latency seconds, then runs one predict() per estimator over the
+    whole batch and hands each caller its own (x, y) back, so every source still
+    publishes to its own Blackboard
+
+    within one camera stream frames arrive one after another and each is needed
+    before the next, so the gain comes from several streams (sessions) sharing a
+    predictor. streams announce themselves with register_stream(): a predictor
+    serving a single stream then never holds its request back
+    """
+
+    def __init__(self, max_batch: int = 32, max_latency: float = 0.005):
+        """
+        :param max_batch: largest number of feature vectors per predict() call
+        :param max_latency: longest time (s) a request may wait for others to join its batch
+        """
+        self._max_batch = max_batch
+        self._max_latency = max_latency
+
+        self._pending: "deque[_Request]" = deque()
+        self._cond = threading.Condition()
+        self._running = True
+        # streams that submit one request at a time, 0 = unknown (wait for max_batch)
+        self._streams = 0
+
+        # stats
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._samples = 0
+        self._batch_sizes: Dict[int, int] = {}
+        self._latencies: "deque[float]" = deque(maxlen=10000)
+        self._predict_time = 0.0
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    # --------- public api ---------
+    def submit(self, estimator, features) -> Future:
+        """queue one feature vector, the future resolves to (x, y)"""
+        future: Future = Future()
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("BatchPredictor is closed")
+            self._pending.append(_Request(estimator, features, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def predict(self, estimator, features) -> Tuple[float, float]:
+        """blocking convenience wrapper around submit()"""
+        return self.submit(estimator, features).result()
+
+    def register_stream(self):
+        """a stream (e.g. an open camera) that will wait on one prediction at a time"""
+        with self._cond:
+            self._streams += 1
+            self._cond.notify()
+
+    def unregister_stream(self):
+        with self._cond:
+            self._streams = max(self._streams - 1, 0)
+            # the remaining streams may all be waiting already
+            self._cond.notify()
+
+    def close(self):
+        """finish the queued requests and stop the worker"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._worker.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            return {
+                "batches": self._batches,
+                "samples": self._samples,
+                "mean_batch": self._samples / self._batches if self._batches else 0.0,
+                "batch_sizes": dict(self._batch_sizes),
+                "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+                "latency_p99": latencies[int(len(latencies) * 0.99)] if latencies else None,
+                "predict_time": self._predict_time,
+            }
+
+    # --------- worker ---------
+    def _take_batch(self) -> Optional[List[_Request]]:
+        """wait for a full batch, a request from every stream or the oldest request's deadline"""
+        with self._cond:
+            while True:
+                if not self._pending:
+                    if not self._running:
+                        return None
+                    self._cond.wait()
+                    continue
+
+                full = min(self._max_batch, self._streams) if self._streams else self._max_batch
+                wait = self._pending[0].submitted + self._max_latency - time.perf_counter()
+                if len(self._pending) >= full or wait <= 0 or not self._running:
+                    count = min(len(self._pending), self._max_batch)
+                    return [self._pending.popleft() for _ in range(count)]
+                self._cond.wait(wait)
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+
+            # one predict() per estimator (sessions may have different calibrations)
+            groups: Dict[int, List[_Request]] = {}
+            for request in batch:
+                groups.setdefault(id(request.estimator), []).append(request)
+
+            started = time.perf_counter()
+            for requests in groups.values():
+                try:
+                    points = requests[0].estimator.predict(np.stack([r.features for r in requests]))
+                except Exception as e:
+                    for r in requests:
+                        r.future.set_exception(e)
+                    continue
+                for r, point in zip(requests, points):
+                    r.future.set_result((float(point[0]), float(point[1])))
+            done = time.perf_counter()
+
+            with self._stats_lock:
+                self._batches += 1
+                self._samples += len(batch)
+                self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+                self._predict_time += done - started
+                for r in batch:
+                    self._latencies.append(done - r.submitted)
+
+
+def capture_pool_size(threads: Optional[int], default: int, batch_size: Optional[int], name: str) -> int:
+    """
+    threads for a capture pool whose tasks feed one BatchPredictor: each thread
+    blocks on its own prediction, so fewer threads than batch_size never fill a batch
+
+    :param threads: requested pool size, None = default or batch_size if larger
+    :param name: parameter name used in the error message
+    """
+    if threads is None:
+        return max(default, batch_size or 0)
+    if batch_size and batch_size > threads:
+        raise ValueError(f"batch_size {batch_size} > {name} {threads}: a batch can never hold more frames "
+                         f"than there are capture threads")
+    return threads
@@ -0,0 +1,122 @@
+"""
+threaded vs asyncio runtime: many replayed sessions, same stages
+
+usage (from the repo root):
+    python -m benchmarks.async_runtime --sessions 10 50 200 --duration 10
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import resource
+import tempfile
+import threading
+import time
+
+from async_pipeline import AsyncSessionHost
+from gaze_session import save_session_csv, synthetic_session
+from pipeline_session import PipelineSession, SessionConfig
+
+
+class _LagProbe:
+    """how late each gaze sample is processed relative to its timestamp"""
+
+    def __init__(self):
+        self.lags = []
+
+    def update(self, data):
+        if data.get("changed") == "current_gaze":
+            self.lags.append(time.time() - data["current_gaze"].timestamp)
+
+
+def _configs(n, replay_path):
+    return [SessionConfig(session_id=f"s{i}", replay_path=replay_path, early_commit=True) for i in range(n)]
+
+
+def _run_threaded(configs, duration):
+    """the original design: one source thread per session, step + sleep"""
+    probes = [_LagProbe() for _ in configs]
+    sessions = [PipelineSession(c, observers=[p]) for c, p in zip(configs, probes)]
+    stop = threading.Event()
+
+    def loop(session):
+        session.open()
+        while not stop.is_set():
+            session.step()
+            time.sleep(session.config.poll_interval)
+
+    threads = [threading.Thread(target=loop, args=(s,), daemon=True) for s in sessions]
+    for t in threads:
+        t.start()
+    peak_threads = threading.active_count()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sessions, probes, peak_threads
+
+
+def _run_async(configs, duration):
+    host = AsyncSessionHost()
+    for c in configs:
+        host.add_session(c)
+    probes = []
+    peak = [0]
+
+    async def main():
+        run = asyncio.create_task(host.run(duration=duration))
+        # attach probes once the sessions exist
+        await asyncio.sleep(0)
+        for session in host.sessions:
+            probe = _LagProbe()
+            session.blackboard.add_observer(probe)
+            probes.append(probe)
+        await asyncio.sleep(duration / 2)
+        peak[0] = threading.active_count()
+        await run
+
+    asyncio.run(main())
+    return host.sessions, probes, peak[0]
+
+
+def _report(name, n, sessions, probes, threads, cpu, duration):
+    lags = sorted(l for p in probes for l in p.lags)
+    samples = sum(s.metrics.snapshot()["gaze_samples"] for s in sessions)
+    commands = sum(s.metrics.snapshot()["commands"] for s in sessions)
+    p50 = lags[len(lags) // 2] * 1000 if lags else float("nan")
+    p99 = lags[int(len(lags) * 0.99)] * 1000 if lags else float("nan")
+    print(f"{name:<9}{n:>9}{samples / duration:>12.0f}{commands:>10}{p50:>10.1f}{p99:>10.1f}"
+          f"{cpu / duration:>9.0%}{threads:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    fd, replay_path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    save_session_csv(synthetic_session(duration=60, seed=0), replay_path)
+
+    print(f"{'runtime':<9}{'sessions':>9}{'samples/s':>12}{'commands':>10}{'lag p50':>10}{'lag p99':>10}"
+          f"{'cpu':>9}{'threads':>9}")
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results = []
+            for n in args.sessions:
+                for name, runner in (("threaded", _run_threaded), ("asyncio", _run_async)):
+                    cpu0 = resource.getrusage(resource.RUSAGE_SELF)
+                    sessions, probes, threads = runner(_configs(n, replay_path), args.duration)
+                    cpu1 = resource.getrusage(resource.RUSAGE_SELF)
+                    cpu = (cpu1.ru_utime - cpu0.ru_utime) + (cpu1.ru_stime - cpu0.ru_stime)
+                    results.append((name, n, sessions, probes, threads, cpu))
+        for name, n, sessions, probes, threads, cpu in results:
+            _report(name, n, sessions, probes, threads, cpu, args.duration)
+    finally:
+        os.remove(replay_path)
+    print("lag = time between a sample's timestamp and its delivery to the pipeline (ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+throughput and per-sample latency of BatchPredictor vs one predict() per frame
+
+usage (from the repo root):
+    python -m benchmarks.batch_predict --streams 16 --batch-sizes 1 4 8 16 32
+
+uses the real eyetrax model from gaze_model.pkl when eyetrax is installed,
+otherwise an sklearn StandardScaler + Ridge of the same shape, otherwise a
+plain numpy stand-in (which has far less per-call overhead than sklearn)
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import numpy as np
+
+from batch_predictor import BatchPredictor
+
+FEATURES = 486
+
+
+class _NumpyRidge:
+    """scaler + linear model with eyetrax's shapes, no per-call validation"""
+
+    def __init__(self, rng):
+        self._mean = rng.normal(size=FEATURES)
+        self._scale = rng.uniform(0.5, 2.0, size=FEATURES)
+        self._coef = rng.normal(size=(2, FEATURES))
+        self._intercept = rng.normal(size=2)
+
+    def predict(self, features):
+        x = (np.asarray(features, dtype=np.float64) - self._mean) / self._scale
+        return x @ self._coef.T + self._intercept
+
+
+def _load_estimator(rng):
+    try:
+        from eyetrax import GazeEstimator
+        estimator = GazeEstimator()
+        estimator.load_model("gaze_model.pkl")
+        return estimator, "eyetrax GazeEstimator"
+    except Exception:
+        pass
+    try:
+        from sklearn.linear_model import Ridge
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        model = make_pipeline(StandardScaler(), Ridge())
+        model.fit(rng.normal(size=(200, FEATURES)), rng.normal(size=(200, 2)))
+        return model, "sklearn StandardScaler + Ridge"
+    except ImportError:
+        return _NumpyRidge(rng), "numpy stand-in"
+
+
+def _run(streams, duration, predict):
+    """closed loop: every stream predicts as fast as it gets answers back"""
+    latencies = [[] for _ in range(streams)]
+    stop = threading.Event()
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(64, FEATURES))
+
+    def stream(i):
+        k = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            predict(features[k % len(features)])
+            latencies[i].append(time.perf_counter() - started)
+            k += 1
+
+    threads = [threading.Thread(target=stream, args=(i,)) for i in range(streams)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sorted(l for per_stream in latencies for l in per_stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=16, help="concurrent camera streams (threads)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--max-latency", type=float, default=0.005, help="batch deadline (s)")
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    estimator, name = _load_estimator(np.random.default_rng(1))
+    print(f"estimator: {name}, {args.streams} streams, deadline {args.max_latency * 1000:.1f} ms")
+    print(f"{'mode':<12}{'pred/s':>10}{'lat p50 ms':>12}{'lat p99 ms':>12}{'mean batch':>12}")
+
+    lat = _run(args.streams, args.duration, lambda f: estimator.predict([f])[0])
+    print(f"{'per-frame':<12}{len(lat) / args.duration:>10.0f}{statistics.median(lat) * 1000:>12.3f}"
+          f"{lat[int(len(lat) * 0.99)] * 1000:>12.3f}{1:>12.1f}")
+
+    for size in args.batch_sizes:
+        predictor = BatchPredictor(max_batch=size, max_latency=args.max_latency)
+        for _ in range(args.streams):
+            predictor.register_stream()
+        lat = _run(args.streams, args.duration, lambda f: predictor.predict(estimator, f))
+        stats = predictor.stats()
+        predictor.close()
+        print(f"{'batch ' + str(size):<12}{len(lat) / args.duration:>10.0f}{statistics.median(lat) * 1000:>12.3f}"
+              f"{lat[int(len(lat) * 0.99)] * 1000:>12.3f}{stats['mean_batch']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
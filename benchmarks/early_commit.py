@@ -0,0 +1,84 @@
+"""
+latency vs false-command rate of EarlyCommitInterpreter on recorded sessions
+
+usage (from the repo root):
+    python -m benchmarks.early_commit                      # synthetic sessions
+    python -m benchmarks.early_commit session1.csv ...     # recorded sessions (timestamp,x,y,target)
+"""
+import argparse
+from typing import List
+
+from command_generator import CommandGenerator
+from early_commit_interpreter import EarlyCommitInterpreter
+from gaze_filter import FILTERS, GazeFilterStage, make_filter
+from gaze_interpreter import GazeInterpreter
+from gaze_session import GazeSession, load_session_csv, score_commands, synthetic_session
+from session_replay import replay_session
+
+
+def _evaluate(sessions: List[GazeSession], build):
+    latencies = []
+    false_commands = 0
+    total_commands = 0
+    missed = 0
+    for session in sessions:
+        result = replay_session(session, build)
+        score = score_commands(session, *result.confirmed())
+        latencies.extend(score.latencies)
+        false_commands += score.false_commands
+        total_commands += score.total_commands
+        missed += score.missed_targets
+    return latencies, false_commands, total_commands, missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sessions", nargs="*", help="recorded session csv files")
+    parser.add_argument("--synthetic", type=int, default=5, help="number of synthetic sessions when no files are given")
+    parser.add_argument("--duration", type=float, default=120.0)
+    parser.add_argument("--max-dwell", type=float, default=1.5)
+    parser.add_argument("--min-samples", type=int, default=5)
+    parser.add_argument("--std-threshold", type=float, default=0.06)
+    parser.add_argument("--commit-dwell", type=float, nargs="+", default=[0.15, 0.2, 0.25, 0.3, 0.4, 0.5])
+    parser.add_argument("--filter", choices=sorted(FILTERS), default=None,
+                        help="smooth gaze with a GazeFilterStage before the interpreter")
+    args = parser.parse_args()
+
+    if args.sessions:
+        sessions = [load_session_csv(path) for path in args.sessions]
+    else:
+        sessions = [synthetic_session(duration=args.duration, seed=i, name=f"synthetic-{i}")
+                    for i in range(args.synthetic)]
+
+    gaze_key = "current_gaze" if args.filter is None else "current_filtered_gaze"
+
+    def stages(bb, interpreter):
+        if args.filter is None:
+            return [interpreter, CommandGenerator(bb)]
+        return [GazeFilterStage(bb, make_filter(args.filter)), interpreter, CommandGenerator(bb)]
+
+    configs = [("window %.2fs" % args.max_dwell,
+                lambda bb: stages(bb, GazeInterpreter(bb, window_duration=args.max_dwell, min_samples=args.min_samples,
+                                                      std_threshold=args.std_threshold, gaze_key=gaze_key)))]
+    for dwell in args.commit_dwell:
+        configs.append(("early %.2fs" % dwell,
+                        lambda bb, dwell=dwell: stages(bb, EarlyCommitInterpreter(bb, commit_dwell=dwell,
+                                                                                  max_dwell=args.max_dwell,
+                                                                                  min_samples=args.min_samples,
+                                                                                  std_threshold=args.std_threshold,
+                                                                                  gaze_key=gaze_key))))
+
+    print(f"{len(sessions)} session(s), {sum(len(s) for s in sessions)} samples")
+    print(f"{'config':<14}{'p50 ms':>9}{'p90 ms':>9}{'<500ms':>9}{'false':>9}{'cmds':>7}{'missed':>8}")
+    for name, build in configs:
+        latencies, false_commands, total, missed = _evaluate(sessions, build)
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else float("nan")
+        p90 = latencies[int(len(latencies) * 0.9)] * 1000 if latencies else float("nan")
+        fast = sum(1 for l in latencies if l < 0.5) / len(latencies) if latencies else 0.0
+        rate = false_commands / total if total else 0.0
+        print(f"{name:<14}{p50:>9.0f}{p90:>9.0f}{fast:>9.1%}{rate:>9.1%}{total:>7}{missed:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+lead time and error rate of provisional commands issued from GazePredictor
+
+a provisional command is settled by the first fixation whose window reaches
+the prediction. with the plain window (no --early-commit) that window also
+holds the saccade and usually reads invalid, so most provisionals are
+retracted even when the prediction was right --> main.py only offers
+--predict together with --early-commit
+
+usage (from the repo root):
+    python -m benchmarks.gaze_prediction                      # synthetic sessions
+    python -m benchmarks.gaze_prediction session1.csv ...     # recorded sessions (timestamp,x,y,target)
+"""
+import argparse
+
+import numpy as np
+
+from command_generator import CommandGenerator
+from early_commit_interpreter import EarlyCommitInterpreter
+from gaze_interpreter import GazeInterpreter
+from gaze_predictor import GazePredictor
+from gaze_session import load_session_csv, synthetic_session
+from session_replay import replay_session
+
+
+def _intent_at(session, t):
+    """
+    target at time t, or the next one when t falls in a saccade: the samples
+    between two fixations carry no target although the gaze is already heading
+    for the next one, which is exactly what an in-flight prediction anticipates
+    """
+    i = int(np.searchsorted(session.timestamps, t, side="right")) - 1
+    for target in session.targets[max(i, 0):]:
+        if target is not None:
+            return target
+    return None
+
+
+def _provisional_stats(session, result):
+    """walk the command stream and pair provisional commands with the fixation that settled them"""
+    leads = []
+    issued = 0
+    retracted = 0
+    wrong = 0
+    confirmed = 0
+    pending = None
+    fixation = None
+    next_fixation = 0
+    for t, cmd in zip(result.command_times, result.commands):
+        # the fixation a confirmed command came from is the last one recorded up to it
+        while next_fixation < len(result.fixations) and result.fixation_times[next_fixation] <= t:
+            fixation = result.fixations[next_fixation]
+            next_fixation += 1
+
+        if cmd.provisional and cmd.retracted:
+            retracted += 1
+            pending = None
+        elif cmd.provisional:
+            issued += 1
+            if session.has_targets and cmd.command is not _intent_at(session, t):
+                wrong += 1
+            pending = (t, cmd.command)
+        else:
+            confirmed += 1
+            # like CommandGenerator, fixations that ended before the provisional leave it pending
+            if pending is not None and fixation is not None and fixation.end_time >= pending[0]:
+                if pending[1] is cmd.command:
+                    leads.append(t - pending[0])
+                pending = None
+    return leads, issued, retracted, wrong, confirmed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sessions", nargs="*", help="recorded session csv files")
+    parser.add_argument("--synthetic", type=int, default=5, help="number of synthetic sessions when no files are given")
+    parser.add_argument("--duration", type=float, default=120.0)
+    parser.add_argument("--early-commit", action="store_true", help="confirm with EarlyCommitInterpreter instead of the plain window")
+    parser.add_argument("--window", type=float, default=1.5)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.75, 1.0])
+    args = parser.parse_args()
+
+    if args.sessions:
+        sessions = [load_session_csv(path) for path in args.sessions]
+    else:
+        sessions = [synthetic_session(duration=args.duration, seed=i, name=f"synthetic-{i}")
+                    for i in range(args.synthetic)]
+
+    def interpreter(bb):
+        if args.early_commit:
+            return EarlyCommitInterpreter(bb, max_dwell=args.window, std_threshold=0.06)
+        return GazeInterpreter(bb, window_duration=args.window, std_threshold=0.06)
+
+    print(f"{len(sessions)} session(s), {sum(len(s) for s in sessions)} samples")
+    print(f"{'threshold':<11}{'lead p50':>10}{'lead p90':>10}{'covered':>9}{'issued':>8}{'retract':>9}{'wrong':>8}")
+    for threshold in args.thresholds:
+        leads, issued, retracted, wrong, confirmed = [], 0, 0, 0, 0
+        for session in sessions:
+            result = replay_session(session, lambda bb: [GazePredictor(bb), interpreter(bb),
+                                                         CommandGenerator(bb, provisional_threshold=threshold)])
+            l, i, r, w, c = _provisional_stats(session, result)
+            leads.extend(l)
+            issued += i
+            retracted += r
+            wrong += w
+            confirmed += c
+
+        leads.sort()
+        p50 = leads[len(leads) // 2] * 1000 if leads else float("nan")
+        p90 = leads[int(len(leads) * 0.9)] * 1000 if leads else float("nan")
+        covered = len(leads) / confirmed if confirmed else 0.0
+        retract_rate = retracted / issued if issued else 0.0
+        wrong_rate = wrong / issued if issued else 0.0
+        print(f"{threshold:<11.2f}{p50:>8.0f}ms{p90:>8.0f}ms{covered:>9.1%}{issued:>8}{retract_rate:>9.1%}{wrong_rate:>8.1%}")
+    print("lead = time a provisional command was ahead of the fixation that confirmed it")
+    print("covered = confirmed commands that had a matching provisional one")
+    print("wrong = provisional commands other than the intended target (the next one during a saccade)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+command rate the MQTT path can sustain: Blackboard --> publisher --> broker --> RobotGame
+
+commands are pushed into a Blackboard at increasing rates. MqttCommandPublisher
+(or AsyncMqttPublisher with --async) sends them through a local MqttBroker to a
+headless RobotGame, whose _on_mqtt_message and _apply_command are instrumented.
+reported per rate: achieved publish / receive / apply throughput, the game's
+command queue and paho's outgoing backlog, broker transit and end-to-end latency
+
+latencies pair commands first-in first-out, which holds while nothing is lost
+(QoS 1 or a local broker)
+
+usage (from the repo root):
+    python -m benchmarks.mqtt_load [--rates 100 1000 10000] [--duration 3] [--async --qos 1]
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+import warnings
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from async_pipeline import AsyncBlackboard, AsyncMqttPublisher
+from blackboard import Blackboard
+from command_publisher import MqttCommandPublisher
+from mqtt_broker import MqttBroker
+from robot_command import CommandType, RobotCommand
+from robot_game_client import RobotGame
+
+# paho 2 warns about the version 1 callback api the repo uses
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+_COMMANDS = [CommandType.FORWARD, CommandType.BACKWARD, CommandType.LEFT, CommandType.RIGHT, CommandType.STOP]
+
+
+class _Probe:
+    """publish / receive / apply timestamps plus queue samples for one rate step"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.published = 0
+        self.received = 0
+        self.applied = 0
+        # publish times waiting for their receive / apply
+        self._to_receive: "deque[float]" = deque()
+        self._to_apply: "deque[float]" = deque()
+        self.transit: List[float] = []
+        self.end_to_end: List[float] = []
+        self.queue_samples: List[int] = []
+        self.backlog_samples: List[int] = []
+
+    def on_publish(self):
+        now = time.perf_counter()
+        self._to_receive.append(now)
+        self._to_apply.append(now)
+        self.published += 1
+
+    def on_receive(self):
+        now = time.perf_counter()
+        self.received += 1
+        if self._to_receive:
+            self.transit.append(now - self._to_receive.popleft())
+
+    def on_apply(self):
+        now = time.perf_counter()
+        self.applied += 1
+        if self._to_apply:
+            self.end_to_end.append(now - self._to_apply.popleft())
+
+
+def _instrument(game: RobotGame, probe: _Probe):
+    on_message = game._on_mqtt_message
+    apply_command = game._apply_command
+
+    def timed_on_message(client, userdata, message):
+        probe.on_receive()
+        on_message(client, userdata, message)
+
+    def timed_apply(cmd):
+        apply_command(cmd)
+        probe.on_apply()
+
+    game._client.on_message = timed_on_message
+    game._apply_command = timed_apply
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+
+class _ThreadedPath:
+    """the pipeline's own publisher: paho's network loop on a background thread"""
+
+    def __init__(self, host: str, port: int, topic: str):
+        self.blackboard = Blackboard(1920, 1080)
+        self.publisher = MqttCommandPublisher(self.blackboard, broker_host=host, broker_port=port, topic=topic)
+        self.blackboard.add_observer(self.publisher)
+
+    def backlog(self) -> int:
+        # messages paho has queued but not written yet
+        return len(getattr(self.publisher._client, "_out_packet", ()))
+
+    def close(self):
+        self.publisher.close()
+
+
+class _AsyncPath:
+    """AsyncMqttPublisher on its own event loop thread"""
+
+    def __init__(self, host: str, port: int, topic: str, qos: int):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self.blackboard = AsyncBlackboard(1920, 1080, loop=self._loop)
+        self.publisher = AsyncMqttPublisher(self.blackboard, host, port, topic, qos=qos, max_pending=100000)
+        asyncio.run_coroutine_threadsafe(self.publisher.start(), self._loop).result()
+
+    def backlog(self) -> int:
+        stats = self.publisher.stats()
+        return stats["pending"] + stats["inflight"]
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.publisher.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def _run_rate(path, game: RobotGame, probe: _Probe, rate: float, duration: float,
+              drain_timeout: float) -> Dict[str, Any]:
+    probe.reset()
+    stop_sampling = threading.Event()
+
+    def sample():
+        while not stop_sampling.wait(0.01):
+            probe.queue_samples.append(game._cmd_queue.qsize())
+            probe.backlog_samples.append(path.backlog())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    interval = 1.0 / rate
+    started = time.perf_counter()
+    deadline = started + duration
+    next_at = started
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        if now < next_at:
+            time.sleep(min(next_at - now, 0.001))
+            continue
+        probe.on_publish()
+        path.blackboard.set_current_command(RobotCommand(random.choice(_COMMANDS), time.time()))
+        next_at += interval
+    publish_time = time.perf_counter() - started
+    queue_at_end = game._cmd_queue.qsize()
+    backlog_at_end = path.backlog()
+
+    # let everything in flight arrive
+    drain_deadline = time.perf_counter() + drain_timeout
+    while probe.applied < probe.published and time.perf_counter() < drain_deadline:
+        time.sleep(0.01)
+    total_time = time.perf_counter() - started
+    stop_sampling.set()
+    sampler.join()
+
+    return {
+        "rate": rate,
+        "published_per_s": probe.published / publish_time,
+        "received_per_s": probe.received / total_time,
+        "applied_per_s": probe.applied / total_time,
+        "lost": probe.published - probe.applied,
+        "queue_max": max(probe.queue_samples, default=0),
+        "queue_at_end": queue_at_end,
+        "backlog_max": max(probe.backlog_samples, default=0),
+        "backlog_at_end": backlog_at_end,
+        "transit_p50": _percentile(probe.transit, 50),
+        "transit_p99": _percentile(probe.transit, 99),
+        "e2e_p50": _percentile(probe.end_to_end, 50),
+        "e2e_p90": _percentile(probe.end_to_end, 90),
+        "e2e_p99": _percentile(probe.end_to_end, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", type=float, nargs="+", default=[50, 200, 1000, 5000, 20000],
+                        help="commands per second to try")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per rate")
+    parser.add_argument("--drain-timeout", type=float, default=10.0,
+                        help="seconds to wait for in-flight commands after each rate")
+    parser.add_argument("--max-latency", type=float, default=0.25,
+                        help="end-to-end p99 (s) above which the subscriber counts as falling behind")
+    parser.add_argument("--broker", default=None, help="use this broker instead of a local MqttBroker")
+    parser.add_argument("--port", type=int, default=None,
+                        help="port of --broker (default 1883) or for the local MqttBroker (default: a free one)")
+    parser.add_argument("--topic", default="gaze_bot/load_test")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="publish with AsyncMqttPublisher instead of MqttCommandPublisher")
+    parser.add_argument("--qos", type=int, choices=[0, 1], default=1, help="QoS of the async publisher")
+    args = parser.parse_args()
+
+    broker = None
+    host, port = args.broker, args.port if args.port is not None else 1883
+    if host is None:
+        broker = MqttBroker("127.0.0.1", args.port if args.port is not None else 0)
+        host, port = "127.0.0.1", broker.start()
+
+    probe = _Probe()
+    game = RobotGame(host, port, args.topic, headless=True)
+    _instrument(game, probe)
+    game_thread = threading.Thread(target=game.run, daemon=True)
+    game_thread.start()
+
+    path = _AsyncPath(host, port, args.topic, args.qos) if args.use_async else _ThreadedPath(host, port, args.topic)
+    # give the subscription time to reach the broker
+    time.sleep(0.5)
+
+    publisher = f"AsyncMqttPublisher qos {args.qos}" if args.use_async else "MqttCommandPublisher qos 0"
+    print(f"{publisher} --> {'local MqttBroker' if broker else host}:{port} --> RobotGame (headless)")
+    print(f"{'rate':>8}{'pub/s':>9}{'recv/s':>9}{'apply/s':>9}{'lost':>7}{'queue':>8}{'backlog':>9}"
+          f"{'transit p50':>12}{'p99':>8}{'e2e p50':>9}{'p90':>8}{'p99':>8}")
+    behind_at: Optional[float] = None
+    try:
+        for rate in args.rates:
+            r = _run_rate(path, game, probe, rate, args.duration, args.drain_timeout)
+            print(f"{rate:>8.0f}{r['published_per_s']:>9.0f}{r['received_per_s']:>9.0f}{r['applied_per_s']:>9.0f}"
+                  f"{r['lost']:>7}{r['queue_max']:>8}{r['backlog_max']:>9}"
+                  f"{r['transit_p50'] * 1000:>12.1f}{r['transit_p99'] * 1000:>8.1f}"
+                  f"{r['e2e_p50'] * 1000:>9.1f}{r['e2e_p90'] * 1000:>8.1f}{r['e2e_p99'] * 1000:>8.1f}")
+            falling_behind = (r["lost"] > 0 or r["e2e_p99"] > args.max_latency
+                              or r["published_per_s"] < 0.95 * rate)
+            if falling_behind and behind_at is None:
+                behind_at = rate
+    finally:
+        path.close()
+        game.close()
+        if broker is not None:
+            print(f"broker: {broker.stats()}")
+            broker.stop()
+
+    if behind_at is None:
+        print(f"kept up with every rate up to {max(args.rates):.0f} commands/s")
+    else:
+        print(f"falls behind at {behind_at:.0f} commands/s (p99 > {args.max_latency * 1000:.0f} ms, "
+              f"lost commands or publisher below the target rate)")
+
+
+if __name__ == "__main__":
+    main()
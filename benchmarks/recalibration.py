@@ -0,0 +1,157 @@
+"""
+how well OnlineRecalibrator follows calibration drift
+
+synthetic sessions get a drift that grows over the session (offset + scale);
+each session is replayed with and without the online correction and scored
+against its targets
+
+the user does not look exactly at the labels the recalibrator snaps to: every
+fixation misses its label by --jitter, and --off-label of them aim at some
+other point of the zone, so the fit has to cope with wrong targets
+
+corrections are applied synchronously (the replay waits for the recalibrator
+after every sample), so a run is repeatable and does not depend on how fast
+the background thread happens to be
+
+usage (from the repo root):
+    python -m benchmarks.recalibration [--drift 0.08] [--scale 0.1] [--jitter 0.02] [--off-label 0.3]
+"""
+import argparse
+import contextlib
+import os
+
+import numpy as np
+
+from blackboard import Blackboard
+from command_generator import CommandGenerator
+from gaze_event import GazeEvent
+from gaze_interpreter import GazeInterpreter
+from gaze_recalibration import OnlineRecalibrator
+from gaze_session import GazeSession, score_commands, synthetic_session
+from session_replay import ReplayBlackboard
+from zone_layout import diagonal_layout
+
+
+def _looking_around(session: GazeSession, jitter: float, off_label: float, seed: int) -> GazeSession:
+    """
+    move every fixation (run of samples with the same target) off its label point:
+    by a gaussian aim error of sd jitter, or for a fraction off_label of them
+    to a uniformly drawn point of the same zone
+    """
+    rng = np.random.default_rng(seed)
+    lookup = diagonal_layout().compile()
+    xs = session.xs.copy()
+    ys = session.ys.copy()
+    targets = session.targets
+
+    start = 0
+    while start < len(targets):
+        end = start + 1
+        while end < len(targets) and targets[end] is targets[start]:
+            end += 1
+        zone = targets[start]
+        if zone is not None:
+            if rng.random() < off_label:
+                # the centroid of the fixation moves to a random point of its zone
+                cx, cy = xs[start:end].mean(), ys[start:end].mean()
+                while True:
+                    px, py = rng.uniform(0.05, 0.95, size=2)
+                    if lookup.command_at(px, py) is zone:
+                        break
+                dx, dy = px - cx, py - cy
+            else:
+                dx, dy = rng.normal(0.0, jitter, size=2)
+            xs[start:end] += dx
+            ys[start:end] += dy
+        start = end
+    return GazeSession(timestamps=session.timestamps, xs=xs, ys=ys, targets=targets, name=session.name)
+
+
+def _drifted(session: GazeSession, drift: float, scale: float) -> GazeSession:
+    """raw model output slides away from the truth linearly over the session"""
+    ts = session.timestamps
+    progress = (ts - ts[0]) / max(ts[-1] - ts[0], 1e-9)
+    xs = 0.5 + (session.xs - 0.5) * (1 + scale * progress) + drift * progress
+    ys = 0.5 + (session.ys - 0.5) * (1 - scale * progress) + 0.5 * drift * progress
+    return GazeSession(timestamps=ts, xs=xs, ys=ys, targets=session.targets, name=session.name)
+
+
+class _CorrectedFeed:
+    """stands in for GazeSource: applies the current correction before publishing"""
+
+    def __init__(self, blackboard: Blackboard):
+        self._blackboard = blackboard
+        self._correction = None
+
+    def set_correction(self, correction):
+        self._correction = correction
+
+    def publish(self, t: float, x: float, y: float):
+        correction = self._correction
+        if correction is None:
+            self._blackboard.set_current_gaze(GazeEvent(x=x, y=y, timestamp=t))
+            return
+        cx, cy = correction.apply(x, y)
+        self._blackboard.set_current_gaze(GazeEvent(x=cx, y=cy, timestamp=t, raw_x=x, raw_y=y))
+
+
+def _run(session: GazeSession, recalibrate: bool, threshold: float):
+    board = ReplayBlackboard()
+    feed = _CorrectedFeed(board)
+    board.add_observer(GazeInterpreter(board, window_duration=0.6, min_samples=5, std_threshold=0.06))
+    board.add_observer(CommandGenerator(board))
+    recalibrator = None
+    if recalibrate:
+        recalibrator = OnlineRecalibrator(feed.set_correction, error_threshold=threshold)
+        board.add_observer(recalibrator)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for t, x, y in zip(session.timestamps.tolist(), session.xs.tolist(), session.ys.tolist()):
+            feed.publish(t, x, y)
+            if recalibrator is not None:
+                # let the correction the fixation produced reach the feed before the next sample
+                recalibrator.drain()
+    times = [t for t, _ in board.commands]
+    types = [c.command for _, c in board.commands]
+    score = score_commands(session, times, types)
+
+    metrics = None
+    if recalibrator is not None:
+        metrics = recalibrator.metrics()
+        recalibrator.close()
+    return score, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=300.0)
+    parser.add_argument("--drift", type=float, default=0.08, help="offset reached at the end of a session")
+    parser.add_argument("--scale", type=float, default=0.1, help="scale error reached at the end of a session")
+    parser.add_argument("--threshold", type=float, default=0.05, help="error that asks for a full recalibration")
+    parser.add_argument("--jitter", type=float, default=0.02, help="sd of how far a fixation misses its label")
+    parser.add_argument("--off-label", type=float, default=0.3,
+                        help="fraction of fixations aimed at a random point of the zone instead of its label")
+    args = parser.parse_args()
+
+    sessions = [_drifted(_looking_around(synthetic_session(duration=args.duration, seed=i, name=f"synthetic-{i}"),
+                                         args.jitter, args.off_label, seed=i),
+                         args.drift, args.scale)
+                for i in range(args.sessions)]
+
+    print(f"{'session':<14}{'mode':<10}{'false':>8}{'missed':>8}{'p50 ms':>9}"
+          f"{'error':>8}{'raw err':>9}{'updates':>9}{'recal':>7}")
+    for session in sessions:
+        for recalibrate in (False, True):
+            score, metrics = _run(session, recalibrate, args.threshold)
+            missed = score.missed_targets / max(score.missed_targets + len(score.latencies), 1)
+            line = (f"{session.name:<14}{'online' if recalibrate else 'none':<10}{score.false_command_rate:>8.1%}"
+                    f"{missed:>8.1%}{score.latency_percentile(50) * 1000:>9.0f}")
+            if metrics is not None:
+                line += (f"{metrics['error']:>8.3f}{metrics['raw_error']:>9.3f}{metrics['correction_updates']:>9}"
+                         f"{'yes' if metrics['recalibration_needed'] else 'no':>7}")
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
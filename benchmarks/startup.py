@@ -0,0 +1,71 @@
+"""
+import-time and time-to-first-command profile of the headless pipeline
+
+usage (from the repo root):
+    python -m benchmarks.startup                     # replays a synthetic session
+    python -m benchmarks.startup --replay s.csv      # replays a recorded session
+    python -m benchmarks.startup --camera            # real camera + saved gaze_model.pkl
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from gaze_session import save_session_csv, synthetic_session
+from startup_profile import profile_imports
+
+# modules whose import cost we track, heavy optional ones last
+MODULES = ["blackboard", "command_generator", "gaze_interpreter", "pipeline_session", "gaze_source",
+           "command_publisher", "headless", "paho.mqtt.client", "screeninfo", "cv2", "eyetrax"]
+
+_FIRST_COMMAND = re.compile(r"^first command\s+([\d.]+)", re.MULTILINE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replay", default=None, help="recorded session csv to replay")
+    parser.add_argument("--camera", action="store_true", help="use the camera instead of a replay")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print("import cost (fresh interpreter, cumulative):")
+    for module in MODULES:
+        try:
+            rows = profile_imports(module)
+        except RuntimeError:
+            print(f"  {module:<22}{'not installed':>14}")
+            continue
+        total = next((cumulative for name, _, cumulative in rows if name == module), None)
+        print(f"  {module:<22}{total * 1000:>11.1f} ms" if total is not None else f"  {module:<22}{'?':>14}")
+
+    command = [sys.executable, "headless.py", "--broker", "none", "--early-commit",
+               "--profile", "--exit-after-first-command", "--timeout", "30"]
+    replay = args.replay
+    if not args.camera:
+        if replay is None:
+            fd, replay = tempfile.mkstemp(suffix=".csv")
+            os.close(fd)
+            save_session_csv(synthetic_session(duration=20, noisy_fraction=0.0, glance_probability=0.0, seed=0), replay)
+        command += ["--replay", replay]
+
+    times = []
+    for _ in range(args.runs):
+        result = subprocess.run(command, capture_output=True, text=True)
+        match = _FIRST_COMMAND.search(result.stdout)
+        if match:
+            times.append(float(match.group(1)))
+
+    if args.replay is None and not args.camera:
+        os.remove(replay)
+
+    print(f"\ntime to first command over {len(times)} run(s):")
+    if times:
+        print(f"  median {statistics.median(times):.1f} ms, min {min(times):.1f} ms, max {max(times):.1f} ms")
+    print("  (includes the gaze dwell itself; the 'imports' and 'pipeline built' phases are the startup cost)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
-from typing import Any, Dict, List, Protocol
+from typing import Any, Dict, List, Optional, Protocol
 import threading
 from gaze_event import GazeEvent
 from fixation_event import FixationEvent
 from robot_command import RobotCommand, CommandType
-from screeninfo import get_monitors
+from predicted_target import PredictedTarget
 
 
 
@@ -13,66 +13,66 @@ class Observer(Protocol):
         pass
 
 class Blackboard:
-    # instance stores the one and only Blackboard object
+    """
+    shared state + observer hub for one gaze pipeline
+
+    every pipeline (session) gets its own Blackboard; get_instance() keeps a
+    process-wide default one for single-pipeline programs like main.py
+    """
+    # default instance handed out by get_instance()
     _instance = None
 
-    # ensures thread safety during instance creation
+    # ensures thread safety during default instance creation
     _lock = threading.Lock()
 
-    _initialized = False
-
-    def __new__(cls):
-        """
-        __new__ is called before __init__.
-        Enforce Singleton: only create one instance of Blackboard.
-        """
-        # singleton pattern
-        if cls._instance is None:
-            with cls._lock:
-                # create new instance if not initialized before
-                cls._instance = super().__new__(cls)
-        return cls._instance
-    
-    def __init__(self):
+    def __init__(self, screen_width: Optional[int] = None, screen_height: Optional[int] = None):
         """
-        intialize instance fields only once.
-        subsequent calls to Blackboard() will return the same instance
-        and skip this initialization block
+        :param screen_width: screen width in pixels used to normalize gaze,
+                             read from the first monitor when not given
+        :param screen_height: screen height in pixels, same as screen_width
         """
-        if self._initialized:
-            return
-        
         # latest raw gaze sample (not averaged) --> used by GUI to draw dot in real time
         self._current_gaze: GazeEvent = None
+
+        # latest smoothed gaze sample, only set when a GazeFilterStage is attached
+        self._current_filtered_gaze: GazeEvent = None
         
         # data structure containing information about the past window of data collected
         self._current_fixation: FixationEvent = None
 
+        # where the GazePredictor expects the gaze to land, only set when one is attached
+        self._current_prediction: PredictedTarget = None
+
         # holds the last issued command to the robot
         self._current_command: RobotCommand = None
 
-        
-        m = get_monitors()[0]
-        self._screen_width = m.width
-        self._screen_height = m.height
+        # last provisional command (or retraction) issued ahead of a fixation,
+        # kept apart so current_command only ever holds confirmed commands
+        self._current_provisional_command: RobotCommand = None
+
+        if screen_width is None or screen_height is None:
+            # screeninfo needs a display, only ask for it when no geometry was given
+            from screeninfo import get_monitors
+            m = get_monitors()[0]
+            screen_width = m.width
+            screen_height = m.height
+        self._screen_width = screen_width
+        self._screen_height = screen_height
 
         self._observers: List[Observer] = []
         self._data_lock = threading.Lock()
-        self._initialized = True
-
-
 
-    
     @classmethod 
     def get_instance(cls):
         """
-        Java-style Singleton accessor
-        Can use get_instance() instead of Blackboard() --> makes it more like java
+        Java-style accessor for the process-wide default Blackboard
+        created on first use from the first monitor's geometry
         """
-
-        # when cls() is caled, then __new__ is called --> returns the same object
-        # every time (singleton)
-        return cls()
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
     
     # --------- Private class methods ---------
     def _get_data_snapshot(self) -> Dict[str, Any]:
@@ -83,8 +83,11 @@ class Blackboard:
         # package all the important data in the blackboard
         return{
             "current_gaze": self._current_gaze,
+            "current_filtered_gaze": self._current_filtered_gaze,
             "current_fixation": self._current_fixation,
-            "current_command": self._current_command
+            "current_prediction": self._current_prediction,
+            "current_command": self._current_command,
+            "current_provisional_command": self._current_provisional_command
         }
     
     def _notify_observers(self, snapshot: Dict[str, Any]):
@@ -122,6 +125,17 @@ class Blackboard:
         self._notify_observers(snapshot)
         
 
+    def set_current_filtered_gaze(self, gaze: GazeEvent):
+        """
+        current filtered gaze setter
+        also notify all observers
+        """
+        with self._data_lock:
+            self._current_filtered_gaze = gaze
+            snapshot = self._get_data_snapshot()
+            snapshot["changed"] = "current_filtered_gaze"
+        self._notify_observers(snapshot)
+
     def set_current_fixation(self, fixation: FixationEvent):
         """
         current fixation setter
@@ -134,6 +148,17 @@ class Blackboard:
         #print(snapshot)
         self._notify_observers(snapshot)
 
+    def set_current_prediction(self, prediction: PredictedTarget):
+        """
+        current prediction setter
+        also notify all observers
+        """
+        with self._data_lock:
+            self._current_prediction = prediction
+            snapshot = self._get_data_snapshot()
+            snapshot["changed"] = "current_prediction"
+        self._notify_observers(snapshot)
+
     def set_current_command(self, command: RobotCommand):
         """
         current command setter
@@ -145,19 +170,42 @@ class Blackboard:
             snapshot["changed"] = "current_command"
         self._notify_observers(snapshot)   
 
+    def set_current_provisional_command(self, command: RobotCommand):
+        """
+        current provisional command setter
+        also notify all observers
+        """
+        with self._data_lock:
+            self._current_provisional_command = command
+            snapshot = self._get_data_snapshot()
+            snapshot["changed"] = "current_provisional_command"
+        self._notify_observers(snapshot)
+
     # --------- getters (if needed by non-observer code) ---------
     def get_current_gaze(self):
         with self._data_lock:
             return self._current_gaze
 
+    def get_current_filtered_gaze(self):
+        with self._data_lock:
+            return self._current_filtered_gaze
+
     def get_current_fixation(self):
         with self._data_lock:
             return self._current_fixation
 
+    def get_current_prediction(self):
+        with self._data_lock:
+            return self._current_prediction
+
     def get_current_command(self):
         with self._data_lock:
             return self._current_command
         
+    def get_current_provisional_command(self):
+        with self._data_lock:
+            return self._current_provisional_command
+
     def get_screen_width(self):
         with self._data_lock:
             return self._screen_width
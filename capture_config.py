@@ -0,0 +1,389 @@
+"""
+camera capture modes: open a camera in a given resolution / fps / pixel format
+and find the fastest mode that still tracks gaze well enough
+
+usage:
+    python capture_config.py tune --camera 0 --model gaze_model.pkl --save
+    python capture_config.py tune --video clip.mp4 --model gaze_model.pkl   # no camera attached
+    python capture_config.py show --model gaze_model.pkl
+"""
+import argparse
+import contextlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# cv2 is imported on first use like in gaze_source.py
+
+# (width, height, fps, fourcc) tried by the tuner, None = driver default
+CANDIDATE_MODES: List[Tuple[int, int, Optional[int], Optional[str]]] = [
+    (w, h, fps, fourcc)
+    for w, h in ((320, 240), (640, 480), (800, 600), (1280, 720), (1920, 1080))
+    for fps in (30, 60)
+    for fourcc in ("MJPG", "YUYV")
+]
+
+
+@dataclass
+class CaptureConfig:
+    """
+    how to open the camera, every None field keeps the driver's default
+    """
+    camera_index: int = 0
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    # four character pixel format, e.g. "MJPG" (compressed, high fps over USB 2) or "YUYV"
+    fourcc: Optional[str] = None
+    # frames queued inside the driver, 1 = always the freshest frame
+    buffer_size: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CaptureConfig":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def describe(self) -> str:
+        size = f"{self.width}x{self.height}" if self.width and self.height else "default size"
+        fps = f"{self.fps:g} fps" if self.fps else "default fps"
+        return f"camera {self.camera_index}: {size}, {fps}, {self.fourcc or 'default format'}"
+
+
+def open_capture(config: CaptureConfig):
+    """open config.camera_index and apply every mode setting the config names"""
+    import cv2
+    return _apply_mode(cv2.VideoCapture(config.camera_index), config)
+
+
+def _apply_mode(cap, config: CaptureConfig):
+    import cv2
+    # the pixel format goes first, many drivers only offer large sizes / high fps with MJPG
+    if config.fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*config.fourcc))
+    if config.width:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.width)
+    if config.height:
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.height)
+    if config.fps:
+        cap.set(cv2.CAP_PROP_FPS, config.fps)
+    if config.buffer_size:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, config.buffer_size)
+    return cap
+
+
+@contextlib.contextmanager
+def capture_mode(config: CaptureConfig):
+    """
+    open every cv2.VideoCapture(config.camera_index) made inside the block in
+    config's mode, for code that opens the camera itself (eyetrax's calibration)
+
+    yields a list that collects the captures opened that way: empty afterwards
+    means the camera was opened some other way, in the driver's default mode
+    """
+    import cv2
+    real = cv2.VideoCapture
+    opened = []
+
+    def video_capture(*args, **kwargs):
+        cap = real(*args, **kwargs)
+        if args and args[0] == config.camera_index:
+            opened.append(_apply_mode(cap, config))
+        return cap
+
+    cv2.VideoCapture = video_capture
+    try:
+        yield opened
+    finally:
+        cv2.VideoCapture = real
+
+
+def actual_config(cap, camera_index: int = 0) -> CaptureConfig:
+    """the mode the driver really chose (it silently substitutes unsupported ones)"""
+    import cv2
+    code = int(cap.get(cv2.CAP_PROP_FOURCC))
+    fourcc = "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)).strip("\x00") if code else None
+    buffer_size = int(cap.get(cv2.CAP_PROP_BUFFERSIZE))
+    return CaptureConfig(camera_index=camera_index,
+                         width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or None,
+                         height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None,
+                         fps=cap.get(cv2.CAP_PROP_FPS) or None,
+                         fourcc=fourcc or None,
+                         buffer_size=buffer_size if buffer_size > 0 else None)
+
+
+# --------- saved next to the calibration ---------
+def capture_config_path(model_path: str) -> str:
+    """gaze_model.pkl --> gaze_model.capture.json"""
+    return os.path.splitext(model_path)[0] + ".capture.json"
+
+
+def save_capture_config(config: CaptureConfig, model_path: str) -> str:
+    path = capture_config_path(model_path)
+    with open(path, "w") as f:
+        json.dump(config.to_dict(), f, indent=2)
+    return path
+
+
+def load_capture_config(model_path: str) -> Optional[CaptureConfig]:
+    """the capture mode saved with a calibration, None if there is none"""
+    path = capture_config_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return CaptureConfig.from_dict(json.load(f))
+
+
+# --------- benchmarking ---------
+@dataclass
+class ModeResult:
+    config: CaptureConfig
+    frames: int
+    # time spent in read() per frame (waiting for the driver / decoding)
+    read_ms: float
+    # eyetrax feature extraction (+ prediction) per frame
+    process_ms: float
+    p95_ms: float
+    # share of frames that produced a usable (non-blink) gaze
+    detection_rate: float
+    # spread of the predicted gaze (normalized screen units) while looking at one point, None without a model
+    jitter: Optional[float]
+
+    @property
+    def latency_ms(self) -> float:
+        return self.read_ms + self.process_ms
+
+    def meets(self, min_detection: float, max_jitter: Optional[float]) -> bool:
+        if self.detection_rate < min_detection:
+            return False
+        # a mode whose jitter could not be measured does not pass a jitter limit
+        if max_jitter is not None and (self.jitter is None or self.jitter > max_jitter):
+            return False
+        return True
+
+
+def benchmark_mode(read: Callable[[], Tuple[bool, Any]], estimator, config: CaptureConfig, frames: int = 120,
+                   warmup: int = 10, screen: Tuple[int, int] = (1920, 1080), predict: bool = True) -> ModeResult:
+    """
+    time read() + feature extraction over frames frames
+
+    jitter assumes the person in front of the camera keeps looking at one point
+    (or that the recorded video shows that), it is the mean of the x / y
+    standard deviations of the predictions
+    """
+    for _ in range(warmup):
+        ok, frame = read()
+        if ok:
+            estimator.extract_features(frame)
+
+    read_times = []
+    process_times = []
+    points = []
+    detected = 0
+    for _ in range(frames):
+        started = time.perf_counter()
+        ok, frame = read()
+        got_frame = time.perf_counter()
+        if not ok:
+            break
+        features, blink = estimator.extract_features(frame)
+        if features is not None and not blink:
+            detected += 1
+            if predict:
+                x, y = estimator.predict([features])[0]
+                points.append((float(x) / screen[0], float(y) / screen[1]))
+        done = time.perf_counter()
+        read_times.append(got_frame - started)
+        process_times.append(done - got_frame)
+
+    n = len(read_times)
+    totals = np.asarray(read_times) + np.asarray(process_times) if n else np.zeros(1)
+    jitter = float(np.mean(np.std(np.asarray(points), axis=0))) if len(points) > 1 else None
+    return ModeResult(config=config,
+                      frames=n,
+                      read_ms=1000 * float(np.mean(read_times)) if n else float("nan"),
+                      process_ms=1000 * float(np.mean(process_times)) if n else float("nan"),
+                      p95_ms=1000 * float(np.percentile(totals, 95)),
+                      detection_rate=detected / n if n else 0.0,
+                      jitter=jitter)
+
+
+def tune_camera(estimator, camera_index: int = 0,
+                candidates: Sequence[Tuple[int, int, Optional[int], Optional[str]]] = CANDIDATE_MODES,
+                frames: int = 120, buffer_size: Optional[int] = 1, predict: bool = True,
+                screen: Tuple[int, int] = (1920, 1080), log=print) -> List[ModeResult]:
+    """open the camera in every candidate mode the driver accepts and benchmark it"""
+    results = []
+    seen = set()
+    for width, height, fps, fourcc in candidates:
+        requested = CaptureConfig(camera_index, width, height, fps, fourcc, buffer_size)
+        cap = open_capture(requested)
+        try:
+            if not cap.isOpened():
+                raise RuntimeError(f"cannot open camera {camera_index}")
+            actual = actual_config(cap, camera_index)
+            key = (actual.width, actual.height, round(actual.fps or 0), actual.fourcc)
+            if key in seen:
+                # the driver substituted a mode that was already measured
+                continue
+            seen.add(key)
+            # keep what the driver actually delivers, but the format / buffer we asked for
+            mode = replace(actual, fourcc=actual.fourcc or fourcc, buffer_size=buffer_size)
+            result = benchmark_mode(cap.read, estimator, mode, frames, screen=screen, predict=predict)
+        finally:
+            cap.release()
+        log(_format_result(result))
+        results.append(result)
+    return results
+
+
+class _VideoModeReader:
+    """
+    emulates a camera mode from a recorded video: frames are scaled to the
+    mode's size and, for MJPG, JPEG-encoded up front and decoded on every
+    read like a compressed camera stream. frames come back as fast as they
+    are decoded, so fps only matters on a real camera
+    """
+
+    def __init__(self, frames: List[np.ndarray], width: int, height: int, fourcc: Optional[str]):
+        import cv2
+        self._cv2 = cv2
+        resized = [cv2.resize(f, (width, height), interpolation=cv2.INTER_AREA) for f in frames]
+        self._compressed = fourcc == "MJPG"
+        if self._compressed:
+            self._frames = [cv2.imencode(".jpg", f, [cv2.IMWRITE_JPEG_QUALITY, 85])[1] for f in resized]
+        else:
+            self._frames = resized
+        self._index = 0
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._frames:
+            return False, None
+        data = self._frames[self._index % len(self._frames)]
+        self._index += 1
+        if self._compressed:
+            return True, self._cv2.imdecode(data, self._cv2.IMREAD_COLOR)
+        return True, data.copy()
+
+
+def load_video_frames(path: str, max_frames: int = 300) -> List[np.ndarray]:
+    import cv2
+    cap = cv2.VideoCapture(path)
+    frames = []
+    try:
+        while len(frames) < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+    finally:
+        cap.release()
+    if not frames:
+        raise ValueError(f"no frames could be read from '{path}'")
+    return frames
+
+
+def tune_video(estimator, path: str,
+               candidates: Sequence[Tuple[int, int, Optional[int], Optional[str]]] = CANDIDATE_MODES,
+               frames: int = 120, camera_index: int = 0, predict: bool = True,
+               screen: Tuple[int, int] = (1920, 1080), log=print) -> List[ModeResult]:
+    """
+    benchmark the candidate modes on a recorded video, modes larger than the video are skipped
+    fps cannot be measured on a recording, so the results leave it to the driver (fps=None)
+    """
+    recorded = load_video_frames(path, max(frames, 30))
+    source_h, source_w = recorded[0].shape[:2]
+    results = []
+    seen = set()
+    for width, height, _, fourcc in candidates:
+        # fps cannot be emulated offline, one measurement per size + format
+        if width > source_w or height > source_h or (width, height, fourcc) in seen:
+            continue
+        seen.add((width, height, fourcc))
+        reader = _VideoModeReader(recorded, width, height, fourcc)
+        mode = CaptureConfig(camera_index, width, height, None, fourcc, buffer_size=1)
+        result = benchmark_mode(reader.read, estimator, mode, frames, screen=screen, predict=predict)
+        log(_format_result(result))
+        results.append(result)
+    return results
+
+
+def pick_mode(results: Sequence[ModeResult], min_detection: float = 0.9,
+              max_jitter: Optional[float] = None) -> Optional[ModeResult]:
+    """lowest-latency mode that meets the accuracy floor, None if none does"""
+    good = [r for r in results if r.meets(min_detection, max_jitter)]
+    return min(good, key=lambda r: r.latency_ms) if good else None
+
+
+def _format_result(r: ModeResult) -> str:
+    c = r.config
+    size = f"{c.width}x{c.height}"
+    fps = f"{c.fps:g}" if c.fps else "-"
+    jitter = f"{r.jitter:.4f}" if r.jitter is not None else "-"
+    return (f"{size:>10}{fps:>6}{(c.fourcc or '-'):>6}{r.read_ms:>9.1f}{r.process_ms:>11.1f}{r.p95_ms:>9.1f}"
+            f"{r.detection_rate:>8.1%}{jitter:>9}")
+
+
+def _load_estimator(model_path: Optional[str]):
+    from eyetrax import GazeEstimator
+    estimator = GazeEstimator()
+    if model_path is not None:
+        estimator.load_model(model_path)
+    return estimator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    tune = sub.add_parser("tune", help="benchmark capture modes and pick the fastest good one")
+    tune.add_argument("--camera", type=int, default=0, help="camera index")
+    tune.add_argument("--video", default=None, help="recorded video to emulate the modes on instead of a camera")
+    tune.add_argument("--model", default="gaze_model.pkl",
+                      help="calibration used for the jitter measurement, the mode is saved next to it")
+    tune.add_argument("--screen", default="1920x1080", help="screen the calibration was made on, WxH")
+    tune.add_argument("--frames", type=int, default=120, help="frames measured per mode")
+    tune.add_argument("--min-detection", type=float, default=0.9, help="least share of frames with a usable gaze")
+    tune.add_argument("--max-jitter", type=float, default=0.03,
+                      help="largest gaze spread (normalized) while looking at one point")
+    tune.add_argument("--save", action="store_true", help="save the chosen mode with the calibration")
+
+    show = sub.add_parser("show", help="print the capture mode saved with a calibration")
+    show.add_argument("--model", default="gaze_model.pkl")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        config = load_capture_config(args.model)
+        print(config.describe() if config is not None else f"no capture mode saved for {args.model}")
+        return
+
+    width, height = (int(v) for v in args.screen.lower().split("x"))
+    has_model = os.path.exists(args.model)
+    estimator = _load_estimator(args.model if has_model else None)
+    if not has_model:
+        print(f"{args.model} not found: measuring latency and detection only, no jitter")
+
+    print(f"{'size':>10}{'fps':>6}{'fmt':>6}{'read ms':>9}{'extract ms':>11}{'p95 ms':>9}{'detect':>8}{'jitter':>9}")
+    if args.video is not None:
+        results = tune_video(estimator, args.video, frames=args.frames, camera_index=args.camera,
+                             predict=has_model, screen=(width, height))
+    else:
+        results = tune_camera(estimator, args.camera, frames=args.frames, predict=has_model, screen=(width, height))
+
+    best = pick_mode(results, args.min_detection, args.max_jitter if has_model else None)
+    if best is None:
+        print("no mode meets the accuracy floor")
+        return
+    print(f"fastest mode meeting the floor: {best.config.describe()} ({best.latency_ms:.1f} ms / frame)")
+    if args.save:
+        print(f"saved to {save_capture_config(best.config, args.model)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,137 @@
 import time
 import math
-from typing import Any, Dict, List, Protocol
+from typing import Any, Dict, List, Optional, Protocol, Sequence
 import statistics
 
 from gaze_event import GazeEvent
 from fixation_event import FixationEvent
 from robot_command import RobotCommand, CommandType
+from predicted_target import PredictedTarget
 from blackboard import Blackboard, Observer
+from zone_layout import ZoneLayout, diagonal_layout
 
 
 class CommandGenerator(Observer):
-    def __init__(self, blackboard: Blackboard):
+    def __init__(self, blackboard: Blackboard, layout: Optional[ZoneLayout] = None, resolution: int = 256,
+                 provisional_threshold: Optional[float] = None):
+        """
+        :param blackboard: Shared Blackboard instance for setting commands
+        :param layout: zones used to map fixations to commands,
+                       defaults to the original diagonal layout
+        :param resolution: size of the precomputed lookup grid per axis
+        :param provisional_threshold: when set, a current_prediction at least this
+                                      confident issues a provisional command (on
+                                      current_provisional_command) ahead of the
+                                      fixation. None disables provisional commands.
+                                      meant for an early-commit interpreter: a plain
+                                      window covering the prediction also covers the
+                                      saccade, reads invalid and retracts the command
+        """
         self._blackboard = blackboard
+        self._layout = layout if layout is not None else diagonal_layout()
+        self._lookup = self._layout.compile(resolution)
+
+        self._provisional_threshold = provisional_threshold
+        # provisional command waiting for a fixation to confirm or retract it
+        self._provisional: Optional[RobotCommand] = None
+        # gaze time of the prediction behind it; only fixations whose window reaches
+        # this moment may settle the provisional command
+        self._provisional_since: float = 0.0
+        # type of the last command confirmed by a fixation
+        self._last_confirmed: Optional[CommandType] = None
+
+    @property
+    def layout(self) -> ZoneLayout:
+        return self._layout
 
     def update(self, data: Dict[str, Any]):
         """
         called by the Blackboard when its state changes.
-        react only when current_fixation was updated
+        react when current_fixation was updated, and to current_prediction
+        when provisional commands are enabled
         """
-    
+
+        if (data.get("changed") == "current_prediction"):
+            self._on_prediction(data.get("current_prediction"))
+
         if (data.get("changed") == "current_fixation"):
             print(data)
             fixation = data.get("current_fixation")
             new_command_type = self._fixation_to_command(fixation)
+
+            # the fixation whose window reaches the prediction has the final word on any
+            # pending provisional command, windows that ended before it hold the previous target
+            if self._provisional is not None and fixation.end_time >= self._provisional_since:
+                if self._provisional.command != new_command_type:
+                    self._retract_provisional()
+                self._provisional = None
+
             if new_command_type is not None:
                 new_command = RobotCommand(new_command_type, time.time())
                 last_command = self._blackboard.get_current_command()
 
                 if last_command is None or new_command != last_command:
+                    self._last_confirmed = new_command_type
                     self._blackboard.set_current_command(new_command)
                     print("NEW COMMAND: " + str(new_command.command))
-    
+
+    def _on_prediction(self, prediction: Optional[PredictedTarget]):
+        """issue a provisional command when a prediction is confident enough"""
+        if self._provisional_threshold is None or prediction is None or prediction.command is None:
+            return
+        if prediction.confidence < self._provisional_threshold:
+            return
+
+        if prediction.command == self._last_confirmed:
+            # nothing to pre-arm, the robot already got this command; a pending
+            # provisional command is left for the next fixation to settle
+            return
+        if self._provisional is not None:
+            if self._provisional.command == prediction.command:
+                return
+            # the prediction changed its mind before any fixation arrived
+            self._retract_provisional()
+
+        self._provisional = RobotCommand(prediction.command, time.time(), provisional=True)
+        self._provisional_since = prediction.timestamp
+        self._blackboard.set_current_provisional_command(self._provisional)
+        print("PROVISIONAL COMMAND: " + str(prediction.command))
+
+    def _retract_provisional(self):
+        """tell everyone downstream that the pending provisional command was wrong"""
+        retraction = RobotCommand(self._provisional.command, time.time(), provisional=True, retracted=True)
+        self._provisional = None
+        self._blackboard.set_current_provisional_command(retraction)
+        print("RETRACTED COMMAND: " + str(retraction.command))
+
+
+    def fixations_to_commands(self, fixations: Sequence[FixationEvent]) -> List[Optional[CommandType]]:
+        """
+        batch version of _fixation_to_command for offline analysis
+        invalid fixations map to STOP just like in the live pipeline
+        """
+        if len(fixations) == 0:
+            return []
+        commands = self._lookup.commands_at([(f.mean_x, f.mean_y) for f in fixations])
+        return [cmd if f.is_valid else CommandType.STOP for f, cmd in zip(fixations, commands)]
+
+    def centers_to_commands(self, centers) -> List[Optional[CommandType]]:
+        """classify an (N, 2) array of fixation centers in one call"""
+        return self._lookup.commands_at(centers)
+
     def _fixation_to_command(self, fixation: FixationEvent):
         """
-        Convert a FixationEvent into one of the five CommandTypes using:
-        - diagonals y = x and y = -x + 1 to split into 4 wedges:
+        Convert a FixationEvent into a CommandType by looking its center up
+        in the compiled zone layout. With the default layout the
+        diagonals y = x and y = -x + 1 split the screen into 4 wedges:
           top wedge    --> FORWARD
           bottom wedge --> BACKWARD
           left wedge   --> LEFT
           right wedge  --> RIGHT
+        returns None when the center falls outside every zone
         """
 
         if not fixation.is_valid:
             return CommandType.STOP
-        
-        x = fixation.mean_x
-        y = fixation.mean_y
-
-        
-        positive_cross = x 
-        negative_cross = -1 * x + 1
-        
-        if (x < 0.5 and y <= positive_cross) or (x >= 0.5 and y <= negative_cross):
-            return CommandType.FORWARD
-        
-        if (x < 0.5 and y < negative_cross and y > positive_cross):
-            return CommandType.LEFT
-        
-        if (x > 0.5 and y < positive_cross and y > negative_cross):
-            return CommandType.RIGHT
-        
-        if (x < 0.5 and y >= negative_cross) or (x >= 0.5 and y >= positive_cross):
-            return CommandType.BACKWARD
-        
-        return None
-
 
+        return self._lookup.command_at(fixation.mean_x, fixation.mean_y)
@@ -1,17 +1,34 @@
 # mqtt_command_publisher.py
 
-from typing import Any, Dict, Optional
-
-import paho.mqtt.client as mqtt
+from typing import Any, Dict, Optional, Tuple
 
 from blackboard import Blackboard, Observer
 from robot_command import RobotCommand
 
 
+def command_message(cmd: RobotCommand, topic: str) -> Tuple[str, str]:
+    """
+    (topic, payload) to publish for a command
+    shared by the threaded and the asyncio publishers
+    """
+    # Send the enum name: "FORWARD", "LEFT",, etc
+    payload = cmd.command.name
+
+    if cmd.provisional:
+        if cmd.retracted:
+            payload = "RETRACT:" + payload
+        return topic + "/provisional", payload
+
+    return topic, payload
+
+
 class MqttCommandPublisher(Observer):
     """
     observes Blackboard.current_command and publishes the command name
     to an MQTT topic
+
+    provisional commands go to "<topic>/provisional" instead, as the command
+    name or "RETRACT:<name>", so a robot can pre-arm without acting on them
     """
 
     def __init__(
@@ -24,6 +41,8 @@ class MqttCommandPublisher(Observer):
         self._blackboard = blackboard
         self._topic = topic
 
+        # imported here so building a pipeline without MQTT never loads paho
+        import paho.mqtt.client as mqtt
         self._client = mqtt.Client()
         self._client.connect(broker_host, broker_port, keepalive=60)
         # run MQTT network loop in background thread
@@ -32,20 +51,19 @@ class MqttCommandPublisher(Observer):
     def update(self, data: Dict[str, Any]) -> None:
         """
         called by Blackboard whenever its state changes
-        we only care when "current_command" is updated
+        we only care when "current_command" or "current_provisional_command" is updated
         """
-        if data.get("changed") != "current_command":
+        changed = data.get("changed")
+        if changed not in ("current_command", "current_provisional_command"):
             return
 
-        cmd: Optional[RobotCommand] = data.get("current_command")
+        cmd: Optional[RobotCommand] = data.get(changed)
         if cmd is None:
             return
 
-        # Send the enum name: "FORWARD", "LEFT",, etc
-        payload = cmd.command.name
-
         # publish
-        self._client.publish(self._topic, payload)
+        topic, payload = command_message(cmd, self._topic)
+        self._client.publish(topic, payload)
 
     def close(self) -> None:
         """cleanly stop the MQTT loop and disconnect."""
@@ -0,0 +1,153 @@
+import math
+import statistics
+from typing import Any, Dict, List, Optional
+
+from gaze_event import GazeEvent
+from fixation_event import FixationEvent
+from blackboard import Blackboard
+from gaze_interpreter import GazeInterpreter
+from zone_layout import ZoneLayout, diagonal_layout
+
+
+class EarlyCommitInterpreter(GazeInterpreter):
+    """
+    GazeInterpreter that does not wait for a full window when the gaze is clearly
+    parked in one zone
+
+    every sample adds its duration to the dwell score of the zone it lands in and
+    drains the scores of all other zones. as soon as one zone's score reaches
+    commit_dwell (and the samples behind it are steady enough) a FixationEvent is
+    emitted right away. if no zone ever gets there, the normal window of
+    max_dwell seconds is used as a fallback
+    """
+
+    def __init__(self, blackboard: Blackboard, layout: Optional[ZoneLayout] = None,
+                 commit_dwell=0.3, decay_rate=2.0, max_dwell=1.5, max_gap=0.1,
+                 min_samples=5, std_threshold=0.05, resolution=256, gaze_key="current_gaze"):
+        """
+        :param blackboard: Shared Blackboard instance for setting fixation events
+        :param layout: zones to accumulate dwell on, should match the CommandGenerator's
+        :param commit_dwell: seconds of (net) dwell in one zone needed to commit early
+        :param decay_rate: how fast a zone's score drains while the gaze is elsewhere,
+                           relative to how fast it fills
+        :param max_dwell: fallback window duration, same meaning as window_duration
+        :param max_gap: longest time step credited for a single sample, so dropped
+                        frames do not count as dwell
+        :param min_samples: minimum number of samples behind any fixation
+        :param std_threshold: max allowed standard deviation in x and y for
+                              a fixation to be considered valid
+        :param gaze_key: blackboard key to read gaze from
+        """
+        super().__init__(blackboard, window_duration=max_dwell, min_samples=min_samples,
+                         std_threshold=std_threshold, gaze_key=gaze_key)
+
+        self._layout = layout if layout is not None else diagonal_layout()
+        self._lookup = self._layout.compile(resolution)
+        self._commit_dwell = commit_dwell
+        self._decay_rate = decay_rate
+        self._max_gap = max_gap
+
+        # zone index --> dwell score in seconds, plus the samples backing each zone's run
+        self._scores: Dict[int, float] = {}
+        self._zone_samples: Dict[int, List[GazeEvent]] = {}
+        self._last_time: Optional[float] = None
+
+    def update(self, data: Dict[str, Any]):
+        """
+        called by the blackboard whenever its state changes
+
+        update the per-zone dwell scores with every new gaze sample and
+        commit as soon as one zone is confident; otherwise fall back to the
+        plain max_dwell window
+        """
+        if (data.get("changed") == self._gaze_key):
+            gaze = data.get(self._gaze_key)
+
+            # NaN / infinite sample (e.g. a dropped frame): keep it out of both the
+            # dwell scores and the fallback window, stdev cannot handle it
+            if (gaze is not None and math.isfinite(gaze.x) and math.isfinite(gaze.y)):
+                self._samples.append(gaze)
+                fixation = self._accumulate(gaze)
+
+                if (fixation is None and self._window_ready()):
+                    fixation = self._compute_fixation()
+
+                if (fixation is not None):
+                    self._blackboard.set_current_fixation(fixation)
+                    self._reset()
+
+    def _reset(self):
+        """drop the current window and all dwell evidence after a commit"""
+        self._samples = []
+        self._scores = {}
+        self._zone_samples = {}
+        self._last_time = None
+
+    def _accumulate(self, gaze: GazeEvent) -> Optional[FixationEvent]:
+        """
+        add gaze to the dwell scores and return an early FixationEvent
+        if its zone just became confident, else None
+        """
+        zone = self._lookup.zone_index(gaze.x, gaze.y)
+        if zone is None:
+            # NaN / infinite sample: no zone to credit, the gap counts like a dropped frame
+            return None
+
+        if self._last_time is None:
+            dt = 0.0
+        else:
+            dt = min(max(gaze.timestamp - self._last_time, 0.0), self._max_gap)
+        self._last_time = gaze.timestamp
+
+        # drain every other zone, forget zones that ran dry
+        drain = dt * self._decay_rate
+        for other in list(self._scores):
+            if other == zone:
+                continue
+            score = self._scores[other] - drain
+            if score <= 0:
+                del self._scores[other]
+                del self._zone_samples[other]
+            else:
+                self._scores[other] = score
+
+        self._scores[zone] = self._scores.get(zone, 0.0) + dt
+        self._zone_samples.setdefault(zone, []).append(gaze)
+
+        if (self._lookup.command_for_index(zone) is None or
+                self._scores[zone] < self._commit_dwell or
+                len(self._zone_samples[zone]) < self._min_samples):
+            return None
+
+        # only look at the most recent commit_dwell seconds of this zone's run
+        samples = self._zone_samples[zone]
+        cutoff = gaze.timestamp - self._commit_dwell
+        recent = [s for s in samples if s.timestamp >= cutoff]
+        if len(recent) < self._min_samples:
+            recent = samples[-self._min_samples:]
+
+        xs = [s.x for s in recent]
+        ys = [s.y for s in recent]
+        std_x = statistics.stdev(xs)
+        std_y = statistics.stdev(ys)
+
+        # a noisy run never commits early --> let the fallback window decide
+        if (std_x > self._std_threshold or std_y > self._std_threshold):
+            return None
+
+        return FixationEvent(mean_x=statistics.mean(xs),
+                             mean_y=statistics.mean(ys),
+                             std_x=std_x,
+                             std_y=std_y,
+                             start_time=recent[0].timestamp,
+                             end_time=recent[-1].timestamp,
+                             is_valid=True)
+
+    def dwell_scores(self) -> Dict[str, float]:
+        """current dwell score per command name, for debugging / display"""
+        scores = {}
+        for zone, score in self._scores.items():
+            command = self._lookup.command_for_index(zone)
+            if command is not None:
+                scores[command.name] = scores.get(command.name, 0.0) + score
+        return scores
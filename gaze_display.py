@@ -1,8 +1,9 @@
 import tkinter as tk
 import queue
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from blackboard import Blackboard, Observer 
+from zone_layout import ZoneLayout, diagonal_layout
 
 
 class GazeDisplay(Observer):
@@ -12,7 +13,10 @@ class GazeDisplay(Observer):
       - the last robot command
     """
 
-    def __init__(self):
+    def __init__(self, layout: Optional[ZoneLayout] = None, show_filtered: bool = False):
+
+        # zones to draw --> pass the CommandGenerator's layout so both agree
+        self._layout = layout if layout is not None else diagonal_layout()
 
         # queue for thread safe communication from Blackboard threads to Tk mainloop
         self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
@@ -46,38 +50,14 @@ class GazeDisplay(Observer):
 
         
 
-        # create diagonal lines
-        self.canvas.create_line(
-            0, 0, self.width, self.height,
-            fill="black", width=2
-        )
-        self.canvas.create_line(
-            self.width, 0, 0, self.height,
-            fill="black", width=2
-        )
-
-        # Label regions
-        self.canvas.create_text(self.center_x, self.center_y - self.center_y // 2,
-                                text="FORWARD",
-                                fill="black",
-                                font=("Arial", 24, "bold"))
-        self.canvas.create_text(self.center_x, self.center_y + self.center_y // 2,
-                                text="BACKWARD",
-                                fill="black",
-                                font=("Arial", 24, "bold"))
-        self.canvas.create_text(self.center_x - self.center_x // 2, self.center_y,
-                                text="LEFT",
-                                fill="black",
-                                font=("Arial", 24, "bold"))
-        self.canvas.create_text(self.center_x + self.center_x // 2, self.center_y,
-                                text="RIGHT",
-                                fill="black",
-                                font=("Arial", 24, "bold"))
+        # draw command regions from the same layout the CommandGenerator uses
+        self._draw_layout()
 
 
         # keep track of the last marker so we can remove it
         self.last_gaze_id = None
         self.last_fixation_id = None
+        self.last_filtered_id = None
 
         # create container below the canvas
         bottom_frame = tk.Frame(self.root)
@@ -88,6 +68,13 @@ class GazeDisplay(Observer):
         self.gaze_label = tk.Label(bottom_frame, text="Last gaze: (none)", font=("Arial", 12))
         self.gaze_label.pack()
 
+        # filtered gaze is drawn in green next to the raw red dot
+        self._show_filtered = show_filtered
+        self.filtered_label = None
+        if show_filtered:
+            self.filtered_label = tk.Label(bottom_frame, text="Filtered gaze: (none)", font=("Arial", 12))
+            self.filtered_label.pack()
+
         self.fixation_label = tk.Label(bottom_frame, text="Fixation around: (none)", font=("Arial", 12))
         self.fixation_label.pack()
 
@@ -98,6 +85,32 @@ class GazeDisplay(Observer):
         self.root.after(50, self._process_queue)
 
 
+    def _draw_layout(self):
+        """draw every zone outline, its label and the center dead zone"""
+        for zone in self._layout.zones:
+            points = []
+            for x, y in zone.polygon:
+                points.extend((x * self.width, y * self.height))
+            self.canvas.create_polygon(*points, outline="black", fill="", width=2)
+
+            label_x, label_y = zone.label_point()
+            self.canvas.create_text(label_x * self.width, label_y * self.height,
+                                    text=zone.command.name,
+                                    fill="black",
+                                    font=("Arial", 24, "bold"))
+
+        radius = self._layout.dead_zone_radius
+        if radius > 0:
+            cx, cy = self._layout.center
+            self.canvas.create_oval((cx - radius) * self.width, (cy - radius) * self.height,
+                                    (cx + radius) * self.width, (cy + radius) * self.height,
+                                    outline="gray", fill="#eee", width=2)
+            if self._layout.dead_zone_command is not None:
+                self.canvas.create_text(cx * self.width, cy * self.height,
+                                        text=self._layout.dead_zone_command.name,
+                                        fill="gray",
+                                        font=("Arial", 16, "bold"))
+
     def run(self):
         """start the Tkinter mainloop"""
         self.root.mainloop()
@@ -155,6 +168,16 @@ class GazeDisplay(Observer):
         else:
             self.gaze_label.config(text="Last gaze: (unknown)")
 
+        # update filtered gaze position
+        if self._show_filtered:
+            filtered = snapshot.get("current_filtered_gaze")
+            if filtered is not None:
+                x, y = filtered.x, filtered.y
+                self._draw_marker(x, y, "green", filtered=True)
+                self.filtered_label.config(text=f"Filtered gaze: ({x:.2f}, {y:.2f})")
+            else:
+                self.filtered_label.config(text="Filtered gaze: (unknown)")
+
         # update command label
         if command is not None:
             # make readable string from robot command
@@ -170,8 +193,24 @@ class GazeDisplay(Observer):
 
 
 
-    def _draw_marker(self, x: int, y: int, color: str):
-        """draw a small circle at (x, y), removing the previous one"""
+    def _draw_marker(self, x: int, y: int, color: str, filtered: bool = False):
+        """
+        draw a small circle at (x, y), removing the previous one
+        filtered=True draws the filtered gaze marker, which is replaced on its own
+        """
+        if filtered:
+            # filtered gaze keeps its own marker so it stays visible next to the raw one
+            if self.last_filtered_id is not None:
+                self.canvas.delete(self.last_filtered_id)
+            px = x * self.width
+            py = y * self.height
+            r = max(6, int(self.width * 0.007))
+            self.last_filtered_id = self.canvas.create_oval(
+                px - r, py - r, px + r, py + r,
+                fill=color
+            )
+            return
+
         if self.last_gaze_id is not None:
             self.canvas.delete(self.last_gaze_id)
         if self.last_fixation_id is not None:
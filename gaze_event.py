@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class GazeEvent:
@@ -8,3 +9,6 @@ class GazeEvent:
     x: float
     y: float
     timestamp: float
+    # model output before the online drift correction, None when none was applied
+    raw_x: Optional[float] = None
+    raw_y: Optional[float] = None
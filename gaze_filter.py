@@ -0,0 +1,308 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from gaze_event import GazeEvent
+from blackboard import Blackboard, Observer
+
+
+class GazeFilter(ABC):
+    """
+    base class for 2D gaze smoothing filters
+
+    - filter(x, y, t): streaming, one sample at a time, keeps state between calls
+    - filter_batch(ts, xs, ys): whole arrays at once. xs / ys may be (N,) for one
+      stream or (N, K) to run K independent streams side by side
+    - a NaN / infinite sample (e.g. a dropped frame) leaves the state untouched and
+      comes back as it went in, the next sample is filtered against the last finite one
+    """
+
+    @abstractmethod
+    def reset(self) -> None:
+        ...
+
+    @abstractmethod
+    def filter(self, x: float, y: float, t: float) -> Tuple[float, float]:
+        ...
+
+    @abstractmethod
+    def filter_batch(self, ts, xs, ys) -> Tuple[np.ndarray, np.ndarray]:
+        ...
+
+    def filter_event(self, gaze: GazeEvent) -> GazeEvent:
+        """filter a GazeEvent, keeping its timestamp"""
+        x, y = self.filter(gaze.x, gaze.y, gaze.timestamp)
+        return GazeEvent(x=x, y=y, timestamp=gaze.timestamp)
+
+
+def _as_streams(ts, xs, ys):
+    """bring batch inputs to (N, K) float arrays plus an (N, 1) time column"""
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    single = xs.ndim == 1
+    if single:
+        xs = xs[:, None]
+        ys = ys[:, None]
+    ts = np.asarray(ts, dtype=np.float64)
+    if ts.ndim == 1:
+        ts = ts[:, None]
+    return np.broadcast_to(ts, xs.shape), xs, ys, single
+
+
+def _finite(x: float, y: float) -> bool:
+    return math.isfinite(x) and math.isfinite(y)
+
+
+class OneEuroFilter(GazeFilter):
+    """
+    One-Euro filter (Casiez et al. 2012): a low-pass filter whose cutoff rises
+    with the signal speed --> heavy smoothing while fixating, little lag during
+    saccades
+
+    :param min_cutoff: cutoff frequency (Hz) when the gaze is still
+    :param beta: how much the cutoff grows per unit of speed (normalized screen / s)
+    :param d_cutoff: cutoff frequency (Hz) used to smooth the speed estimate
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=2.0, d_cutoff=1.0):
+        self._min_cutoff = min_cutoff
+        self._beta = beta
+        self._d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self) -> None:
+        self._t: Optional[float] = None
+        self._x = 0.0
+        self._y = 0.0
+        self._dx = 0.0
+        self._dy = 0.0
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, x: float, y: float, t: float) -> Tuple[float, float]:
+        if not _finite(x, y):
+            return x, y
+        if self._t is None or t <= self._t:
+            # first sample (or a clock that did not move) --> nothing to smooth against
+            if self._t is None:
+                self._x, self._y = x, y
+                self._t = t
+            return self._x, self._y
+
+        dt = t - self._t
+        self._t = t
+
+        a_d = self._alpha(self._d_cutoff, dt)
+        self._dx += a_d * ((x - self._x) / dt - self._dx)
+        self._dy += a_d * ((y - self._y) / dt - self._dy)
+
+        # one cutoff for both axes, driven by the 2D speed
+        speed = math.hypot(self._dx, self._dy)
+        a = self._alpha(self._min_cutoff + self._beta * speed, dt)
+        self._x += a * (x - self._x)
+        self._y += a * (y - self._y)
+        return self._x, self._y
+
+    def filter_batch(self, ts, xs, ys) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        batch version of filter(), does not touch the streaming state
+        the recursion runs over time, every step is vectorized over the K streams
+        """
+        ts, xs, ys, single = _as_streams(ts, xs, ys)
+        n = xs.shape[0]
+        out_x = np.empty_like(xs)
+        out_y = np.empty_like(ys)
+
+        k = xs.shape[1]
+        fx = np.zeros(k)
+        fy = np.zeros(k)
+        dx = np.zeros(k)
+        dy = np.zeros(k)
+        # time of the last finite sample per stream, NaN until the first one
+        last_t = np.full(k, np.nan)
+
+        tau_d = 1.0 / (2.0 * math.pi * self._d_cutoff)
+        for i in range(n):
+            finite = np.isfinite(xs[i]) & np.isfinite(ys[i])
+            first = finite & np.isnan(last_t)
+            fx = np.where(first, xs[i], fx)
+            fy = np.where(first, ys[i], fy)
+
+            dt = ts[i] - last_t
+            # dt is NaN before the first sample, which compares False here
+            moving = finite & (dt > 0)
+            last_t = np.where(first | moving, ts[i], last_t)
+            safe_dt = np.where(moving, dt, 1.0)
+
+            a_d = 1.0 / (1.0 + tau_d / safe_dt)
+            dx = np.where(moving, dx + a_d * ((xs[i] - fx) / safe_dt - dx), dx)
+            dy = np.where(moving, dy + a_d * ((ys[i] - fy) / safe_dt - dy), dy)
+
+            cutoff = self._min_cutoff + self._beta * np.hypot(dx, dy)
+            a = 1.0 / (1.0 + 1.0 / (2.0 * math.pi * cutoff * safe_dt))
+            fx = np.where(moving, fx + a * (xs[i] - fx), fx)
+            fy = np.where(moving, fy + a * (ys[i] - fy), fy)
+            out_x[i] = np.where(finite, fx, xs[i])
+            out_y[i] = np.where(finite, fy, ys[i])
+
+        if single:
+            return out_x[:, 0], out_y[:, 0]
+        return out_x, out_y
+
+
+class KalmanFilter(GazeFilter):
+    """
+    constant-velocity Kalman filter, x and y are treated as independent axes
+    with state [position, velocity]
+
+    :param process_noise: white-noise acceleration density (normalized screen^2 / s^3),
+                          higher --> follows saccades faster
+    :param measurement_noise: variance of one raw gaze sample (normalized screen^2)
+    """
+
+    def __init__(self, process_noise=5.0, measurement_noise=0.02 ** 2):
+        self._q = process_noise
+        self._r = measurement_noise
+        self.reset()
+
+    def reset(self) -> None:
+        self._t: Optional[float] = None
+        # per axis: position, velocity and the 2x2 symmetric covariance (p00, p01, p11)
+        self._state = [[0.0, 0.0, 0.0, 0.0, 0.0], [0.0, 0.0, 0.0, 0.0, 0.0]]
+
+    def velocity(self) -> Tuple[float, float]:
+        """current velocity estimate in normalized screen units per second"""
+        return self._state[0][1], self._state[1][1]
+
+    def _step(self, axis, z, dt):
+        pos, vel, p00, p01, p11 = axis
+        q = self._q
+
+        # predict
+        pos += vel * dt
+        p00 += dt * (2.0 * p01 + dt * p11) + q * dt ** 3 / 3.0
+        p01 += dt * p11 + q * dt ** 2 / 2.0
+        p11 += q * dt
+
+        # update with the measured position
+        s = p00 + self._r
+        k0 = p00 / s
+        k1 = p01 / s
+        residual = z - pos
+        pos += k0 * residual
+        vel += k1 * residual
+        p11 -= k1 * p01
+        p01 *= (1.0 - k0)
+        p00 *= (1.0 - k0)
+
+        axis[0], axis[1], axis[2], axis[3], axis[4] = pos, vel, p00, p01, p11
+        return pos
+
+    def filter(self, x: float, y: float, t: float) -> Tuple[float, float]:
+        if not _finite(x, y):
+            return x, y
+        if self._t is None:
+            self._t = t
+            self._state = [[x, 0.0, self._r, 0.0, 1.0], [y, 0.0, self._r, 0.0, 1.0]]
+            return x, y
+
+        dt = max(t - self._t, 0.0)
+        self._t = max(t, self._t)
+        return self._step(self._state[0], x, dt), self._step(self._state[1], y, dt)
+
+    def filter_batch(self, ts, xs, ys) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        batch version of filter(), does not touch the streaming state
+        both axes of all K streams are stepped together as one (2, K) array
+        """
+        ts, xs, ys, single = _as_streams(ts, xs, ys)
+        n = xs.shape[0]
+        out = np.empty((n, 2) + xs.shape[1:], dtype=np.float64)
+
+        z = np.stack([xs, ys], axis=1)
+        shape = z.shape[1:]
+        pos = np.zeros(shape)
+        vel = np.zeros(shape)
+        p00 = np.full(shape, self._r)
+        p01 = np.zeros(shape)
+        p11 = np.ones(shape)
+        # time of the last finite sample per stream, NaN until the first one
+        last_t = np.full(shape[1:], np.nan)
+        q = self._q
+
+        for i in range(n):
+            finite = np.isfinite(xs[i]) & np.isfinite(ys[i])
+            first = finite & np.isnan(last_t)
+            step = finite & ~first
+            dt = np.where(step, np.maximum(ts[i] - last_t, 0.0), 0.0)
+            last_t = np.where(first, ts[i], last_t)
+            last_t = np.where(step, np.maximum(ts[i], last_t), last_t)
+
+            new_pos = pos + vel * dt
+            new_p00 = p00 + dt * (2.0 * p01 + dt * p11) + q * dt ** 3 / 3.0
+            new_p01 = p01 + dt * p11 + q * dt ** 2 / 2.0
+            new_p11 = p11 + q * dt
+
+            s = new_p00 + self._r
+            k0 = new_p00 / s
+            k1 = new_p01 / s
+            residual = np.where(step, z[i], 0.0) - new_pos
+            new_vel = vel + k1 * residual
+            new_pos = new_pos + k0 * residual
+            new_p11 = new_p11 - k1 * new_p01
+            new_p01 = new_p01 * (1.0 - k0)
+            new_p00 = new_p00 * (1.0 - k0)
+
+            pos = np.where(step, new_pos, np.where(first, z[i], pos))
+            vel = np.where(step, new_vel, vel)
+            p00 = np.where(step, new_p00, p00)
+            p01 = np.where(step, new_p01, p01)
+            p11 = np.where(step, new_p11, p11)
+            out[i] = np.where(finite, pos, z[i])
+
+        if single:
+            return out[:, 0, 0], out[:, 1, 0]
+        return out[:, 0], out[:, 1]
+
+
+FILTERS = {
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+
+def make_filter(name: str, **kwargs) -> GazeFilter:
+    """build a filter by name ("one_euro" or "kalman")"""
+    if name not in FILTERS:
+        raise ValueError(f"unknown gaze filter '{name}', expected one of {sorted(FILTERS)}")
+    return FILTERS[name](**kwargs)
+
+
+class GazeFilterStage(Observer):
+    """
+    optional stage between raw gaze and the interpreter
+
+    listens for current_gaze, smooths it and publishes the result as
+    current_filtered_gaze. point the GazeInterpreter at
+    gaze_key="current_filtered_gaze" to consume it
+    """
+
+    def __init__(self, blackboard: Blackboard, gaze_filter: GazeFilter):
+        self._blackboard = blackboard
+        self._filter = gaze_filter
+
+    def update(self, data: Dict[str, Any]) -> None:
+        if data.get("changed") != "current_gaze":
+            return
+
+        gaze = data.get("current_gaze")
+        # NaN / infinite sample: nothing to smooth, skip it like the interpreter does
+        if gaze is None or not _finite(gaze.x, gaze.y):
+            return
+
+        self._blackboard.set_current_filtered_gaze(self._filter.filter_event(gaze))
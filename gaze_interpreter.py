@@ -13,7 +13,8 @@ from blackboard import Blackboard, Observer
 # tracks updates to gaze events in blackboard and converts window into fixation event
 class GazeInterpreter(Observer):
 
-    def __init__(self, blackboard: Blackboard, window_duration=0.6, min_samples=5, std_threshold=0.05):
+    def __init__(self, blackboard: Blackboard, window_duration=0.6, min_samples=5, std_threshold=0.05,
+                 gaze_key="current_gaze"):
         """
         initialize the gaze interpreter
 
@@ -24,10 +25,14 @@ class GazeInterpreter(Observer):
                             fixation creation
         :param std_threshold: max allowed standard deviation in x and y for
                               a fixation to be considered valid
+        :param gaze_key: blackboard key to read gaze from, "current_filtered_gaze"
+                         when a GazeFilterStage sits in front of the interpreter
         """
 
         self._blackboard = blackboard
 
+        self._gaze_key = gaze_key
+
         self._window_duration = window_duration
 
         self._min_samples = min_samples
@@ -40,14 +45,15 @@ class GazeInterpreter(Observer):
         """
         called by the blackboard whenever its state changes
 
-        listen for new raw gaze events under the key "current_gaze",
+        listen for new gaze events under gaze_key ("current_gaze" by default),
         append them to our sliding window, and compute a FixationEvent once
         the window has enough time span and enough samples
         """
-        if (data.get("changed") == "current_gaze"):
-            gaze = data.get("current_gaze")
+        if (data.get("changed") == self._gaze_key):
+            gaze = data.get(self._gaze_key)
 
-            if (gaze is not None):
+            # NaN / infinite sample (e.g. a dropped frame): stdev cannot handle it
+            if (gaze is not None and math.isfinite(gaze.x) and math.isfinite(gaze.y)):
                 self._samples.append(gaze)
 
                 if (self._window_ready()):
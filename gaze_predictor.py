@@ -0,0 +1,194 @@
+import math
+import statistics
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from gaze_event import GazeEvent
+from predicted_target import PredictedTarget
+from blackboard import Blackboard, Observer
+from zone_layout import ZoneLayout, diagonal_layout
+
+
+class GazePredictor(Observer):
+    """
+    estimates where the gaze is heading from the latest few samples and
+    publishes a PredictedTarget on every gaze update
+
+    - in flight (fast movement): the landing point is extrapolated from the
+      saccade onset along the movement direction, using the main-sequence
+      relation amplitude ~= peak speed * saccade_gain. confidence comes from the
+      saccade evidence: how steady the direction is, how much of the predicted
+      amplitude is already covered and how far the landing point is from the
+      edge of its zone
+    - settled (slow movement): the target is the mean of the samples since the
+      gaze settled, confidence grows with the number of steady samples in
+      the same zone
+    """
+
+    def __init__(self, blackboard: Blackboard, layout: Optional[ZoneLayout] = None,
+                 gaze_key="current_gaze", velocity_samples=3, saccade_speed=1.5,
+                 settle_speed=0.5, saccade_gain=0.04, settle_samples=4,
+                 max_in_flight_confidence=1.0, landing_margin=0.05, std_threshold=0.05, resolution=256):
+        """
+        :param blackboard: Shared Blackboard instance for setting predictions
+        :param layout: zones used to name the predicted target, should match the CommandGenerator's
+        :param gaze_key: blackboard key to read gaze from
+        :param velocity_samples: samples used for the least-squares velocity estimate
+        :param saccade_speed: speed (normalized screen / s) that starts a saccade
+        :param settle_speed: speed below which a saccade is considered over
+        :param saccade_gain: seconds, landing amplitude per unit of peak speed
+        :param settle_samples: steady samples in one zone needed for full confidence
+        :param max_in_flight_confidence: confidence of a mid-saccade landing prediction with full evidence
+        :param landing_margin: smallest uncertainty (normalized) assumed around a predicted landing
+                               point, landings closer than this to another zone lose confidence
+        :param std_threshold: settled samples spreading more than this lose half their confidence
+        """
+        self._blackboard = blackboard
+        self._layout = layout if layout is not None else diagonal_layout()
+        self._lookup = self._layout.compile(resolution)
+        self._gaze_key = gaze_key
+
+        self._saccade_speed = saccade_speed
+        self._settle_speed = settle_speed
+        self._saccade_gain = saccade_gain
+        self._settle_samples = settle_samples
+        self._max_in_flight_confidence = max_in_flight_confidence
+        self._landing_margin = landing_margin
+        self._std_threshold = std_threshold
+
+        self._samples: "deque[GazeEvent]" = deque(maxlen=max(2, velocity_samples))
+
+        # saccade state
+        self._in_saccade = False
+        self._onset: Optional[GazeEvent] = None
+        self._peak_speed = 0.0
+        self._direction = (0.0, 0.0)
+        self._path = 0.0
+
+        # steady samples since the gaze settled, all in the same zone
+        self._settled: List[GazeEvent] = []
+        self._settled_zone: Optional[int] = None
+
+    def update(self, data: Dict[str, Any]) -> None:
+        """
+        called by the blackboard whenever its state changes
+        react only to new gaze samples
+        """
+        if data.get("changed") != self._gaze_key:
+            return
+
+        gaze = data.get(self._gaze_key)
+        if gaze is None:
+            return
+
+        # NaN / infinite sample (e.g. a dropped frame): no prediction, state unchanged
+        if not (math.isfinite(gaze.x) and math.isfinite(gaze.y)):
+            return
+
+        self._samples.append(gaze)
+        prediction = self._predict(gaze)
+        if prediction is not None:
+            self._blackboard.set_current_prediction(prediction)
+
+    def _velocity(self):
+        """least-squares slope of x and y over the recent samples"""
+        n = len(self._samples)
+        if n < 2:
+            return 0.0, 0.0
+
+        t0 = self._samples[0].timestamp
+        ts = [s.timestamp - t0 for s in self._samples]
+        mean_t = sum(ts) / n
+        denom = sum((t - mean_t) ** 2 for t in ts)
+        if denom <= 0:
+            return 0.0, 0.0
+
+        mean_x = sum(s.x for s in self._samples) / n
+        mean_y = sum(s.y for s in self._samples) / n
+        vx = sum((t - mean_t) * (s.x - mean_x) for t, s in zip(ts, self._samples)) / denom
+        vy = sum((t - mean_t) * (s.y - mean_y) for t, s in zip(ts, self._samples)) / denom
+        return vx, vy
+
+    def _predict(self, gaze: GazeEvent) -> Optional[PredictedTarget]:
+        vx, vy = self._velocity()
+        speed = math.hypot(vx, vy)
+
+        if speed >= self._saccade_speed or (self._in_saccade and speed > self._settle_speed):
+            return self._predict_in_flight(gaze, vx, vy, speed)
+
+        self._in_saccade = False
+        return self._predict_settled(gaze)
+
+    def _predict_in_flight(self, gaze: GazeEvent, vx: float, vy: float, speed: float) -> PredictedTarget:
+        if not self._in_saccade:
+            # the oldest sample in the velocity window is the best guess for the onset
+            self._in_saccade = True
+            self._onset = self._samples[0]
+            self._peak_speed = 0.0
+            # path length walked since the onset, a saccade walks it in a straight line
+            samples = list(self._samples)
+            self._path = sum(math.hypot(b.x - a.x, b.y - a.y) for a, b in zip(samples, samples[1:]))
+        else:
+            previous = self._samples[-2]
+            self._path += math.hypot(gaze.x - previous.x, gaze.y - previous.y)
+        self._settled = []
+        self._settled_zone = None
+
+        if speed > self._peak_speed:
+            self._peak_speed = speed
+            self._direction = (vx / speed, vy / speed)
+
+        # never predict a landing point behind where the gaze already is
+        travelled = math.hypot(gaze.x - self._onset.x, gaze.y - self._onset.y)
+        amplitude = max(self._peak_speed * self._saccade_gain, travelled)
+        x = min(max(self._onset.x + self._direction[0] * amplitude, 0.0), 1.0)
+        y = min(max(self._onset.y + self._direction[1] * amplitude, 0.0), 1.0)
+        zone = self._lookup.zone_index(x, y)
+
+        return PredictedTarget(x=x, y=y,
+                               command=self._lookup.command_for_index(zone),
+                               confidence=self._in_flight_evidence(gaze, travelled, amplitude, x, y, zone),
+                               timestamp=gaze.timestamp,
+                               in_saccade=True)
+
+    def _in_flight_evidence(self, gaze: GazeEvent, travelled, amplitude, x, y, zone) -> float:
+        """
+        confidence of a landing prediction, the product of
+        - straightness: distance from the onset over the path walked since, noise
+          fast enough to look like a saccade zigzags and scores low
+        - progress: share of the predicted amplitude already travelled
+        - zone margin: share of probe points around the landing, at the remaining
+          distance (at least landing_margin), that fall in the same zone
+        """
+        straightness = min(1.0, travelled / self._path) if self._path > 0 else 0.0
+        progress = travelled / amplitude if amplitude > 0 else 0.0
+
+        radius = max(amplitude - travelled, self._landing_margin)
+        same = 0
+        for i in range(8):
+            angle = i * math.pi / 4
+            if self._lookup.zone_index(x + radius * math.cos(angle), y + radius * math.sin(angle)) == zone:
+                same += 1
+        return self._max_in_flight_confidence * straightness * progress * (same / 8)
+
+    def _predict_settled(self, gaze: GazeEvent) -> PredictedTarget:
+        zone = self._lookup.zone_index(gaze.x, gaze.y)
+        if zone != self._settled_zone:
+            self._settled = []
+            self._settled_zone = zone
+        self._settled.append(gaze)
+        if len(self._settled) > 2 * self._settle_samples:
+            self._settled.pop(0)
+
+        xs = [s.x for s in self._settled]
+        ys = [s.y for s in self._settled]
+        confidence = min(1.0, len(self._settled) / self._settle_samples)
+        if len(self._settled) >= 2 and (statistics.stdev(xs) > self._std_threshold or
+                                        statistics.stdev(ys) > self._std_threshold):
+            confidence *= 0.5
+
+        return PredictedTarget(x=statistics.mean(xs), y=statistics.mean(ys),
+                               command=self._lookup.command_for_index(zone),
+                               confidence=confidence,
+                               timestamp=gaze.timestamp,
+                               in_saccade=False)
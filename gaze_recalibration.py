@@ -0,0 +1,291 @@
+import math
+import queue
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from blackboard import Observer
+from fixation_event import FixationEvent
+from gaze_event import GazeEvent
+from zone_layout import Point, ZoneLayout, diagonal_layout
+
+
+class AffineCorrection:
+    """
+    immutable 2x3 affine map on normalized gaze: [x', y'] = A @ [x, y, 1]
+
+    sources hold a reference to one of these and replace it as a whole, so a
+    reader always sees either the old or the new correction, never a mix
+    """
+
+    __slots__ = ("_matrix",)
+
+    def __init__(self, matrix):
+        matrix = np.array(matrix, dtype=np.float64).reshape(2, 3)
+        matrix.setflags(write=False)
+        self._matrix = matrix
+
+    @classmethod
+    def identity(cls) -> "AffineCorrection":
+        return cls([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix
+
+    def apply(self, x: float, y: float) -> Tuple[float, float]:
+        m = self._matrix
+        return (float(m[0, 0] * x + m[0, 1] * y + m[0, 2]),
+                float(m[1, 0] * x + m[1, 1] * y + m[1, 2]))
+
+    def apply_batch(self, xs, ys) -> Tuple[np.ndarray, np.ndarray]:
+        m = self._matrix
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        return m[0, 0] * xs + m[0, 1] * ys + m[0, 2], m[1, 0] * xs + m[1, 1] * ys + m[1, 2]
+
+    def determinant(self) -> float:
+        m = self._matrix
+        return float(m[0, 0] * m[1, 1] - m[0, 1] * m[1, 0])
+
+    def inverse(self) -> "AffineCorrection":
+        linear = np.linalg.inv(self._matrix[:, :2])
+        return AffineCorrection(np.hstack((linear, -linear @ self._matrix[:, 2:])))
+
+    def offset(self, x: float = 0.5, y: float = 0.5) -> float:
+        """how far (normalized) the correction moves the point (x, y)"""
+        cx, cy = self.apply(x, y)
+        return math.hypot(cx - x, cy - y)
+
+
+class RecursiveAffineFit:
+    """
+    recursive least squares fit of an affine map raw gaze --> target
+
+    both output coordinates share the regressor [x, y, 1], so one 3x3
+    covariance serves both. starts at the identity; prior_weight says how many
+    points' worth of trust the identity gets, forgetting < 1 lets old points
+    fade so the fit follows slow drift
+    """
+
+    def __init__(self, forgetting: float = 0.98, prior_weight: float = 5.0):
+        self._forgetting = forgetting
+        self._prior_weight = prior_weight
+        self.reset()
+
+    def reset(self):
+        self._theta = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+        self._P = np.eye(3) / self._prior_weight
+        self.count = 0
+
+    def update(self, raw_x: float, raw_y: float, target_x: float, target_y: float) -> AffineCorrection:
+        phi = np.array([raw_x, raw_y, 1.0])
+        p_phi = self._P @ phi
+        gain = p_phi / (self._forgetting + phi @ p_phi)
+        error = np.array([target_x, target_y]) - self._theta @ phi
+        self._theta = self._theta + np.outer(error, gain)
+        self._P = (self._P - np.outer(gain, p_phi)) / self._forgetting
+        self.count += 1
+        return AffineCorrection(self._theta)
+
+
+class OnlineRecalibrator(Observer):
+    """
+    watches confirmed fixations for calibration drift and corrects it on the fly
+
+    - a valid fixation whose center lies within snap_radius of a zone label
+      (the text GazeDisplay draws) is taken as "the user looked at the label";
+      explicit targets can be fed in with observe()
+    - the fit needs the uncorrected gaze: it is averaged from the raw_x / raw_y
+      of the current_gaze samples inside the fixation, so a correction swapped
+      in mid-fixation is accounted for sample by sample
+    - the pairs go to a background thread that updates a RecursiveAffineFit and
+      hot-swaps the new AffineCorrection into the source via apply_correction
+      (GazeSource.set_correction), capture never waits for it
+    - drift is tracked as an exponential moving average of the distance between
+      the corrected gaze and the target. once it stays above error_threshold the
+      incremental correction is not keeping up: recalibration_needed is set and
+      on_recalibrate is called (once, until reset())
+    """
+
+    def __init__(self, apply_correction: Callable[[Optional[AffineCorrection]], None],
+                 layout: Optional[ZoneLayout] = None, snap_radius: float = 0.1, error_threshold: float = 0.05,
+                 min_targets: int = 10, smoothing: float = 0.1, forgetting: float = 0.98,
+                 prior_weight: float = 5.0, max_offset: float = 0.25,
+                 on_recalibrate: Optional[Callable[[], None]] = None):
+        """
+        :param apply_correction: receives every new correction (None = no correction)
+        :param layout: zones whose label points serve as targets, defaults to the diagonal layout
+        :param snap_radius: max distance (normalized) between a fixation and a label to use it as target
+        :param error_threshold: drift error (normalized) that asks for a full recalibration
+        :param min_targets: targets needed before the error may trigger a recalibration
+        :param smoothing: weight of the newest target in the error averages
+        :param forgetting: RLS forgetting factor, smaller follows faster drift
+        :param prior_weight: how strongly the fit is pulled towards no correction
+        :param max_offset: corrections that move the screen center further are not applied
+        :param on_recalibrate: called from the background thread when a recalibration is needed
+        """
+        self._apply_correction = apply_correction
+        layout = layout if layout is not None else diagonal_layout()
+        self._labels: List[Point] = [zone.label_point() for zone in layout.zones]
+        self._snap_radius = snap_radius
+        self._error_threshold = error_threshold
+        self._min_targets = min_targets
+        self._smoothing = smoothing
+        self._max_offset = max_offset
+        self._on_recalibrate = on_recalibrate
+
+        self._fit = RecursiveAffineFit(forgetting, prior_weight)
+        # the correction currently applied by the source, swapped as a whole
+        self._correction = AffineCorrection.identity()
+        # (timestamp, raw x, raw y) of recent current_gaze samples, enough to cover a fixation
+        self._raw_gaze: "deque[Tuple[float, float, float]]" = deque(maxlen=1000)
+
+        self.recalibration_needed = threading.Event()
+        self._metrics_lock = threading.Lock()
+        # held by the worker for a whole target and by reset(), so a reset never
+        # interleaves with a fit that started on the old calibration
+        self._fit_lock = threading.Lock()
+        # bumped by reset(), targets observed before it are dropped by the worker
+        self._generation = 0
+        self._reset_metrics()
+
+        self._pairs: "queue.Queue" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _reset_metrics(self):
+        with self._metrics_lock:
+            self._targets = 0
+            self._unmatched = 0
+            self._error: Optional[float] = None
+            self._raw_error: Optional[float] = None
+            self._updates = 0
+            self._rejected = 0
+
+    # --------- input ---------
+    def update(self, data: Dict[str, Any]) -> None:
+        changed = data.get("changed")
+        if changed == "current_gaze":
+            gaze: GazeEvent = data.get("current_gaze")
+            if gaze is not None:
+                if gaze.raw_x is None:
+                    # the source applied no correction
+                    self._raw_gaze.append((gaze.timestamp, gaze.x, gaze.y))
+                else:
+                    self._raw_gaze.append((gaze.timestamp, gaze.raw_x, gaze.raw_y))
+            return
+        if changed != "current_fixation":
+            return
+        fixation: FixationEvent = data.get("current_fixation")
+        if fixation is None or not fixation.is_valid:
+            return
+
+        label = min(self._labels, key=lambda p: math.hypot(p[0] - fixation.mean_x, p[1] - fixation.mean_y))
+        if math.hypot(label[0] - fixation.mean_x, label[1] - fixation.mean_y) > self._snap_radius:
+            with self._metrics_lock:
+                self._unmatched += 1
+            return
+
+        raw = [(x, y) for t, x, y in self._raw_gaze if fixation.start_time <= t <= fixation.end_time]
+        if not raw:
+            return
+        raw_x = math.fsum(x for x, _ in raw) / len(raw)
+        raw_y = math.fsum(y for _, y in raw) / len(raw)
+        self.observe(fixation.mean_x, fixation.mean_y, raw_x, raw_y, label[0], label[1])
+
+    def observe(self, gaze_x: float, gaze_y: float, raw_x: float, raw_y: float, target_x: float, target_y: float):
+        """
+        the user looked at (target_x, target_y) while the corrected gaze read
+        (gaze_x, gaze_y) and the model itself, before any correction, (raw_x, raw_y)
+        """
+        self._pairs.put((self._generation, gaze_x, gaze_y, raw_x, raw_y, target_x, target_y))
+
+    # --------- background fitting ---------
+    def _run(self):
+        while True:
+            pair = self._pairs.get()
+            try:
+                if pair is None:
+                    return
+                self._process(*pair)
+            finally:
+                self._pairs.task_done()
+
+    def _process(self, generation, gaze_x, gaze_y, raw_x, raw_y, target_x, target_y):
+        error = math.hypot(gaze_x - target_x, gaze_y - target_y)
+        raw_error = math.hypot(raw_x - target_x, raw_y - target_y)
+        with self._fit_lock:
+            if generation != self._generation:
+                # observed on the calibration before the last reset()
+                return
+            with self._metrics_lock:
+                self._targets += 1
+                a = self._smoothing
+                self._error = error if self._error is None else (1 - a) * self._error + a * error
+                self._raw_error = raw_error if self._raw_error is None else (1 - a) * self._raw_error + a * raw_error
+                drifted = self._targets >= self._min_targets and self._error > self._error_threshold
+
+            correction = self._fit.update(raw_x, raw_y, target_x, target_y)
+            if correction.determinant() > 0.25 and correction.offset() <= self._max_offset:
+                self._correction = correction
+                self._apply_correction(correction)
+                with self._metrics_lock:
+                    self._updates += 1
+            else:
+                with self._metrics_lock:
+                    self._rejected += 1
+
+            triggered = drifted and not self.recalibration_needed.is_set()
+            if triggered:
+                self.recalibration_needed.set()
+
+        if triggered and self._on_recalibrate is not None:
+            self._on_recalibrate()
+
+    # --------- control / metrics ---------
+    def reset(self):
+        """
+        forget the fit and the drift history, e.g. after a full recalibration
+        safe to call from any thread: waits for the target the worker is fitting,
+        targets and raw gaze observed before the reset are dropped
+        """
+        with self._fit_lock:
+            self._generation += 1
+            # raw gaze from the old calibration must not be paired with later fixations
+            self._raw_gaze.clear()
+            self._fit.reset()
+            self._correction = AffineCorrection.identity()
+            self._apply_correction(None)
+            self._reset_metrics()
+            self.recalibration_needed.clear()
+
+    def drain(self):
+        """block until every observed target has been fitted (replays, benchmarks)"""
+        self._pairs.join()
+
+    def correction(self) -> AffineCorrection:
+        return self._correction
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            seen = self._targets + self._unmatched
+            return {
+                "targets": self._targets,
+                "unmatched_fixations": self._unmatched,
+                "match_rate": self._targets / seen if seen else None,
+                # distance between what the pipeline sees and the target
+                "error": self._error,
+                # same without the online correction --> drift of the calibration itself
+                "raw_error": self._raw_error,
+                "correction_updates": self._updates,
+                "rejected_updates": self._rejected,
+                "correction_offset": self._correction.offset(),
+                "recalibration_needed": self.recalibration_needed.is_set(),
+            }
+
+    def close(self):
+        self._pairs.put(None)
+        self._worker.join()
@@ -0,0 +1,200 @@
+import csv
+import math
+import random
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from gaze_event import GazeEvent
+from robot_command import CommandType
+from zone_layout import ZoneLayout, diagonal_layout
+
+
+@dataclass
+class GazeSession:
+    """
+    a recorded (or synthetic) stream of normalized gaze samples
+
+    targets optionally holds the command the operator meant to give at each
+    sample (None = no intent) --> used as ground truth by the benchmarks
+    """
+    timestamps: np.ndarray
+    xs: np.ndarray
+    ys: np.ndarray
+    targets: List[Optional[CommandType]] = field(default_factory=list)
+    name: str = ""
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def has_targets(self) -> bool:
+        return len(self.targets) == len(self.timestamps)
+
+    def events(self):
+        """iterate the session as GazeEvent objects"""
+        for t, x, y in zip(self.timestamps.tolist(), self.xs.tolist(), self.ys.tolist()):
+            yield GazeEvent(x=x, y=y, timestamp=t)
+
+    def target_at(self, timestamp: float) -> Optional[CommandType]:
+        """ground-truth target of the latest sample at or before timestamp"""
+        if not self.has_targets:
+            return None
+        i = int(np.searchsorted(self.timestamps, timestamp, side="right")) - 1
+        return self.targets[max(i, 0)]
+
+
+# --------- csv files: timestamp,x,y[,target] ---------
+def load_session_csv(path: str) -> GazeSession:
+    timestamps, xs, ys, targets = [], [], [], []
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            timestamps.append(float(row["timestamp"]))
+            xs.append(float(row["x"]))
+            ys.append(float(row["y"]))
+            target = row.get("target")
+            targets.append(CommandType(target) if target else None)
+
+    if all(t is None for t in targets):
+        targets = []
+    return GazeSession(timestamps=np.asarray(timestamps), xs=np.asarray(xs), ys=np.asarray(ys),
+                       targets=targets, name=path)
+
+
+def save_session_csv(session: GazeSession, path: str) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "x", "y", "target"])
+        for i in range(len(session)):
+            target = session.targets[i] if session.has_targets else None
+            writer.writerow([repr(float(session.timestamps[i])),
+                             repr(float(session.xs[i])),
+                             repr(float(session.ys[i])),
+                             target.value if target is not None else ""])
+
+
+def synthetic_session(duration: float = 60.0,
+                      sample_rate: float = 30.0,
+                      layout: Optional[ZoneLayout] = None,
+                      fixation_time=(0.8, 2.5),
+                      noise: float = 0.02,
+                      noisy_fraction: float = 0.2,
+                      noisy_noise: float = 0.12,
+                      glance_probability: float = 0.3,
+                      saccade_time: float = 0.05,
+                      seed: Optional[int] = None,
+                      name: str = "synthetic") -> GazeSession:
+    """
+    generate a labelled session: fixations on zone label points joined by
+    short saccades, with some extra-noisy fixations and brief glances at
+    another zone that should NOT produce a command
+    """
+    rng = random.Random(seed)
+    layout = layout if layout is not None else diagonal_layout()
+    zones = list(layout.zones)
+    dt = 1.0 / sample_rate
+
+    timestamps: List[float] = []
+    xs: List[float] = []
+    ys: List[float] = []
+    targets: List[Optional[CommandType]] = []
+
+    t = 0.0
+    x, y = layout.center
+    while t < duration:
+        zone = rng.choice(zones)
+        tx, ty = zone.label_point()
+        sigma = noisy_noise if rng.random() < noisy_fraction else noise
+
+        # saccade: straight line to the new target, no intent yet
+        steps = max(1, int(round(saccade_time / dt)))
+        for k in range(1, steps + 1):
+            a = k / steps
+            timestamps.append(t)
+            xs.append(x + (tx - x) * a)
+            ys.append(y + (ty - y) * a)
+            targets.append(None)
+            t += dt
+        x, y = tx, ty
+
+        hold = rng.uniform(*fixation_time)
+        glance_at = rng.uniform(0.3, hold) if rng.random() < glance_probability else None
+        glance_zone = rng.choice(zones)
+        end = t + hold
+        start = t
+        while t < end:
+            gx, gy = x, y
+            # a glance of ~150 ms at some other zone while the intent stays the same
+            if glance_at is not None and start + glance_at <= t < start + glance_at + 0.15:
+                gx, gy = glance_zone.label_point()
+            timestamps.append(t)
+            xs.append(gx + rng.gauss(0.0, sigma))
+            ys.append(gy + rng.gauss(0.0, sigma))
+            targets.append(zone.command)
+            t += dt
+
+    return GazeSession(timestamps=np.asarray(timestamps), xs=np.asarray(xs), ys=np.asarray(ys),
+                       targets=targets, name=name)
+
+
+# --------- scoring against ground truth ---------
+@dataclass
+class CommandScore:
+    """latency / correctness of a command stream against session targets"""
+    latencies: List[float]
+    missed_targets: int
+    false_commands: int
+    total_commands: int
+
+    @property
+    def false_command_rate(self) -> float:
+        return self.false_commands / self.total_commands if self.total_commands else 0.0
+
+    def latency_percentile(self, q: float) -> float:
+        if not self.latencies:
+            return math.nan
+        return float(np.percentile(self.latencies, q))
+
+
+def score_commands(session: GazeSession, command_times: Sequence[float],
+                   command_types: Sequence[CommandType]) -> CommandScore:
+    """
+    - a command is false when it is neither STOP nor the target at the time it was issued
+    - latency is measured from the first sample of each target segment to the
+      first matching command inside that segment
+    """
+    if not session.has_targets:
+        raise ValueError("session has no targets to score against")
+
+    false_commands = 0
+    for t, cmd in zip(command_times, command_types):
+        if cmd is not CommandType.STOP and cmd is not session.target_at(t):
+            false_commands += 1
+
+    # split the targets into runs of the same intent
+    segments = []
+    run_start = 0
+    for i in range(1, len(session.targets) + 1):
+        if i == len(session.targets) or session.targets[i] is not session.targets[run_start]:
+            if session.targets[run_start] is not None:
+                segments.append((session.targets[run_start],
+                                 float(session.timestamps[run_start]),
+                                 float(session.timestamps[i - 1])))
+            run_start = i
+
+    latencies = []
+    missed = 0
+    times = np.asarray(command_times, dtype=np.float64)
+    for target, onset, end in segments:
+        lo = int(np.searchsorted(times, onset, side="left"))
+        hi = int(np.searchsorted(times, end, side="right"))
+        hit = next((times[i] for i in range(lo, hi) if command_types[i] is target), None)
+        if hit is None:
+            missed += 1
+        else:
+            latencies.append(float(hit) - onset)
+
+    return CommandScore(latencies=latencies, missed_targets=missed,
+                        false_commands=false_commands, total_commands=len(command_types))
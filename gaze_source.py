@@ -4,9 +4,10 @@ from typing import Optional
 
 from gaze_event import GazeEvent
 from blackboard import Blackboard
+from capture_config import CaptureConfig, capture_mode, load_capture_config, open_capture, save_capture_config
 
-from eyetrax import GazeEstimator, run_9_point_calibration
-import cv2
+# eyetrax and cv2 are slow to import --> pulled in on first use so importing
+# this module (or anything that depends on it) stays cheap
 
 class GazeSource(threading.Thread):
     """
@@ -14,12 +15,30 @@ class GazeSource(threading.Thread):
     and publishes it to the Blackboard as GazeEvent objects
     """
 
-    def __init__(self, blackboard, poll_interval=0.03):
+    def __init__(self, blackboard, poll_interval=0.03, camera_index=None, predictor=None,
+                 capture: Optional[CaptureConfig] = None):
+        """
+        :param camera_index: camera to open, None = the one saved with the loaded
+                             calibration (camera 0 without one)
+        :param predictor: optional BatchPredictor shared with other sources in
+                          this process, predictions then run in micro-batches
+        :param capture: resolution / fps / pixel format to open the camera with,
+                        None = the mode saved with the loaded calibration (driver defaults without one)
+        """
         # daemon=True means thread exits when main exits
         super().__init__(daemon=True)   
 
+        self._predictor = predictor
+
         self._poll_interval = poll_interval
 
+        self._camera_index = camera_index
+
+        self._capture = capture
+
+        # mode the last calibrate() really ran the camera in, saved with the model
+        self._calibrated_capture: Optional[CaptureConfig] = None
+
         self._blackboard = blackboard
 
         # boolean to keep track of running status --> allows for a safe exit
@@ -28,6 +47,15 @@ class GazeSource(threading.Thread):
         self._estimator = None
         self._cap = None
 
+        # online drift correction applied to every prediction (see gaze_recalibration.py),
+        # replaced as a whole by set_correction() so capture never waits for a refit
+        self._correction = None
+        self._recalibration_requested = threading.Event()
+
+        # cleared by pause(): the thread then releases the camera and sets _paused
+        self._capturing = threading.Event()
+        self._paused = threading.Event()
+
     
     def start(self):
         """
@@ -35,6 +63,7 @@ class GazeSource(threading.Thread):
         override start() only to set the _running flag before the thread begins
         """
         self._running = True
+        self._capturing.set()
         super().start()
 
     def stop(self):
@@ -44,8 +73,132 @@ class GazeSource(threading.Thread):
         self._running = False
 
     def calibrate(self):
+        """
+        run the 9 point calibration with the camera in the configured capture mode
+        if the calibration opened the camera in some way we cannot steer, the
+        model belongs to the driver's default mode and capture switches to it
+        """
+        from eyetrax import GazeEstimator, run_9_point_calibration
         self._estimator = GazeEstimator()
-        run_9_point_calibration(self._estimator)
+        config = self._capture_config()
+        with capture_mode(config) as opened:
+            run_9_point_calibration(self._estimator, camera_index=config.camera_index)
+
+        if not opened and self._capture is not None:
+            print(f"calibration ran in the driver's default mode, not {config.describe()}")
+            config = CaptureConfig(camera_index=config.camera_index)
+            self._capture = config
+        self._calibrated_capture = config
+
+    def load_calibration(self, path="gaze_model.pkl"):
+        """use a previously saved gaze model instead of running calibrate()"""
+        from eyetrax import GazeEstimator
+        self._estimator = GazeEstimator()
+        self._estimator.load_model(path)
+        self._calibrated_capture = None
+
+        # camera + capture mode the calibration was made with, unless given explicitly
+        saved = load_capture_config(path)
+        if saved is not None and self._capture is None:
+            self._capture = saved
+            if self._camera_index is None:
+                self._camera_index = saved.camera_index
+
+    def save_calibration(self, path="gaze_model.pkl"):
+        """
+        save the gaze model and, next to it, the camera index and capture mode
+        the model was calibrated in. a loaded model without a capture mode of this
+        source's own keeps the mode already saved there
+        """
+        self._estimator.save_model(path)
+        if self._calibrated_capture is not None:
+            save_capture_config(self._calibrated_capture, path)
+            return
+        if self._capture is None and load_capture_config(path) is not None:
+            return
+        save_capture_config(self._capture_config(), path)
+
+    def _capture_config(self) -> CaptureConfig:
+        camera_index = self._camera_index if self._camera_index is not None else 0
+        if self._capture is None:
+            return CaptureConfig(camera_index=camera_index)
+        return CaptureConfig(camera_index, self._capture.width, self._capture.height, self._capture.fps,
+                             self._capture.fourcc, self._capture.buffer_size)
+
+    def set_correction(self, correction):
+        """hot-swap the AffineCorrection applied to new samples, None disables it"""
+        self._correction = correction
+
+    def request_recalibration(self):
+        """
+        flag that a full recalibration is needed, safe from any thread
+        the owner of the main thread polls recalibration_requested() and runs recalibrate()
+        """
+        self._recalibration_requested.set()
+
+    def recalibration_requested(self) -> bool:
+        return self._recalibration_requested.is_set()
+
+    def recalibrate(self, path="gaze_model.pkl"):
+        """
+        redo the full calibration, must run on the main thread (the calibration
+        opens its own window and camera). capture pauses meanwhile and resumes
+        with the new model and without online correction
+        """
+        self.pause()
+        try:
+            self.calibrate()
+            self.save_calibration(path)
+            self._correction = None
+        finally:
+            self._recalibration_requested.clear()
+            self.resume()
+
+    def pause(self, timeout=None):
+        """stop capturing and release the camera, returns once the thread has let go of it"""
+        self._capturing.clear()
+        if self.is_alive():
+            self._paused.wait(timeout)
+        else:
+            self.close()
+
+    def resume(self):
+        """reopen the camera and continue capturing after pause()"""
+        self._paused.clear()
+        self._capturing.set()
+
+    def open(self):
+        """open the camera in the configured capture mode if it is not open yet"""
+        if self._cap is None:
+            self._cap = open_capture(self._capture_config())
+            if self._predictor is not None:
+                self._predictor.register_stream()
+
+    def close(self):
+        """release the camera"""
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+            if self._predictor is not None:
+                self._predictor.unregister_stream()
+
+    def read(self):
+        """
+        read one frame and return the gaze samples it produced (zero or one)
+        without publishing them --> lets async hosts capture off the event loop
+        """
+        event = self._read_gaze_event()
+        return [event] if event is not None else []
+
+    def step(self):
+        """
+        read one gaze sample and push it to the Blackboard
+        used directly by hosts that schedule many sources on a shared pool
+        """
+        event = None
+        for event in self.read():
+            self._blackboard.set_current_gaze(event)
+        return event
 
     def run(self):
         """
@@ -56,18 +209,22 @@ class GazeSource(threading.Thread):
         - sleep for poll_interval
         """
 
-        # Save model
-        self._estimator.save_model("gaze_model.pkl")
+        # Save model (+ the capture mode it belongs to)
+        self.save_calibration("gaze_model.pkl")
 
         # Load model
         self._estimator.load_model("gaze_model.pkl")
 
-        self._cap = cv2.VideoCapture(0)
-        
         while self._running:
-            event = self._read_gaze_event()
-            if event is not None:
-                self._blackboard.set_current_gaze(event)
+            if not self._capturing.is_set():
+                # paused, e.g. while recalibrate() needs the camera
+                self.close()
+                self._paused.set()
+                self._capturing.wait(0.1)
+                continue
+
+            self.open()
+            self.step()
 
             # avoid busy-waiting; control sampling rate
             time.sleep(self._poll_interval)
@@ -79,15 +236,25 @@ class GazeSource(threading.Thread):
         and return a GazeEvent or None if no valid gaze
         """
         ret, frame = self._cap.read()
+        if not ret:
+            return None
         features, blink = self._estimator.extract_features(frame)
 
         # predict screen coordinates
         if features is not None and not blink:
-            x, y = self._estimator.predict([features])[0]
+            if self._predictor is not None:
+                x, y = self._predictor.predict(self._estimator, features)
+            else:
+                x, y = self._estimator.predict([features])[0]
             norm_x = float(x) / float(self._blackboard.get_screen_width())
             norm_y = float(y) / float(self._blackboard.get_screen_height())
+            raw_x, raw_y = None, None
+            correction = self._correction
+            if correction is not None:
+                raw_x, raw_y = norm_x, norm_y
+                norm_x, norm_y = correction.apply(norm_x, norm_y)
             #print(f"Gaze: ({x:.3f}, {y:.3f})")
-            ge = GazeEvent(x=norm_x, y=norm_y, timestamp=time.time())
+            ge = GazeEvent(x=norm_x, y=norm_y, timestamp=time.time(), raw_x=raw_x, raw_y=raw_y)
             return ge
         return None
 
@@ -0,0 +1,110 @@
+# headless service entry point: source --> interpreter --> generator --> publisher, no GUI
+#
+# keep the imports at the top of this file cheap: the startup profile starts
+# counting here and heavy modules (cv2, eyetrax, paho, screeninfo, tkinter)
+# are only imported by the stages that need them
+import time
+
+_PROCESS_ORIGIN = time.perf_counter()
+
+import argparse
+import signal
+import threading
+
+from gaze_filter import FILTERS
+from pipeline_session import PipelineSession, SessionConfig
+from startup_profile import StartupProfile
+
+
+def _parse_screen(value: str):
+    try:
+        width, height = value.lower().split("x")
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got '{value}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eye-controlled robot command pipeline without a GUI")
+    parser.add_argument("--screen", type=_parse_screen, default=(1920, 1080), metavar="WxH",
+                        help="screen geometry the gaze model was calibrated for (default 1920x1080)")
+    parser.add_argument("--session-id", default="headless")
+    parser.add_argument("--camera", type=int, default=None,
+                        help="camera index (default: the one saved with the calibration)")
+    parser.add_argument("--model", default="gaze_model.pkl", help="saved calibration to load")
+    parser.add_argument("--replay", default=None, help="play a recorded session csv instead of using a camera")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="playback speed of --replay, 2 = twice as fast as recorded")
+    parser.add_argument("--broker", default="test.mosquitto.org", help="MQTT broker, 'none' to disable publishing")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--topic", default="gaze_bot/command")
+    parser.add_argument("--poll-interval", type=float, default=0.03)
+    parser.add_argument("--window", type=float, default=1.5)
+    parser.add_argument("--early-commit", action="store_true")
+    parser.add_argument("--commit-dwell", type=float, default=0.3)
+    parser.add_argument("--filter", choices=sorted(FILTERS), default=None)
+    parser.add_argument("--profile", action="store_true", help="print the startup profile")
+    parser.add_argument("--exit-after-first-command", action="store_true",
+                        help="stop once the first command was issued (for measuring time-to-first-command)")
+    parser.add_argument("--recalibrate", type=float, default=None, metavar="ERROR",
+                        help="correct calibration drift online, flag a full recalibration above this error")
+    parser.add_argument("--log-dir", default=None, help="record gaze, fixations and commands to this directory")
+    parser.add_argument("--timeout", type=float, default=None, help="stop after this many seconds")
+    args = parser.parse_args()
+
+    profile = StartupProfile(origin=_PROCESS_ORIGIN)
+    profile.mark("imports")
+
+    width, height = args.screen
+    config = SessionConfig(session_id=args.session_id,
+                           screen_width=width,
+                           screen_height=height,
+                           camera_index=args.camera,
+                           model_path=args.model,
+                           replay_path=args.replay,
+                           replay_speed=args.replay_speed,
+                           poll_interval=args.poll_interval,
+                           gaze_filter=args.filter,
+                           window_duration=args.window,
+                           early_commit=args.early_commit,
+                           commit_dwell=args.commit_dwell,
+                           broker_host=None if args.broker.lower() == "none" else args.broker,
+                           broker_port=args.port,
+                           topic=args.topic,
+                           recalibrate=args.recalibrate is not None,
+                           recalibration_threshold=args.recalibrate if args.recalibrate is not None else 0.05,
+                           log_dir=args.log_dir)
+
+    session = PipelineSession(config, observers=[profile])
+    profile.mark("pipeline built")
+
+    session.open()
+    profile.mark("source opened")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    started = time.time()
+    try:
+        while not stop.is_set():
+            session.step()
+            if args.exit_after_first_command and profile.first_command.is_set():
+                break
+            if args.timeout is not None and time.time() - started >= args.timeout:
+                break
+            if getattr(session.source, "finished", False):
+                break
+            stop.wait(config.poll_interval)
+    finally:
+        session.close()
+
+    if args.profile:
+        print(profile.report())
+        print(session.metrics.snapshot())
+        if session.recalibrator is not None:
+            print(session.recalibrator.metrics())
+
+
+if __name__ == "__main__":
+    main()
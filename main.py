@@ -1,32 +1,110 @@
+import argparse
+
 from blackboard import Blackboard
 from gaze_source import GazeSource
+from capture_config import load_capture_config
 from gaze_interpreter import GazeInterpreter
+from early_commit_interpreter import EarlyCommitInterpreter
+from gaze_filter import FILTERS, GazeFilterStage, make_filter
+from gaze_predictor import GazePredictor
 from command_generator import CommandGenerator
 from command_publisher import MqttCommandPublisher
 from gaze_display import GazeDisplay
-from screeninfo import get_monitors
+from gaze_recalibration import OnlineRecalibrator
+from session_log import SessionLogWriter
+from zone_layout import diagonal_layout
 
 def main():
+    parser = argparse.ArgumentParser(description="Eye-controlled robot command system")
+    parser.add_argument("--early-commit", action="store_true",
+                        help="issue commands as soon as the gaze dwells confidently in one zone")
+    parser.add_argument("--commit-dwell", type=float, default=0.3,
+                        help="seconds of dwell needed for an early commit")
+    parser.add_argument("--filter", choices=sorted(FILTERS), default=None,
+                        help="smooth raw gaze before the interpreter")
+    parser.add_argument("--window", type=float, default=1.5,
+                        help="fixation window (or early-commit fallback) in seconds")
+    parser.add_argument("--predict", type=float, default=None, metavar="CONFIDENCE",
+                        help="publish provisional commands when the predicted gaze target is at least this "
+                             "confident (needs --early-commit)")
+    parser.add_argument("--recalibrate", type=float, default=None, metavar="ERROR",
+                        help="correct calibration drift online from fixations on the zone labels and redo the "
+                             "full calibration once the drift error (normalized) exceeds ERROR")
+    parser.add_argument("--log-dir", default=None,
+                        help="record gaze, fixations and commands here (query with session_query.py)")
+    args = parser.parse_args()
+    if args.predict is not None and not args.early_commit:
+        # the fixation window that covers a prediction also covers the saccade, so it reads
+        # invalid and retracts nearly every provisional command (see benchmarks.gaze_prediction)
+        parser.error("--predict needs --early-commit")
+
     blackboard = Blackboard.get_instance()
 
-    display = GazeDisplay()
+    # one layout shared by the display and the generator so drawn and classified zones match
+    layout = diagonal_layout()
+
+    session_log = None
+    if args.log_dir is not None:
+        session_log = SessionLogWriter(args.log_dir)
+        blackboard.add_observer(session_log)
+
+    display = GazeDisplay(layout, show_filtered=args.filter is not None)
     blackboard.add_observer(display)
 
-    generator = CommandGenerator(blackboard)
+    # optional smoothing stage: the interpreter then reads the filtered gaze
+    gaze_key = "current_gaze"
+    if args.filter is not None:
+        blackboard.add_observer(GazeFilterStage(blackboard, make_filter(args.filter)))
+        gaze_key = "current_filtered_gaze"
+
+    generator = CommandGenerator(blackboard, layout, provisional_threshold=args.predict)
     blackboard.add_observer(generator)
 
-    interpreter = GazeInterpreter(blackboard, window_duration=1.5, min_samples=5, std_threshold=0.06)
+    if args.predict is not None:
+        blackboard.add_observer(GazePredictor(blackboard, layout, gaze_key=gaze_key))
+
+    if args.early_commit:
+        # the full window stays as the fallback for gazes that never settle
+        interpreter = EarlyCommitInterpreter(blackboard, layout, commit_dwell=args.commit_dwell,
+                                             max_dwell=args.window, min_samples=5, std_threshold=0.06,
+                                             gaze_key=gaze_key)
+    else:
+        interpreter = GazeInterpreter(blackboard, window_duration=args.window, min_samples=5, std_threshold=0.06,
+                                      gaze_key=gaze_key)
     blackboard.add_observer(interpreter)
 
     mqtt_publisher = MqttCommandPublisher(blackboard)
     blackboard.add_observer(mqtt_publisher)
 
-    gaze_source = GazeSource(blackboard, poll_interval=0.03)
+    # camera + capture mode saved with the last calibration (or by capture_config.py tune --save)
+    capture = load_capture_config("gaze_model.pkl")
+    gaze_source = GazeSource(blackboard, poll_interval=0.03,
+                             camera_index=capture.camera_index if capture is not None else None,
+                             capture=capture)
     gaze_source.calibrate()
+
+    recalibrator = None
+    if args.recalibrate is not None:
+        # called from the recalibrator's thread, the calibration itself runs on the main thread below
+        recalibrator = OnlineRecalibrator(gaze_source.set_correction, layout, error_threshold=args.recalibrate,
+                                          on_recalibrate=gaze_source.request_recalibration)
+        blackboard.add_observer(recalibrator)
+
+        def poll_recalibration():
+            if gaze_source.recalibration_requested():
+                gaze_source.recalibrate()
+                recalibrator.reset()
+            display.root.after(500, poll_recalibration)
+
+        display.root.after(500, poll_recalibration)
     gaze_source.start()
 
     def on_close():
         gaze_source.stop()
+        if recalibrator is not None:
+            recalibrator.close()
+        if session_log is not None:
+            session_log.close()
         display.root.destroy()
 
     display.root.protocol("WM_DELETE_WINDOW", on_close)
@@ -0,0 +1,370 @@
+"""
+minimal local MQTT broker for offline tests and load measurements
+
+speaks the part of MQTT 3.1 / 3.1.1 that paho uses here: CONNECT, SUBSCRIBE,
+UNSUBSCRIBE, PUBLISH with QoS 0 / 1 / 2, PINGREQ and DISCONNECT. incoming QoS 2
+messages are forwarded once, on PUBREL, so a retransmitted PUBLISH is not
+delivered twice. there is no persistence, no retained messages, no
+authentication and no redelivery; subscribers get at most QoS 1
+
+usage:
+    python mqtt_broker.py --port 1883
+    # then e.g. python3 headless.py --broker localhost
+"""
+import argparse
+import asyncio
+import struct
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+# control packet types
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+PUBREC = 5
+PUBREL = 6
+PUBCOMP = 7
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+# CONNACK return codes
+_ACCEPTED = 0
+_BAD_PROTOCOL_VERSION = 1
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """
+    MQTT wildcard match: '+' is one level, a trailing '#' any number of levels
+    including none, so 'a/#' also matches the parent topic 'a'
+    """
+    filter_levels = topic_filter.split("/")
+    topic_levels = topic.split("/")
+    for i, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if i >= len(topic_levels):
+            return False
+        if level != "+" and level != topic_levels[i]:
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+def _encode_length(length: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        if length:
+            byte |= 0x80
+        out.append(byte)
+        if not length:
+            return bytes(out)
+
+
+def _packet(packet_type: int, flags: int, body: bytes) -> bytes:
+    return bytes([(packet_type << 4) | flags]) + _encode_length(len(body)) + body
+
+
+def _uint16(data: bytes, offset: int) -> int:
+    if offset + 2 > len(data):
+        raise ProtocolError("packet truncated")
+    return struct.unpack_from("!H", data, offset)[0]
+
+
+def _byte(data: bytes, offset: int) -> int:
+    if offset >= len(data):
+        raise ProtocolError("packet truncated")
+    return data[offset]
+
+
+def _string(data: bytes, offset: int) -> Tuple[str, int]:
+    length = _uint16(data, offset)
+    start = offset + 2
+    if start + length > len(data):
+        raise ProtocolError("string runs past the end of the packet")
+    try:
+        return data[start:start + length].decode("utf-8"), start + length
+    except UnicodeDecodeError as exc:
+        raise ProtocolError("string is not valid UTF-8") from exc
+
+
+class _Client:
+    """one connected client and its subscriptions"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.client_id = ""
+        self.keepalive = 0
+        # topic filter --> granted qos
+        self.subscriptions: Dict[str, int] = {}
+        # incoming QoS 2 messages waiting for their PUBREL: packet id --> (topic, payload)
+        self.pending_qos2: Dict[int, Tuple[str, bytes]] = {}
+        self._next_id = 0
+
+    def next_packet_id(self) -> int:
+        self._next_id = self._next_id % 65535 + 1
+        return self._next_id
+
+    def send(self, data: bytes):
+        self.writer.write(data)
+
+
+class MqttBroker:
+    """
+    asyncio MQTT broker, either awaited with serve() on a running loop or
+    started on its own thread with start() / stop()
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 1883):
+        """
+        :param port: 0 picks a free port, see .port after start
+        """
+        self.host = host
+        self.port = port
+        self._clients: Set[_Client] = set()
+        # one task per open connection, cancelled on shutdown
+        self._handlers: Set[asyncio.Task] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        # why the background thread could not start serving, re-raised by start()
+        self._start_error: Optional[BaseException] = None
+
+        # stats, only touched on the broker's loop
+        self._received = 0
+        self._delivered = 0
+        self._max_write_buffer = 0
+
+    # --------- lifecycle ---------
+    async def serve(self):
+        """open the listening socket, returns once it is ready"""
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def start(self) -> int:
+        """
+        run the broker on a background thread, returns the port it listens on
+        raises whatever serve() raised, e.g. OSError when the port is taken
+        """
+        self._started.clear()
+        self._start_error = None
+        self._thread = threading.Thread(target=self._run_thread, daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._start_error
+        return self.port
+
+    def _run_thread(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.serve())
+        except BaseException as e:
+            self._start_error = e
+            loop.close()
+            return
+        finally:
+            self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(self._close())
+            loop.close()
+
+    async def _close(self):
+        handlers = list(self._handlers)
+        for task in handlers:
+            task.cancel()
+        # each handler closes its own writer on the way out
+        await asyncio.gather(*handlers, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def stop(self):
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """message counters; read from another thread they may be a moment old"""
+        return {
+            "clients": len(self._clients),
+            "received": self._received,
+            "delivered": self._delivered,
+            "max_write_buffer": self._max_write_buffer,
+        }
+
+    # --------- connection handling ---------
+    async def _read_packet(self, reader: asyncio.StreamReader) -> Tuple[int, int, bytes]:
+        first = await reader.readexactly(1)
+        length = 0
+        multiplier = 1
+        for _ in range(4):
+            (byte,) = await reader.readexactly(1)
+            length += (byte & 0x7F) * multiplier
+            if not byte & 0x80:
+                break
+            multiplier *= 128
+        else:
+            raise ProtocolError("malformed remaining length")
+        body = await reader.readexactly(length) if length else b""
+        return first[0] >> 4, first[0] & 0x0F, body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _Client(writer)
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            packet_type, _, body = await asyncio.wait_for(self._read_packet(reader), timeout=10)
+            if packet_type != CONNECT or not self._on_connect(client, body):
+                return
+            self._clients.add(client)
+
+            while True:
+                # the spec allows one and a half keepalive periods of silence
+                timeout = client.keepalive * 1.5 if client.keepalive else None
+                packet_type, flags, body = await asyncio.wait_for(self._read_packet(reader), timeout)
+                if packet_type == DISCONNECT:
+                    break
+                self._dispatch(client, packet_type, flags, body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, ProtocolError):
+            pass
+        finally:
+            self._clients.discard(client)
+            self._handlers.discard(task)
+            writer.close()
+
+    def _on_connect(self, client: _Client, body: bytes) -> bool:
+        protocol, offset = _string(body, 0)
+        level = _byte(body, offset)
+        connect_flags = _byte(body, offset + 1)
+        client.keepalive = _uint16(body, offset + 2)
+        client.client_id, _ = _string(body, offset + 4)
+        # will / username / password fields (if any) follow and are ignored
+
+        if (protocol, level) not in (("MQIsdp", 3), ("MQTT", 4)) or connect_flags & 0x01:
+            client.send(_packet(CONNACK, 0, bytes([0, _BAD_PROTOCOL_VERSION])))
+            return False
+        client.send(_packet(CONNACK, 0, bytes([0, _ACCEPTED])))
+        return True
+
+    def _dispatch(self, client: _Client, packet_type: int, flags: int, body: bytes):
+        if packet_type == PUBLISH:
+            self._on_publish(client, flags, body)
+        elif packet_type == PUBREL:
+            # second half of an incoming QoS 2 publish, the message goes out now
+            packet_id = _uint16(body, 0)
+            message = client.pending_qos2.pop(packet_id, None)
+            if message is not None:
+                self._deliver(message[0], 2, message[1])
+            client.send(_packet(PUBCOMP, 0, body[:2]))
+        elif packet_type == SUBSCRIBE:
+            self._on_subscribe(client, body)
+        elif packet_type == UNSUBSCRIBE:
+            self._on_unsubscribe(client, body)
+        elif packet_type == PINGREQ:
+            client.send(_packet(PINGRESP, 0, b""))
+        elif packet_type in (PUBACK, PUBREC, PUBCOMP):
+            # acknowledgements of our QoS 1 deliveries, nothing is redelivered
+            pass
+        else:
+            raise ProtocolError(f"unexpected packet type {packet_type}")
+
+    def _on_publish(self, client: _Client, flags: int, body: bytes):
+        qos = (flags >> 1) & 0x03
+        topic, offset = _string(body, 0)
+        packet_id = None
+        if qos:
+            packet_id = _uint16(body, offset)
+            offset += 2
+        payload = body[offset:]
+
+        if qos == 2:
+            # hold it until PUBREL; a retransmitted PUBLISH only repeats the PUBREC
+            if packet_id not in client.pending_qos2:
+                self._received += 1
+            client.pending_qos2[packet_id] = (topic, payload)
+            client.send(_packet(PUBREC, 0, struct.pack("!H", packet_id)))
+            return
+
+        self._received += 1
+        if qos == 1:
+            client.send(_packet(PUBACK, 0, struct.pack("!H", packet_id)))
+        self._deliver(topic, qos, payload)
+
+    def _deliver(self, topic: str, qos: int, payload: bytes):
+        """forward one message to every matching subscriber"""
+        encoded_topic = topic.encode("utf-8")
+        for subscriber in list(self._clients):
+            granted = max((q for f, q in subscriber.subscriptions.items() if topic_matches(f, topic)), default=None)
+            if granted is None:
+                continue
+            out_qos = min(qos, granted, 1)
+            header = struct.pack("!H", len(encoded_topic)) + encoded_topic
+            if out_qos:
+                header += struct.pack("!H", subscriber.next_packet_id())
+            subscriber.send(_packet(PUBLISH, out_qos << 1, header + payload))
+            self._delivered += 1
+            buffered = subscriber.writer.transport.get_write_buffer_size()
+            if buffered > self._max_write_buffer:
+                self._max_write_buffer = buffered
+
+    def _on_subscribe(self, client: _Client, body: bytes):
+        packet_id = struct.pack("!H", _uint16(body, 0))
+        offset = 2
+        granted = []
+        while offset < len(body):
+            topic_filter, offset = _string(body, offset)
+            qos = min(_byte(body, offset) & 0x03, 1)
+            offset += 1
+            client.subscriptions[topic_filter] = qos
+            granted.append(qos)
+        client.send(_packet(SUBACK, 0, packet_id + bytes(granted)))
+
+    def _on_unsubscribe(self, client: _Client, body: bytes):
+        packet_id = struct.pack("!H", _uint16(body, 0))
+        offset = 2
+        while offset < len(body):
+            topic_filter, offset = _string(body, offset)
+            client.subscriptions.pop(topic_filter, None)
+        client.send(_packet(UNSUBACK, 0, packet_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    args = parser.parse_args()
+
+    async def run():
+        broker = MqttBroker(args.host, args.port)
+        await broker.serve()
+        print(f"MQTT broker listening on {broker.host}:{broker.port}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
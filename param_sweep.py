@@ -0,0 +1,348 @@
+"""
+offline tuner for GazeInterpreter's window_duration / min_samples / std_threshold
+
+replays recorded (timestamp,x,y,target csv) or synthetic sessions through a
+vectorized copy of GazeInterpreter + CommandGenerator for every configuration
+of a grid or random search, spread over a process pool
+
+usage:
+    python param_sweep.py                                  # synthetic sessions, default grid
+    python param_sweep.py session1.csv session2.csv ...    # recorded sessions
+    python param_sweep.py --search random --trials 200 --window 0.2 2.0 --std 0.02 0.1
+"""
+import argparse
+import csv
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from gaze_filter import FILTERS, make_filter
+from gaze_session import GazeSession, load_session_csv, synthetic_session
+from robot_command import CommandType
+from zone_layout import ZoneLayout, diagonal_layout, load_layout
+
+# command types as small ints so whole command streams stay numpy arrays
+_CODES = {command: i for i, command in enumerate(CommandType)}
+_STOP = _CODES[CommandType.STOP]
+_NONE = -1
+
+
+@dataclass(frozen=True)
+class SweepConfig:
+    window_duration: float
+    min_samples: int
+    std_threshold: float
+
+
+@dataclass
+class SweepResult:
+    config: SweepConfig
+    commands: int
+    fixations: int
+    valid_fixations: int
+    false_commands: int
+    missed_targets: int
+    targets: int
+    # share of consecutive commands during one held target that repeat the previous one
+    stability: float
+    latency_p50: float
+    latency_p90: float
+
+    @property
+    def false_command_rate(self) -> float:
+        return self.false_commands / self.commands if self.commands else 0.0
+
+    @property
+    def miss_rate(self) -> float:
+        return self.missed_targets / self.targets if self.targets else 0.0
+
+
+class _PreparedSession:
+    """per-session arrays shared by every configuration a worker evaluates"""
+
+    def __init__(self, session: GazeSession, zone_codes: np.ndarray, lookup):
+        if not session.has_targets:
+            raise ValueError(f"session '{session.name}' has no targets to score against")
+        self.ts = np.asarray(session.timestamps, dtype=np.float64)
+        xs = np.asarray(session.xs, dtype=np.float64)
+        ys = np.asarray(session.ys, dtype=np.float64)
+
+        # the interpreters drop NaN / infinite samples, so fixations are detected on
+        # the finite ones only; targets and scoring keep the full session clock
+        finite = np.isfinite(xs) & np.isfinite(ys)
+        self.sample_ts = self.ts[finite]
+        xs = xs[finite]
+        ys = ys[finite]
+
+        # prefix sums --> mean / stdev of any window in O(1)
+        self.cx = np.concatenate(([0.0], np.cumsum(xs)))
+        self.cy = np.concatenate(([0.0], np.cumsum(ys)))
+        self.cxx = np.concatenate(([0.0], np.cumsum(xs * xs)))
+        self.cyy = np.concatenate(([0.0], np.cumsum(ys * ys)))
+
+        self.lookup = lookup
+        self.zone_codes = zone_codes
+
+        targets = np.array([_CODES[t] if t is not None else _NONE for t in session.targets], dtype=np.int64)
+        self.targets = targets
+        # runs of one non-empty intent: (code, onset, end)
+        change = np.flatnonzero(np.diff(targets)) + 1
+        starts = np.concatenate(([0], change))
+        ends = np.concatenate((change, [len(targets)])) - 1
+        keep = targets[starts] != _NONE
+        self.segment_codes = targets[starts[keep]]
+        self.segment_onsets = self.ts[starts[keep]]
+        self.segment_ends = self.ts[ends[keep]]
+
+
+def _window_ends(ts: np.ndarray, window_duration: float, min_samples: int) -> np.ndarray:
+    """
+    for every start index s the index e that completes GazeInterpreter's window:
+    the first e > s with ts[e] - ts[s] >= window_duration and e - s + 1 >= min_samples
+    (len(ts) when the session ends first)
+    """
+    n = len(ts)
+    starts = np.arange(n)
+    ends = np.searchsorted(ts, ts + window_duration, side="left")
+    # searchsorted compares ts[e] >= ts[s] + w, the interpreter ts[e] - ts[s] >= w;
+    # nudge by one where float rounding makes the two disagree
+    inside = ends < n
+    short = np.zeros(n, dtype=bool)
+    short[inside] = ts[ends[inside]] - ts[starts[inside]] < window_duration
+    ends[short] += 1
+    early = (ends > 0) & (ends - 1 > starts)
+    early[early] = ts[ends[early] - 1] - ts[starts[early]] >= window_duration
+    ends[early] -= 1
+
+    ends = np.maximum(ends, starts + max(min_samples - 1, 1))
+    return np.minimum(ends, n)
+
+
+def detect_fixations(session: _PreparedSession, config: SweepConfig):
+    """
+    tumbling windows exactly like GazeInterpreter: a window closes at the first
+    sample that satisfies duration and sample count, the next one starts right after
+    returns (start, end) index arrays into session.sample_ts and mean_x, mean_y, valid arrays
+    """
+    ts = session.sample_ts
+    n = len(ts)
+    ends_for = _window_ends(ts, config.window_duration, config.min_samples).tolist()
+
+    starts: List[int] = []
+    ends: List[int] = []
+    s = 0
+    while s < n:
+        e = ends_for[s]
+        if e >= n:
+            break
+        starts.append(s)
+        ends.append(e)
+        s = e + 1
+
+    lo = np.asarray(starts, dtype=np.int64)
+    hi = np.asarray(ends, dtype=np.int64) + 1
+    count = (hi - lo).astype(np.float64)
+    sum_x = session.cx[hi] - session.cx[lo]
+    sum_y = session.cy[hi] - session.cy[lo]
+    mean_x = sum_x / count
+    mean_y = sum_y / count
+    # sample standard deviation (statistics.stdev)
+    var_x = np.maximum(session.cxx[hi] - session.cxx[lo] - sum_x * mean_x, 0.0) / (count - 1)
+    var_y = np.maximum(session.cyy[hi] - session.cyy[lo] - sum_y * mean_y, 0.0) / (count - 1)
+    valid = (np.sqrt(var_x) <= config.std_threshold) & (np.sqrt(var_y) <= config.std_threshold)
+    return lo, hi - 1, mean_x, mean_y, valid
+
+
+def _evaluate_session(session: _PreparedSession, config: SweepConfig) -> Dict[str, object]:
+    _, ends, mean_x, mean_y, valid = detect_fixations(session, config)
+
+    # CommandGenerator: invalid --> STOP, valid --> zone command, no zone --> nothing
+    codes = session.zone_codes[session.lookup.zone_indices(np.column_stack((mean_x, mean_y)))]
+    codes = np.where(valid, codes, _STOP)
+    issued = codes != _NONE
+    codes = codes[issued]
+    times = session.sample_ts[ends[issued]]
+
+    # false: neither STOP nor the target at the time of the command
+    at = np.maximum(np.searchsorted(session.ts, times, side="right") - 1, 0)
+    false_commands = int(np.count_nonzero((codes != _STOP) & (codes != session.targets[at])))
+
+    # which target segment (if any) each command falls into
+    segment = np.searchsorted(session.segment_onsets, times, side="right") - 1
+    in_segment = segment >= 0
+    in_segment[in_segment] = times[in_segment] <= session.segment_ends[segment[in_segment]]
+    segment = np.where(in_segment, segment, -1)
+
+    # latency: first matching command of every segment
+    hit = in_segment.copy()
+    hit[in_segment] = codes[in_segment] == session.segment_codes[segment[in_segment]]
+    hit_segments, first = np.unique(segment[hit], return_index=True)
+    latencies = times[hit][first] - session.segment_onsets[hit_segments]
+
+    # stability: consecutive commands inside one segment that agree
+    same_segment = (segment[1:] == segment[:-1]) & (segment[1:] >= 0)
+    repeats = int(np.count_nonzero(same_segment & (codes[1:] == codes[:-1])))
+
+    return {
+        "commands": len(codes),
+        "fixations": len(valid),
+        "valid_fixations": int(np.count_nonzero(valid)),
+        "false_commands": false_commands,
+        "missed_targets": len(session.segment_codes) - len(hit_segments),
+        "targets": len(session.segment_codes),
+        "pairs": int(np.count_nonzero(same_segment)),
+        "repeats": repeats,
+        "latencies": latencies,
+    }
+
+
+# --------- process pool ---------
+_worker_sessions: List[_PreparedSession] = []
+
+
+def _init_worker(sessions: List[GazeSession], layout: ZoneLayout, resolution: int, gaze_filter: Optional[str]):
+    """runs once per worker: filter the sessions and build the prefix sums"""
+    lookup = layout.compile(resolution)
+    # zone index --> command code, NO_ZONE (-1) hits the trailing _NONE
+    zone_codes = [_CODES[c] if c is not None else _NONE
+                  for c in (lookup.command_for_index(i) for i in range(lookup.dead_zone_index + 1))]
+    zone_codes = np.asarray(zone_codes + [_NONE], dtype=np.int64)
+
+    global _worker_sessions
+    _worker_sessions = []
+    for session in sessions:
+        if gaze_filter is not None:
+            xs, ys = make_filter(gaze_filter).filter_batch(session.timestamps, session.xs, session.ys)
+            session = GazeSession(timestamps=session.timestamps, xs=xs, ys=ys, targets=session.targets,
+                                  name=session.name)
+        _worker_sessions.append(_PreparedSession(session, zone_codes, lookup))
+
+
+def evaluate(config: SweepConfig) -> SweepResult:
+    """score one configuration over every session of this worker"""
+    totals = {"commands": 0, "fixations": 0, "valid_fixations": 0, "false_commands": 0,
+              "missed_targets": 0, "targets": 0, "pairs": 0, "repeats": 0}
+    latencies = []
+    for session in _worker_sessions:
+        scores = _evaluate_session(session, config)
+        latencies.append(scores.pop("latencies"))
+        for key, value in scores.items():
+            totals[key] += value
+
+    latencies = np.concatenate(latencies) if latencies else np.empty(0)
+    pairs = totals.pop("pairs")
+    repeats = totals.pop("repeats")
+    return SweepResult(config=config,
+                       stability=repeats / pairs if pairs else 1.0,
+                       latency_p50=float(np.percentile(latencies, 50)) if len(latencies) else math.nan,
+                       latency_p90=float(np.percentile(latencies, 90)) if len(latencies) else math.nan,
+                       **totals)
+
+
+def grid_configs(windows: Sequence[float], min_samples: Sequence[int],
+                 std_thresholds: Sequence[float]) -> List[SweepConfig]:
+    return [SweepConfig(w, m, s) for w, m, s in itertools.product(windows, min_samples, std_thresholds)]
+
+
+def random_configs(trials: int, windows: Sequence[float], min_samples: Sequence[int],
+                   std_thresholds: Sequence[float], seed: Optional[int] = None) -> List[SweepConfig]:
+    """uniform samples between the smallest and largest value given for each parameter"""
+    rng = random.Random(seed)
+    return [SweepConfig(rng.uniform(min(windows), max(windows)),
+                        rng.randint(min(min_samples), max(min_samples)),
+                        rng.uniform(min(std_thresholds), max(std_thresholds)))
+            for _ in range(trials)]
+
+
+def sweep(sessions: List[GazeSession], configs: Sequence[SweepConfig], layout: Optional[ZoneLayout] = None,
+          resolution: int = 256, gaze_filter: Optional[str] = None,
+          workers: Optional[int] = None) -> List[SweepResult]:
+    """evaluate every configuration over all sessions, one configuration per task"""
+    layout = layout if layout is not None else diagonal_layout()
+    workers = workers if workers else (os.cpu_count() or 1)
+    chunksize = max(1, len(configs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(sessions, layout, resolution, gaze_filter)) as pool:
+        return list(pool.map(evaluate, configs, chunksize=chunksize))
+
+
+def _print_results(results: List[SweepResult], top: Optional[int]):
+    print(f"{'window':>7}{'min':>5}{'std':>7}{'p50 ms':>9}{'p90 ms':>9}{'false':>8}{'missed':>8}"
+          f"{'stable':>8}{'valid':>8}{'cmds':>8}")
+    for r in results[:top]:
+        c = r.config
+        valid = r.valid_fixations / r.fixations if r.fixations else 0.0
+        print(f"{c.window_duration:>7.2f}{c.min_samples:>5}{c.std_threshold:>7.3f}"
+              f"{r.latency_p50 * 1000:>9.0f}{r.latency_p90 * 1000:>9.0f}{r.false_command_rate:>8.1%}"
+              f"{r.miss_rate:>8.1%}{r.stability:>8.1%}{valid:>8.1%}{r.commands:>8}")
+
+
+def _write_csv(results: List[SweepResult], path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["window_duration", "min_samples", "std_threshold", "latency_p50", "latency_p90",
+                         "false_command_rate", "miss_rate", "stability", "fixations", "valid_fixations",
+                         "commands"])
+        for r in results:
+            writer.writerow([r.config.window_duration, r.config.min_samples, r.config.std_threshold,
+                             r.latency_p50, r.latency_p90, r.false_command_rate, r.miss_rate, r.stability,
+                             r.fixations, r.valid_fixations, r.commands])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sessions", nargs="*", help="recorded session csv files")
+    parser.add_argument("--synthetic", type=int, default=8, help="number of synthetic sessions when no files are given")
+    parser.add_argument("--duration", type=float, default=300.0, help="length of each synthetic session (s)")
+    parser.add_argument("--layout", default=None, help="zone layout json (default: diagonal layout)")
+    parser.add_argument("--filter", choices=sorted(FILTERS), default=None, help="smooth the gaze first")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--trials", type=int, default=100, help="configurations for --search random")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--window", type=float, nargs="+", default=[0.3, 0.5, 0.75, 1.0, 1.5, 2.0],
+                        help="window_duration values (grid) or range (random)")
+    parser.add_argument("--min-samples", type=int, nargs="+", default=[3, 5, 8, 12])
+    parser.add_argument("--std", type=float, nargs="+", default=[0.03, 0.045, 0.06, 0.08, 0.1])
+    parser.add_argument("--max-false-rate", type=float, default=None,
+                        help="only list configurations at or below this false-command rate")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: cpu count)")
+    parser.add_argument("--top", type=int, default=20, help="rows to print, sorted by p50 latency")
+    parser.add_argument("--csv", default=None, help="write every result to this file")
+    args = parser.parse_args()
+
+    if args.sessions:
+        sessions = [load_session_csv(path) for path in args.sessions]
+    else:
+        sessions = [synthetic_session(duration=args.duration, seed=i, name=f"synthetic-{i}")
+                    for i in range(args.synthetic)]
+    layout = load_layout(args.layout) if args.layout else None
+
+    if args.search == "grid":
+        configs = grid_configs(args.window, args.min_samples, args.std)
+    else:
+        configs = random_configs(args.trials, args.window, args.min_samples, args.std, seed=args.seed)
+
+    started = time.perf_counter()
+    results = sweep(sessions, configs, layout=layout, gaze_filter=args.filter, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(configs)} configurations x {len(sessions)} session(s) "
+          f"({sum(len(s) for s in sessions)} samples) in {elapsed:.1f}s")
+    if args.csv:
+        _write_csv(results, args.csv)
+
+    if args.max_false_rate is not None:
+        results = [r for r in results if r.false_command_rate <= args.max_false_rate]
+    results.sort(key=lambda r: (math.isnan(r.latency_p50), r.latency_p50, r.false_command_rate))
+    _print_results(results, args.top)
+
+
+if __name__ == "__main__":
+    main()
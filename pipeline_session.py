@@ -0,0 +1,243 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+from blackboard import Blackboard, Observer
+from command_generator import CommandGenerator
+from early_commit_interpreter import EarlyCommitInterpreter
+from gaze_filter import GazeFilterStage, make_filter
+from gaze_interpreter import GazeInterpreter
+from gaze_recalibration import OnlineRecalibrator
+from gaze_session import load_session_csv
+from session_log import SessionLogWriter
+from session_replay import ReplaySource
+from zone_layout import diagonal_layout, load_layout
+
+
+@dataclass
+class SessionConfig:
+    """
+    everything needed to build one independent gaze pipeline
+    plain data so it can be sent to a worker process
+    """
+    session_id: str
+    screen_width: int = 1920
+    screen_height: int = 1080
+
+    # gaze input: a camera + saved calibration, or a recorded session csv
+    # None: the camera saved with the calibration (camera 0 without one)
+    camera_index: Optional[int] = None
+    model_path: str = "gaze_model.pkl"
+    replay_path: Optional[str] = None
+    replay_speed: float = 1.0
+    poll_interval: float = 0.03
+
+    # pipeline stages
+    layout_path: Optional[str] = None
+    gaze_filter: Optional[str] = None
+    window_duration: float = 1.5
+    min_samples: int = 5
+    std_threshold: float = 0.06
+    early_commit: bool = False
+    commit_dwell: float = 0.3
+
+    # MQTT output, no publisher when broker_host is None
+    broker_host: Optional[str] = None
+    broker_port: int = 1883
+    topic: Optional[str] = None
+
+    # online drift correction from fixations on the zone labels; there is no UI
+    # for a full recalibration here, the recalibrator only flags it
+    recalibrate: bool = False
+    recalibration_threshold: float = 0.05
+
+    # columnar session log under <log_dir>/<session_id>, nothing recorded when None
+    log_dir: Optional[str] = None
+
+    def command_topic(self) -> str:
+        """explicit topic or one per session so sessions do not drive each other's robot"""
+        return self.topic if self.topic else f"gaze_bot/{self.session_id}/command"
+
+
+class SessionMetrics(Observer):
+    """
+    per-session counters, attached to the session's Blackboard like any other observer
+    """
+
+    def __init__(self, session_id: str, screen_width: int, screen_height: int):
+        self._session_id = session_id
+        self._screen_width = screen_width
+        self._screen_height = screen_height
+        self._lock = threading.Lock()
+
+        self._started_at: Optional[float] = None
+        self._first_command_at: Optional[float] = None
+        self._gaze_samples = 0
+        self._fixations = 0
+        self._valid_fixations = 0
+        self._commands = 0
+        self._provisional_commands = 0
+        self._latency_total = 0.0
+        self._last_latency: Optional[float] = None
+        self._errors = 0
+        self._last_error: Optional[str] = None
+
+    def mark_started(self):
+        with self._lock:
+            self._started_at = time.time()
+
+    def record_error(self, error: BaseException):
+        with self._lock:
+            self._errors += 1
+            self._last_error = repr(error)
+
+    def update(self, data: Dict[str, Any]) -> None:
+        changed = data.get("changed")
+        with self._lock:
+            if changed == "current_gaze":
+                self._gaze_samples += 1
+            elif changed == "current_fixation":
+                fixation = data.get("current_fixation")
+                self._fixations += 1
+                if fixation is not None and fixation.is_valid:
+                    self._valid_fixations += 1
+            elif changed == "current_provisional_command":
+                if data.get("current_provisional_command") is not None:
+                    self._provisional_commands += 1
+            elif changed == "current_command":
+                command = data.get("current_command")
+                if command is None:
+                    return
+                self._commands += 1
+                if self._first_command_at is None:
+                    self._first_command_at = time.time()
+                # time from the last gaze sample of the fixation to the command
+                fixation = data.get("current_fixation")
+                if fixation is not None:
+                    self._last_latency = command.timestamp - fixation.end_time
+                    self._latency_total += self._last_latency
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            uptime = time.time() - self._started_at if self._started_at is not None else 0.0
+            return {
+                "session_id": self._session_id,
+                "screen": (self._screen_width, self._screen_height),
+                "uptime": uptime,
+                "gaze_samples": self._gaze_samples,
+                "gaze_rate": self._gaze_samples / uptime if uptime > 0 else 0.0,
+                "fixations": self._fixations,
+                "valid_fixations": self._valid_fixations,
+                "commands": self._commands,
+                "provisional_commands": self._provisional_commands,
+                "mean_command_latency": self._latency_total / self._commands if self._commands else None,
+                "last_command_latency": self._last_latency,
+                "time_to_first_command": (self._first_command_at - self._started_at
+                                          if self._first_command_at is not None and self._started_at is not None
+                                          else None),
+                "errors": self._errors,
+                "last_error": self._last_error,
+            }
+
+
+class PipelineSession:
+    """
+    one complete pipeline: its own Blackboard, interpreter, generator,
+    optional publisher and metrics
+
+    the source is not a thread here; whoever hosts the session calls step()
+    at config.poll_interval
+    """
+
+    def __init__(self, config: SessionConfig, observers: Sequence[Observer] = (),
+                 blackboard: Optional[Blackboard] = None, publish: bool = True, predictor=None):
+        """
+        :param config: what to build
+        :param observers: extra observers attached before any pipeline stage, so
+                          they see every change before the stages react to it
+        :param blackboard: Blackboard to build on (e.g. an AsyncBlackboard),
+                           a new one with the config's geometry when None
+        :param publish: build the MQTT publisher when the config names a broker,
+                        runtimes with their own publisher pass False
+        :param predictor: BatchPredictor shared by the camera sessions of this process
+        """
+        self.config = config
+        self._predictor = predictor
+        self.blackboard = blackboard if blackboard is not None else Blackboard(config.screen_width,
+                                                                               config.screen_height)
+
+        self.metrics = SessionMetrics(config.session_id, config.screen_width, config.screen_height)
+        self.blackboard.add_observer(self.metrics)
+        for observer in observers:
+            self.blackboard.add_observer(observer)
+
+        self.log = None
+        if config.log_dir is not None:
+            self.log = SessionLogWriter(config.log_dir, config.session_id)
+            self.blackboard.add_observer(self.log)
+
+        layout = load_layout(config.layout_path) if config.layout_path else diagonal_layout()
+
+        gaze_key = "current_gaze"
+        if config.gaze_filter is not None:
+            self.blackboard.add_observer(GazeFilterStage(self.blackboard, make_filter(config.gaze_filter)))
+            gaze_key = "current_filtered_gaze"
+
+        self.generator = CommandGenerator(self.blackboard, layout)
+        self.blackboard.add_observer(self.generator)
+
+        if config.early_commit:
+            self.interpreter = EarlyCommitInterpreter(self.blackboard, layout, commit_dwell=config.commit_dwell,
+                                                      max_dwell=config.window_duration,
+                                                      min_samples=config.min_samples,
+                                                      std_threshold=config.std_threshold, gaze_key=gaze_key)
+        else:
+            self.interpreter = GazeInterpreter(self.blackboard, window_duration=config.window_duration,
+                                               min_samples=config.min_samples,
+                                               std_threshold=config.std_threshold, gaze_key=gaze_key)
+        self.blackboard.add_observer(self.interpreter)
+
+        self.publisher = None
+        if publish and config.broker_host is not None:
+            from command_publisher import MqttCommandPublisher
+            self.publisher = MqttCommandPublisher(self.blackboard, broker_host=config.broker_host,
+                                                  broker_port=config.broker_port, topic=config.command_topic())
+            self.blackboard.add_observer(self.publisher)
+
+        self.source = self._build_source()
+
+        self.recalibrator = None
+        if config.recalibrate:
+            self.recalibrator = OnlineRecalibrator(self.source.set_correction, layout,
+                                                   error_threshold=config.recalibration_threshold)
+            self.blackboard.add_observer(self.recalibrator)
+
+    def _build_source(self):
+        config = self.config
+        if config.replay_path is not None:
+            return ReplaySource(self.blackboard, load_session_csv(config.replay_path), speed=config.replay_speed)
+
+        # cv2 / eyetrax are only needed for camera sessions
+        from gaze_source import GazeSource
+        source = GazeSource(self.blackboard, poll_interval=config.poll_interval, camera_index=config.camera_index,
+                            predictor=self._predictor)
+        source.load_calibration(config.model_path)
+        return source
+
+    def open(self):
+        self.source.open()
+        self.metrics.mark_started()
+
+    def step(self):
+        """read and process one gaze sample (or every due replayed sample)"""
+        return self.source.step()
+
+    def close(self):
+        self.source.close()
+        if self.publisher is not None:
+            self.publisher.close()
+        if self.recalibrator is not None:
+            self.recalibrator.close()
+        if self.log is not None:
+            self.log.close()
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from robot_command import CommandType
+
+@dataclass
+class PredictedTarget:
+    """
+    where the gaze is expected to land before a fixation has been computed
+    """
+    x: float
+    y: float
+    command: Optional[CommandType]
+    confidence: float
+    timestamp: float
+    in_saccade: bool
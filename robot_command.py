@@ -19,4 +19,8 @@ class RobotCommand:
     """
     command: CommandType
     timestamp: float = time()
+    # issued from a gaze prediction before the fixation confirmed it
+    provisional: bool = False
+    # withdraws an earlier provisional command of the same type
+    retracted: bool = False
 
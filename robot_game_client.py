@@ -1,5 +1,8 @@
+import argparse
 import random
 import queue
+import threading
+import time
 from dataclasses import dataclass
 from typing import Optional
 
@@ -20,19 +23,33 @@ class RobotState:
     token_y: int = 0
 
 
+# ms between two passes over the command queue
+POLL_INTERVAL_MS = 50
+
+
 class RobotGame:
-    def __init__(self, broker_host: str = "test.mosquitto.org", broker_port: int = 1883, topic: str = "gaze_bot/command"):
-        self._root = tk.Tk()
-        self._root.title("MQTT Robot Game")
+    def __init__(self, broker_host: str = "test.mosquitto.org", broker_port: int = 1883, topic: str = "gaze_bot/command",
+                 headless: bool = False):
+        """
+        :param headless: no window: run() polls the command queue on the calling
+                         thread at the same interval, e.g. for load tests
+        """
+        self._headless = headless
+        self._closed = threading.Event()
 
-        width = GRID_SIZE * CELL_SIZE
-        height = GRID_SIZE * CELL_SIZE
+        self._root = None
+        if not headless:
+            self._root = tk.Tk()
+            self._root.title("MQTT Robot Game")
 
-        self._canvas = tk.Canvas(self._root, width=width, height=height, bg="white")
-        self._canvas.pack()
+            width = GRID_SIZE * CELL_SIZE
+            height = GRID_SIZE * CELL_SIZE
 
-        self._status_label = tk.Label(self._root, text="Score: 0")
-        self._status_label.pack()
+            self._canvas = tk.Canvas(self._root, width=width, height=height, bg="white")
+            self._canvas.pack()
+
+            self._status_label = tk.Label(self._root, text="Score: 0")
+            self._status_label.pack()
 
         # queue of commands received from MQTT
         self._cmd_queue: "queue.SimpleQueue[str]" = queue.SimpleQueue()
@@ -45,7 +62,8 @@ class RobotGame:
         self._place_new_token()
 
         # draw static grid lines
-        self._draw_grid()
+        if not headless:
+            self._draw_grid()
 
         # set up MQTT
         self._client = mqtt.Client()
@@ -54,11 +72,12 @@ class RobotGame:
         self._client.subscribe(topic)
         self._client.loop_start()
 
-        # start periodic Tk polling of the command queue
-        self._root.after(50, self._process_commands)
+        if not headless:
+            # start periodic Tk polling of the command queue
+            self._root.after(POLL_INTERVAL_MS, self._process_commands)
 
-        # initial draw
-        self._draw_scene()
+            # initial draw
+            self._draw_scene()
 
     
     # MQTT callback
@@ -70,8 +89,8 @@ class RobotGame:
 
     def _process_commands(self) -> None:
         """
-        periodically called in Tk mainloop to apply any commands
-        received via MQTT
+        periodically called in Tk mainloop (or the headless run loop) to
+        apply any commands received via MQTT
         """
         while not self._cmd_queue.empty():
             try:
@@ -80,8 +99,10 @@ class RobotGame:
                 break
             self._apply_command(cmd)
 
+        if self._headless:
+            return
         self._draw_scene()
-        self._root.after(50, self._process_commands)
+        self._root.after(POLL_INTERVAL_MS, self._process_commands)
 
     def _apply_command(self, cmd: str) -> None:
         """
@@ -173,16 +194,30 @@ class RobotGame:
 
 
     def run(self) -> None:
-        self._root.mainloop()
+        if not self._headless:
+            self._root.mainloop()
+            return
+
+        while not self._closed.is_set():
+            self._process_commands()
+            time.sleep(POLL_INTERVAL_MS / 1000)
 
     def close(self) -> None:
+        self._closed.set()
         self._client.loop_stop()
         self._client.disconnect()
-        self._root.destroy()
+        if self._root is not None:
+            self._root.destroy()
 
 
 def main():
-    game = RobotGame()
+    parser = argparse.ArgumentParser(description="MQTT robot game")
+    parser.add_argument("--broker", default="test.mosquitto.org", help="e.g. localhost with mqtt_broker.py")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--topic", default="gaze_bot/command")
+    args = parser.parse_args()
+
+    game = RobotGame(args.broker, args.port, args.topic)
     try:
         game.run()
     finally:
@@ -0,0 +1,233 @@
+import argparse
+import heapq
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from batch_predictor import BatchPredictor, capture_pool_size
+from pipeline_session import PipelineSession, SessionConfig
+
+
+def _worker_main(configs: List[SessionConfig], metrics_queue, stop_event, threads: int, metrics_interval: float,
+                 batch_size: Optional[int] = None, batch_latency: float = 0.005):
+    """
+    body of one worker process: owns a shard of the sessions and steps them on
+    a shared thread pool, each session at its own poll_interval
+    with batch_size set, the camera sessions of this worker share one BatchPredictor
+    """
+    predictor = BatchPredictor(batch_size, batch_latency) if batch_size else None
+    sessions = [PipelineSession(config, predictor=predictor) for config in configs]
+    for session in sessions:
+        session.open()
+
+    # (next due time, session index) --> at most one entry per session, so a
+    # session never has two steps in flight
+    due = [(time.monotonic(), i) for i in range(len(sessions))]
+    heapq.heapify(due)
+    due_lock = threading.Lock()
+    wake = threading.Event()
+
+    def run_step(i: int):
+        session = sessions[i]
+        try:
+            session.step()
+        except Exception as e:
+            session.metrics.record_error(e)
+        finally:
+            with due_lock:
+                heapq.heappush(due, (time.monotonic() + session.config.poll_interval, i))
+            wake.set()
+
+    def report():
+        metrics_queue.put({s.config.session_id: s.metrics.snapshot() for s in sessions})
+
+    next_report = time.monotonic() + metrics_interval
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        while not stop_event.is_set():
+            now = time.monotonic()
+            with due_lock:
+                while due and due[0][0] <= now:
+                    _, i = heapq.heappop(due)
+                    pool.submit(run_step, i)
+                wait = due[0][0] - now if due else metrics_interval
+
+            if now >= next_report:
+                report()
+                next_report = now + metrics_interval
+
+            wake.wait(max(0.0, min(wait, next_report - now)))
+            wake.clear()
+
+    for session in sessions:
+        session.close()
+    if predictor is not None:
+        predictor.close()
+    report()
+
+
+def shard_configs(configs: List[SessionConfig], workers: int,
+                  batch_size: Optional[int] = None) -> List[List[SessionConfig]]:
+    """
+    split the sessions over at most workers shards, round-robin
+    with batch_size set the camera sessions are packed into as few shards as
+    hold them at batch_size each, so their predictions share a BatchPredictor
+    instead of each worker batching a single stream
+    """
+    workers = max(1, min(workers, len(configs)))
+    shards: List[List[SessionConfig]] = [[] for _ in range(workers)]
+    if not batch_size:
+        for i, config in enumerate(configs):
+            shards[i % workers].append(config)
+        return shards
+
+    cameras = [c for c in configs if c.replay_path is None]
+    replays = [c for c in configs if c.replay_path is not None]
+    camera_shards = min(workers, -(-len(cameras) // batch_size)) or 1
+    for i, config in enumerate(cameras):
+        shards[i % camera_shards].append(config)
+    # replays do not predict, they go to the least loaded shards
+    for config in replays:
+        min(shards, key=len).append(config)
+    return [shard for shard in shards if shard]
+
+
+class SessionHost:
+    """
+    runs many independent PipelineSessions in one server
+
+    sessions are sharded round-robin over worker processes (one per core by
+    default) so pipelines spread across cores; inside a worker the sessions
+    share a small thread pool (and optionally one BatchPredictor, camera
+    sessions are then kept together so batches can fill). metrics come back to
+    the host periodically
+    """
+
+    def __init__(self, workers: Optional[int] = None, threads_per_worker: Optional[int] = None,
+                 metrics_interval: float = 1.0, batch_size: Optional[int] = None, batch_latency: float = 0.005):
+        self._workers = workers if workers else (os.cpu_count() or 1)
+        self._batch_size = batch_size
+        self._batch_latency = batch_latency
+        # None = 4, or batch_size if larger so a worker's batches can fill
+        self._threads_per_worker = capture_pool_size(threads_per_worker, 4, batch_size, "threads_per_worker")
+        self._metrics_interval = metrics_interval
+
+        self._configs: List[SessionConfig] = []
+        self._processes = []
+        # spawn: workers must not inherit the host's threads (or a Tk root)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._metrics_queue = None
+        self._stop_event = None
+
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+        self._metrics_lock = threading.Lock()
+        self._collector: Optional[threading.Thread] = None
+        self._running = False
+
+    def add_session(self, config: SessionConfig):
+        """register a session, only before start()"""
+        if self._running:
+            raise RuntimeError("cannot add sessions to a running SessionHost")
+        if any(c.session_id == config.session_id for c in self._configs):
+            raise ValueError(f"duplicate session_id '{config.session_id}'")
+        self._configs.append(config)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._metrics_queue = self._ctx.Queue()
+        self._stop_event = self._ctx.Event()
+
+        for shard in shard_configs(self._configs, self._workers, self._batch_size):
+            process = self._ctx.Process(target=_worker_main,
+                                        args=(shard, self._metrics_queue, self._stop_event,
+                                              self._threads_per_worker, self._metrics_interval,
+                                              self._batch_size, self._batch_latency),
+                                        daemon=True)
+            process.start()
+            self._processes.append(process)
+
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def _collect(self):
+        """drain metric reports from the workers into the shared dict"""
+        while self._running or not self._metrics_queue.empty():
+            try:
+                report = self._metrics_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            with self._metrics_lock:
+                self._metrics.update(report)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """latest metrics snapshot of every session, keyed by session_id"""
+        with self._metrics_lock:
+            return {k: dict(v) for k, v in self._metrics.items()}
+
+    def stop(self, timeout: float = 5.0):
+        """ask every worker to stop, wait for their final metrics"""
+        if not self._running:
+            return
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._running = False
+        self._collector.join(timeout)
+        self._processes = []
+
+
+def _print_metrics(metrics: Dict[str, Dict[str, Any]]):
+    print(f"{'session':<16}{'gaze/s':>8}{'fixations':>11}{'valid':>7}{'commands':>10}{'latency ms':>12}{'errors':>8}")
+    for session_id in sorted(metrics):
+        m = metrics[session_id]
+        latency = m["mean_command_latency"]
+        latency = f"{latency * 1000:.1f}" if latency is not None else "-"
+        print(f"{session_id:<16}{m['gaze_rate']:>8.1f}{m['fixations']:>11}{m['valid_fixations']:>7}"
+              f"{m['commands']:>10}{latency:>12}{m['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="run many gaze pipelines in one process tree")
+    parser.add_argument("config", help="json file with a list of SessionConfig objects")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: cpu count)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="threads per worker process (default: 4, or --batch-size if larger)")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between metric reports")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="batch gaze predictions of each worker's camera sessions, up to this many per call")
+    parser.add_argument("--batch-latency", type=float, default=0.005,
+                        help="longest a prediction waits for its batch to fill (s)")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        configs = [SessionConfig(**entry) for entry in json.load(f)]
+
+    host = SessionHost(workers=args.workers, threads_per_worker=args.threads, metrics_interval=args.interval,
+                       batch_size=args.batch_size, batch_latency=args.batch_latency)
+    for config in configs:
+        host.add_session(config)
+
+    host.start()
+    started = time.time()
+    try:
+        while args.duration is None or time.time() - started < args.duration:
+            time.sleep(args.interval)
+            _print_metrics(host.metrics())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        host.stop()
+    _print_metrics(host.metrics())
+
+
+if __name__ == "__main__":
+    main()
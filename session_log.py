@@ -0,0 +1,178 @@
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+import numpy as np
+
+from blackboard import Observer
+from robot_command import CommandType
+
+# on-disk layout: <root>/<session_id>/<YYYY-MM-DD>/<stream>/<column>.<dtype>
+# the day (UTC) is that of each row's own timestamp, the first column of every stream.
+# every column file is a raw little-endian array that is only ever appended to.
+# a flush writes the columns one after another, so after a crash the columns of
+# a stream can differ in length --> readers use the shortest one, and a writer
+# cuts every column back to that length before it first appends to the partition
+
+SCHEMA: Dict[str, List[Tuple[str, str]]] = {
+    "gaze": [
+        ("timestamp", "<f8"),
+        ("x", "<f4"),
+        ("y", "<f4"),
+    ],
+    "fixation": [
+        ("logged_at", "<f8"),
+        ("start_time", "<f8"),
+        ("end_time", "<f8"),
+        ("mean_x", "<f4"),
+        ("mean_y", "<f4"),
+        ("std_x", "<f4"),
+        ("std_y", "<f4"),
+        ("is_valid", "u1"),
+    ],
+    "command": [
+        ("timestamp", "<f8"),
+        ("command", "i1"),
+        ("provisional", "u1"),
+        ("retracted", "u1"),
+        # end of the fixation that produced the command, NaN for provisional ones
+        ("fixation_end", "<f8"),
+    ],
+}
+
+# command column stores the index of the CommandType in this list
+COMMAND_CODES: List[CommandType] = list(CommandType)
+_COMMAND_INDEX = {command: i for i, command in enumerate(COMMAND_CODES)}
+
+
+def column_path(root: str, session_id: str, day: str, stream: str, column: str) -> str:
+    dtype = dict(SCHEMA[stream])[column]
+    return os.path.join(root, session_id, day, stream, f"{column}.{np.dtype(dtype).str.lstrip('<|>')}")
+
+
+class SessionLogWriter(Observer):
+    """
+    Blackboard observer that logs gaze, fixation and command streams to
+    append-only columnar files
+
+    update() only appends a tuple to an in-memory buffer; a background thread
+    swaps the buffers every flush_interval seconds (or sooner once max_rows
+    are waiting) and writes them out, so the pipeline never waits on disk
+    """
+
+    def __init__(self, root: str, session_id: str = "default", flush_interval: float = 1.0,
+                 max_rows: int = 10000):
+        """
+        :param root: directory holding the logs of every session
+        :param session_id: sub-directory for this session
+        :param flush_interval: seconds between background flushes
+        :param max_rows: flush early once this many rows of one stream are buffered
+        """
+        self._root = root
+        self._session_id = session_id
+        self._flush_interval = flush_interval
+        self._max_rows = max_rows
+
+        self._buffers: Dict[str, List[tuple]] = {stream: [] for stream in SCHEMA}
+        self._buffer_lock = threading.Lock()
+        # held for a whole flush so two flushes never interleave their column writes
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = True
+        self._rows_written = {stream: 0 for stream in SCHEMA}
+        # (day, stream) partitions already trimmed by this writer
+        self._opened: Set[Tuple[str, str]] = set()
+
+        self._flusher = threading.Thread(target=self._run, daemon=True)
+        self._flusher.start()
+
+    # --------- hot path ---------
+    def update(self, data: Dict[str, Any]) -> None:
+        changed = data.get("changed")
+        if changed == "current_gaze":
+            gaze = data.get("current_gaze")
+            if gaze is None:
+                return
+            row = (gaze.timestamp, gaze.x, gaze.y)
+            stream = "gaze"
+        elif changed == "current_fixation":
+            f = data.get("current_fixation")
+            if f is None:
+                return
+            row = (time.time(), f.start_time, f.end_time, f.mean_x, f.mean_y, f.std_x, f.std_y, f.is_valid)
+            stream = "fixation"
+        elif changed in ("current_command", "current_provisional_command"):
+            cmd = data.get(changed)
+            if cmd is None:
+                return
+            fixation = data.get("current_fixation")
+            fixation_end = fixation.end_time if fixation is not None and not cmd.provisional else math.nan
+            row = (cmd.timestamp, _COMMAND_INDEX[cmd.command], cmd.provisional, cmd.retracted, fixation_end)
+            stream = "command"
+        else:
+            return
+
+        with self._buffer_lock:
+            buffer = self._buffers[stream]
+            buffer.append(row)
+            full = len(buffer) >= self._max_rows
+        if full:
+            self._wake.set()
+
+    # --------- background flushing ---------
+    def _run(self):
+        while self._running:
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """write everything buffered so far, safe to call next to the background flusher"""
+        with self._flush_lock:
+            with self._buffer_lock:
+                buffers = self._buffers
+                self._buffers = {stream: [] for stream in SCHEMA}
+
+            for stream, rows in buffers.items():
+                if not rows:
+                    continue
+                columns = [np.asarray(values, dtype=dtype) for (_, dtype), values in zip(SCHEMA[stream], zip(*rows))]
+                # rows go to the day of their own timestamp, a flush after midnight may span two
+                days = np.floor(columns[0] / 86400.0).astype(np.int64)
+                for day_number in np.unique(days):
+                    selected = days == day_number
+                    day = time.strftime("%Y-%m-%d", time.gmtime(int(day_number) * 86400))
+                    directory = os.path.join(self._root, self._session_id, day, stream)
+                    os.makedirs(directory, exist_ok=True)
+                    if (day, stream) not in self._opened:
+                        self._trim_partition(day, stream)
+                        self._opened.add((day, stream))
+                    for (name, _), values in zip(SCHEMA[stream], columns):
+                        with open(column_path(self._root, self._session_id, day, stream, name), "ab") as f:
+                            f.write(values[selected].tobytes())
+                self._rows_written[stream] += len(rows)
+
+    def _trim_partition(self, day: str, stream: str):
+        """
+        cut the columns of an existing partition back to the shortest one, so rows
+        appended after a torn flush line up again across columns
+        """
+        paths = [(column_path(self._root, self._session_id, day, stream, name), np.dtype(dtype).itemsize)
+                 for name, dtype in SCHEMA[stream]]
+        sizes = [os.path.getsize(path) if os.path.exists(path) else 0 for path, _ in paths]
+        rows = min(size // itemsize for size, (_, itemsize) in zip(sizes, paths))
+        for size, (path, itemsize) in zip(sizes, paths):
+            if size > rows * itemsize:
+                os.truncate(path, rows * itemsize)
+
+    def rows_written(self) -> Dict[str, int]:
+        return dict(self._rows_written)
+
+    def close(self):
+        """stop the flusher and write what is left"""
+        self._running = False
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
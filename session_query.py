@@ -0,0 +1,175 @@
+import argparse
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gaze_session import GazeSession
+from session_log import COMMAND_CODES, SCHEMA, column_path
+
+
+class SessionLogReader:
+    """
+    read-only view of a SessionLogWriter directory
+
+    columns are memory-mapped and scanned in chunks, so a query over days of
+    logs only ever holds chunk_rows values per column in memory
+    """
+
+    def __init__(self, root: str, chunk_rows: int = 1 << 20):
+        self._root = root
+        self._chunk_rows = chunk_rows
+
+    def sessions(self) -> List[str]:
+        if not os.path.isdir(self._root):
+            return []
+        return sorted(d for d in os.listdir(self._root) if os.path.isdir(os.path.join(self._root, d)))
+
+    def days(self, session_id: str) -> List[str]:
+        directory = os.path.join(self._root, session_id)
+        return sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+
+    def partitions(self, stream: str, sessions: Optional[Sequence[str]] = None,
+                   since: Optional[str] = None, until: Optional[str] = None) -> List[Tuple[str, str]]:
+        """(session_id, day) pairs holding data for stream, days as YYYY-MM-DD (inclusive)"""
+        found = []
+        for session_id in (sessions if sessions is not None else self.sessions()):
+            if not os.path.isdir(os.path.join(self._root, session_id)):
+                continue
+            for day in self.days(session_id):
+                if (since is not None and day < since) or (until is not None and day > until):
+                    continue
+                if os.path.isdir(os.path.join(self._root, session_id, day, stream)):
+                    found.append((session_id, day))
+        return found
+
+    def _memmaps(self, stream: str, session_id: str, day: str, columns: Sequence[str]) -> Dict[str, np.ndarray]:
+        dtypes = dict(SCHEMA[stream])
+        maps = {}
+        rows = None
+        for name in columns:
+            path = column_path(self._root, session_id, day, stream, name)
+            itemsize = np.dtype(dtypes[name]).itemsize
+            size = os.path.getsize(path) // itemsize if os.path.exists(path) else 0
+            rows = size if rows is None else min(rows, size)
+            maps[name] = (path, dtypes[name], size)
+
+        # columns written by an interrupted flush may be longer, trust the shortest
+        result = {}
+        for name, (path, dtype, size) in maps.items():
+            if rows == 0:
+                result[name] = np.empty(0, dtype=dtype)
+            else:
+                result[name] = np.memmap(path, dtype=dtype, mode="r", shape=(size,))[:rows]
+        return result
+
+    def scan(self, stream: str, columns: Sequence[str], **filters) -> Iterator[Dict[str, np.ndarray]]:
+        """yield dicts of column chunks (at most chunk_rows rows each) over all matching partitions"""
+        for session_id, day in self.partitions(stream, **filters):
+            maps = self._memmaps(stream, session_id, day, columns)
+            rows = len(next(iter(maps.values()))) if maps else 0
+            for start in range(0, rows, self._chunk_rows):
+                yield {name: np.asarray(column[start:start + self._chunk_rows]) for name, column in maps.items()}
+
+
+def load_gaze_session(reader: SessionLogReader, session_id: str, **filters) -> GazeSession:
+    """logged gaze of one session as a GazeSession (without targets) for replays and benchmarks"""
+    chunks = list(reader.scan("gaze", ["timestamp", "x", "y"], sessions=[session_id], **filters))
+    if not chunks:
+        raise ValueError(f"no gaze logged for session '{session_id}'")
+    return GazeSession(timestamps=np.concatenate([c["timestamp"] for c in chunks]),
+                       xs=np.concatenate([c["x"] for c in chunks]).astype(np.float64),
+                       ys=np.concatenate([c["y"] for c in chunks]).astype(np.float64),
+                       name=session_id)
+
+
+# --------- queries ---------
+def commands_per_minute(reader: SessionLogReader, include_provisional: bool = False, **filters) -> Dict[int, int]:
+    """epoch minute --> number of commands issued in it"""
+    counts: Dict[int, int] = {}
+    for chunk in reader.scan("command", ["timestamp", "provisional"], **filters):
+        timestamps = chunk["timestamp"]
+        if not include_provisional:
+            timestamps = timestamps[chunk["provisional"] == 0]
+        minutes, per_minute = np.unique((timestamps // 60).astype(np.int64), return_counts=True)
+        for minute, count in zip(minutes.tolist(), per_minute.tolist()):
+            counts[minute] = counts.get(minute, 0) + count
+    return counts
+
+
+def command_counts(reader: SessionLogReader, **filters) -> Dict[str, int]:
+    """how often each confirmed command was issued"""
+    totals = np.zeros(len(COMMAND_CODES), dtype=np.int64)
+    for chunk in reader.scan("command", ["command", "provisional"], **filters):
+        codes = chunk["command"][chunk["provisional"] == 0].astype(np.int64)
+        totals += np.bincount(codes, minlength=len(COMMAND_CODES))
+    return {command.name: int(n) for command, n in zip(COMMAND_CODES, totals)}
+
+
+def fixation_validity_rate(reader: SessionLogReader, **filters) -> Tuple[float, int]:
+    """(share of valid fixations, number of fixations)"""
+    valid = 0
+    total = 0
+    for chunk in reader.scan("fixation", ["is_valid"], **filters):
+        valid += int(np.count_nonzero(chunk["is_valid"]))
+        total += len(chunk["is_valid"])
+    return (valid / total if total else float("nan")), total
+
+
+def latency_histogram(reader: SessionLogReader, bin_width: float = 0.001, max_latency: float = 1.0,
+                      **filters) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    histogram of fixation end --> command latency for confirmed commands
+    returns (bin edges, counts); the last bin also collects everything above max_latency
+    """
+    edges = np.arange(0.0, max_latency + bin_width, bin_width)
+    counts = np.zeros(len(edges) - 1, dtype=np.int64)
+    for chunk in reader.scan("command", ["timestamp", "fixation_end"], **filters):
+        latencies = chunk["timestamp"] - chunk["fixation_end"]
+        latencies = latencies[np.isfinite(latencies)]
+        counts += np.histogram(np.clip(latencies, 0.0, edges[-1] - bin_width / 2), bins=edges)[0]
+    return edges, counts
+
+
+def latency_percentiles(reader: SessionLogReader, percentiles: Sequence[float] = (50, 90, 99),
+                        bin_width: float = 0.001, max_latency: float = 1.0, **filters) -> Dict[float, float]:
+    """percentiles of the command latency, accurate to bin_width"""
+    edges, counts = latency_histogram(reader, bin_width, max_latency, **filters)
+    total = counts.sum()
+    if total == 0:
+        return {p: float("nan") for p in percentiles}
+    cumulative = np.cumsum(counts)
+    return {p: float(edges[int(np.searchsorted(cumulative, total * p / 100.0)) + 1]) for p in percentiles}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="query SessionLogWriter directories")
+    parser.add_argument("root", help="log directory")
+    parser.add_argument("query", choices=["commands-per-minute", "command-counts", "validity", "latency"])
+    parser.add_argument("--session", action="append", default=None, help="restrict to session(s)")
+    parser.add_argument("--since", default=None, help="first day, YYYY-MM-DD")
+    parser.add_argument("--until", default=None, help="last day, YYYY-MM-DD")
+    args = parser.parse_args()
+
+    reader = SessionLogReader(args.root)
+    filters = {"sessions": args.session, "since": args.since, "until": args.until}
+
+    if args.query == "commands-per-minute":
+        counts = commands_per_minute(reader, **filters)
+        for minute in sorted(counts):
+            print(f"{np.datetime64(minute * 60, 's')}  {counts[minute]}")
+        if counts:
+            print(f"mean {sum(counts.values()) / len(counts):.2f} commands / active minute")
+    elif args.query == "command-counts":
+        for name, count in command_counts(reader, **filters).items():
+            print(f"{name:<10}{count:>10}")
+    elif args.query == "validity":
+        rate, total = fixation_validity_rate(reader, **filters)
+        print(f"{rate:.1%} of {total} fixations valid")
+    else:
+        for p, value in latency_percentiles(reader, **filters).items():
+            print(f"p{p:g}: {value * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import contextlib
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List
+
+from gaze_event import GazeEvent
+from fixation_event import FixationEvent
+from robot_command import RobotCommand
+from blackboard import Blackboard, Observer
+from gaze_session import GazeSession
+
+
+class ReplayBlackboard(Blackboard):
+    """
+    Blackboard used when replaying a recorded session offline
+
+    every fixation and command is recorded together with the session time of
+    the gaze sample that caused it, so latencies are measured on the
+    recording's clock instead of wall time
+    """
+
+    def __init__(self, screen_width: int = 1920, screen_height: int = 1080):
+        super().__init__(screen_width, screen_height)
+
+        # session time of the sample being replayed
+        self.now = 0.0
+
+        # (session time, object) for everything published during the replay
+        self.fixations: List = []
+        self.commands: List = []
+
+    def set_current_gaze(self, gaze: GazeEvent):
+        self.now = gaze.timestamp
+        super().set_current_gaze(gaze)
+
+    def set_current_fixation(self, fixation: FixationEvent):
+        self.fixations.append((self.now, fixation))
+        super().set_current_fixation(fixation)
+
+    def set_current_command(self, command: RobotCommand):
+        self.commands.append((self.now, command))
+        super().set_current_command(command)
+
+    def set_current_provisional_command(self, command: RobotCommand):
+        # kept in the same stream, ReplayResult.confirmed() filters them out
+        self.commands.append((self.now, command))
+        super().set_current_provisional_command(command)
+
+
+@dataclass
+class ReplayResult:
+    """what a pipeline produced for one session, on the session clock"""
+    fixation_times: List[float] = field(default_factory=list)
+    fixations: List[FixationEvent] = field(default_factory=list)
+    command_times: List[float] = field(default_factory=list)
+    commands: List[RobotCommand] = field(default_factory=list)
+
+    @property
+    def command_types(self):
+        return [c.command for c in self.commands]
+
+    def confirmed(self):
+        """(times, command types) of the commands that were not provisional"""
+        times = [t for t, c in zip(self.command_times, self.commands) if not c.provisional]
+        types = [c.command for c in self.commands if not c.provisional]
+        return times, types
+
+
+def replay_session(session: GazeSession, build: Callable[[ReplayBlackboard], List[Observer]],
+                   quiet: bool = True) -> ReplayResult:
+    """
+    feed every sample of session through the observers returned by build()
+
+    build receives a fresh ReplayBlackboard and returns the observers to attach,
+    e.g. lambda bb: [GazeInterpreter(bb), CommandGenerator(bb)]
+    quiet swallows the debug prints of the pipeline stages
+    """
+    board = ReplayBlackboard()
+    for observer in build(board):
+        board.add_observer(observer)
+
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        for event in session.events():
+            board.set_current_gaze(event)
+
+    result = ReplayResult()
+    for t, fixation in board.fixations:
+        result.fixation_times.append(t)
+        result.fixations.append(fixation)
+    for t, command in board.commands:
+        result.command_times.append(t)
+        result.commands.append(command)
+    return result
+
+
+class ReplaySource:
+    """
+    plays a recorded GazeSession into a Blackboard in real time
+
+    same open() / step() / close() interface as GazeSource so a host can
+    schedule camera and replayed sessions the same way. timestamps are
+    rebased onto the wall clock so live latency metrics stay meaningful
+    """
+
+    def __init__(self, blackboard: Blackboard, session: GazeSession, speed: float = 1.0, loop: bool = True):
+        self._blackboard = blackboard
+        self._session = session
+        self._speed = speed
+        self._loop = loop
+        self._index = 0
+        self._start: float = None
+        # optional AffineCorrection, same hook as GazeSource
+        self._correction = None
+
+    @property
+    def finished(self) -> bool:
+        return not self._loop and self._index >= len(self._session)
+
+    def set_correction(self, correction):
+        self._correction = correction
+
+    def open(self):
+        self._start = time.time()
+        self._index = 0
+
+    def close(self):
+        pass
+
+    def read(self) -> List[GazeEvent]:
+        """every sample that is due by now, without publishing them"""
+        if self._start is None:
+            self.open()
+        if len(self._session) == 0:
+            return []
+
+        now = time.time()
+        t0 = float(self._session.timestamps[0])
+        events = []
+        restarted = False
+        while True:
+            if self._index >= len(self._session):
+                if not self._loop or restarted:
+                    break
+                restarted = True
+                # start over, continuing from where the last pass ended
+                self._start = now
+                self._index = 0
+
+            offset = (float(self._session.timestamps[self._index]) - t0) / self._speed
+            if self._start + offset > now:
+                break
+
+            x = float(self._session.xs[self._index])
+            y = float(self._session.ys[self._index])
+            correction = self._correction
+            if correction is not None:
+                x, y = correction.apply(x, y)
+            events.append(GazeEvent(x=x, y=y, timestamp=self._start + offset))
+            self._index += 1
+        return events
+
+    def step(self):
+        """publish every sample that is due by now, return the last one (or None)"""
+        event = None
+        for event in self.read():
+            self._blackboard.set_current_gaze(event)
+        return event
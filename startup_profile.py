@@ -0,0 +1,88 @@
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from blackboard import Observer
+
+
+class StartupProfile(Observer):
+    """
+    records how long each startup phase takes, measured from a fixed origin
+    (ideally taken before the first heavy import)
+
+    attach it to a Blackboard to also stamp the first gaze, fixation and command
+    """
+
+    _FIRSTS = {
+        "current_gaze": "first gaze",
+        "current_fixation": "first fixation",
+        "current_command": "first command",
+    }
+
+    def __init__(self, origin: Optional[float] = None):
+        self._origin = origin if origin is not None else time.perf_counter()
+        self._marks: List[Tuple[str, float]] = []
+        self._seen = set()
+        self._lock = threading.Lock()
+        self.first_command = threading.Event()
+
+    def mark(self, name: str) -> float:
+        """stamp a phase, returns seconds since the origin"""
+        elapsed = time.perf_counter() - self._origin
+        with self._lock:
+            self._marks.append((name, elapsed))
+        return elapsed
+
+    def update(self, data: Dict[str, Any]) -> None:
+        changed = data.get("changed")
+        if changed not in self._FIRSTS or changed in self._seen:
+            return
+        self._seen.add(changed)
+        self.mark(self._FIRSTS[changed])
+        if changed == "current_command":
+            self.first_command.set()
+
+    def marks(self) -> List[Tuple[str, float]]:
+        with self._lock:
+            return list(self._marks)
+
+    def time_to_first_command(self) -> Optional[float]:
+        for name, elapsed in self.marks():
+            if name == "first command":
+                return elapsed
+        return None
+
+    def report(self) -> str:
+        lines = [f"{'phase':<22}{'at ms':>10}{'delta ms':>10}"]
+        previous = 0.0
+        for name, elapsed in self.marks():
+            lines.append(f"{name:<22}{elapsed * 1000:>10.1f}{(elapsed - previous) * 1000:>10.1f}")
+            previous = elapsed
+        return "\n".join(lines)
+
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(module: str, python: str = sys.executable) -> List[Tuple[str, float, float]]:
+    """
+    import module in a fresh interpreter with -X importtime and return
+    (module, self seconds, cumulative seconds) for the top-level imports and
+    their direct children, slowest first
+    """
+    result = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # only direct children of the entry import (two spaces of indent)
+        if match and len(match.group(3)) <= 3:
+            rows.append((match.group(4), int(match.group(1)) / 1e6, int(match.group(2)) / 1e6))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows
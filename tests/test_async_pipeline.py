@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from async_pipeline import AsyncSessionHost
+from gaze_session import save_session_csv, synthetic_session
+from pipeline_session import SessionConfig
+from session_replay import ReplaySource
+
+
+def test_failing_sessions_do_not_stop_the_others(tmp_path, monkeypatch):
+    paths = {}
+    for name in ("good", "bad-read", "bad-open"):
+        paths[name] = str(tmp_path / f"{name}.csv")
+        save_session_csv(synthetic_session(duration=5.0, seed=0), paths[name])
+
+    read = ReplaySource.read
+    open_ = ReplaySource.open
+
+    def failing_read(self):
+        if self._session.name == paths["bad-read"]:
+            raise RuntimeError("camera unplugged")
+        return read(self)
+
+    def failing_open(self):
+        if self._session.name == paths["bad-open"]:
+            raise RuntimeError("no such camera")
+        return open_(self)
+
+    monkeypatch.setattr(ReplaySource, "read", failing_read)
+    monkeypatch.setattr(ReplaySource, "open", failing_open)
+
+    host = AsyncSessionHost()
+    for name, path in paths.items():
+        host.add_session(SessionConfig(session_id=name, replay_path=path, replay_speed=4.0, poll_interval=0.01))
+    asyncio.run(host.run(duration=0.5))
+
+    metrics = host.metrics()
+    assert metrics["good"]["errors"] == 0 and metrics["good"]["gaze_samples"] > 0
+    # read errors are recorded at every poll, the session keeps polling
+    assert metrics["bad-read"]["errors"] > 1 and "camera unplugged" in metrics["bad-read"]["last_error"]
+    # a session that cannot start records why and ends
+    assert metrics["bad-open"]["errors"] == 1 and "no such camera" in metrics["bad-open"]["last_error"]
+
+    # nothing keeps running once run() has returned
+    samples = metrics["good"]["gaze_samples"]
+    time.sleep(0.1)
+    assert host.metrics()["good"]["gaze_samples"] == samples
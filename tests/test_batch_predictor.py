@@ -0,0 +1,90 @@
+import threading
+import time
+
+import numpy as np
+
+from batch_predictor import BatchPredictor
+from pipeline_session import SessionConfig
+from session_host import shard_configs
+
+
+class _Estimator:
+    """returns the first two features as the gaze point"""
+
+    def predict(self, features):
+        return np.asarray(features)[:, :2]
+
+
+def _predict_concurrently(predictor, estimator, count):
+    results = [None] * count
+
+    def run(i):
+        results[i] = predictor.predict(estimator, [i, 2 * i, 0.0])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_single_stream_is_not_held_back():
+    predictor = BatchPredictor(max_batch=16, max_latency=1.0)
+    predictor.register_stream()
+    try:
+        started = time.perf_counter()
+        for i in range(5):
+            assert predictor.predict(_Estimator(), [i, -i, 0.0]) == (i, -i)
+        assert time.perf_counter() - started < 0.5
+    finally:
+        predictor.close()
+
+
+def test_batch_dispatches_once_every_stream_is_waiting():
+    predictor = BatchPredictor(max_batch=16, max_latency=1.0)
+    for _ in range(4):
+        predictor.register_stream()
+    try:
+        started = time.perf_counter()
+        results = _predict_concurrently(predictor, _Estimator(), 4)
+        assert time.perf_counter() - started < 0.5
+        assert results == [(i, 2 * i) for i in range(4)]
+        assert predictor.stats()["batch_sizes"] == {4: 1}
+    finally:
+        predictor.close()
+
+
+def test_missing_stream_waits_for_the_deadline():
+    predictor = BatchPredictor(max_batch=16, max_latency=0.1)
+    predictor.register_stream()
+    predictor.register_stream()
+    try:
+        started = time.perf_counter()
+        assert predictor.predict(_Estimator(), [1.0, 2.0, 0.0]) == (1.0, 2.0)
+        assert time.perf_counter() - started >= 0.1
+
+        # the second camera closed, the remaining one runs unbatched again
+        predictor.unregister_stream()
+        started = time.perf_counter()
+        predictor.predict(_Estimator(), [1.0, 2.0, 0.0])
+        assert time.perf_counter() - started < 0.1
+    finally:
+        predictor.close()
+
+
+def test_batched_camera_sessions_share_a_worker():
+    cameras = [SessionConfig(session_id=f"cam-{i}") for i in range(6)]
+    replays = [SessionConfig(session_id=f"replay-{i}", replay_path="s.csv") for i in range(3)]
+    configs = cameras + replays
+
+    # without batching everything is spread round-robin
+    shards = shard_configs(configs, workers=4)
+    assert [len(s) for s in shards] == [3, 2, 2, 2]
+
+    # cameras packed batch_size per worker, replays fill the other workers
+    shards = shard_configs(configs, workers=4, batch_size=4)
+    camera_counts = [sum(c.replay_path is None for c in s) for s in shards]
+    assert sorted(camera_counts, reverse=True)[:2] == [3, 3]
+    assert sum(len(s) for s in shards) == len(configs)
+    assert shard_configs(cameras, workers=8, batch_size=8) == [cameras]
@@ -0,0 +1,27 @@
+from capture_config import CaptureConfig, ModeResult, pick_mode
+
+
+def _result(width, latency_ms, detection_rate=1.0, jitter=0.01):
+    return ModeResult(config=CaptureConfig(width=width, height=width * 3 // 4), frames=100,
+                      read_ms=latency_ms, process_ms=0.0, p95_ms=latency_ms,
+                      detection_rate=detection_rate, jitter=jitter)
+
+
+def test_unmeasured_jitter_fails_a_jitter_limit():
+    result = _result(320, 5.0, jitter=None)
+    assert not result.meets(0.9, 0.03)
+    # without a model there is no jitter limit to meet
+    assert result.meets(0.9, None)
+
+
+def test_pick_mode_takes_the_fastest_mode_meeting_the_floor():
+    results = [
+        _result(320, 4.0, jitter=None),
+        _result(640, 6.0, detection_rate=0.5),
+        _result(800, 8.0, jitter=0.05),
+        _result(1280, 12.0),
+        _result(1920, 20.0),
+    ]
+    assert pick_mode(results, 0.9, 0.03).config.width == 1280
+    assert pick_mode(results, 0.9, None).config.width == 320
+    assert pick_mode(results[:3], 0.9, 0.03) is None
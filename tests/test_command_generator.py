@@ -0,0 +1,134 @@
+from blackboard import Blackboard
+from command_generator import CommandGenerator
+from command_publisher import command_message
+from fixation_event import FixationEvent
+from predicted_target import PredictedTarget
+from robot_command import CommandType
+
+TOPIC = "gaze_bot/command"
+PROVISIONAL = TOPIC + "/provisional"
+
+FORWARD = (0.5, 0.1)
+LEFT = (0.1, 0.5)
+RIGHT = (0.9, 0.5)
+
+
+class _PublishRecorder:
+    """records the (topic, payload) pairs an MqttCommandPublisher would send"""
+
+    def __init__(self):
+        self.messages = []
+
+    def update(self, data):
+        changed = data.get("changed")
+        if changed in ("current_command", "current_provisional_command"):
+            self.messages.append(command_message(data[changed], TOPIC))
+
+
+def _pipeline(provisional_threshold=0.8):
+    blackboard = Blackboard(1920, 1080)
+    blackboard.add_observer(CommandGenerator(blackboard, provisional_threshold=provisional_threshold))
+    recorder = _PublishRecorder()
+    blackboard.add_observer(recorder)
+    return blackboard, recorder
+
+
+def _predict(blackboard, command, timestamp, confidence=1.0):
+    blackboard.set_current_prediction(PredictedTarget(x=0.5, y=0.5, command=command,
+                                                      confidence=confidence,
+                                                      timestamp=timestamp, in_saccade=False))
+
+
+def _fixate(blackboard, point, start_time, end_time, is_valid=True):
+    blackboard.set_current_fixation(FixationEvent(mean_x=point[0], mean_y=point[1],
+                                                  std_x=0.01, std_y=0.01,
+                                                  start_time=start_time, end_time=end_time,
+                                                  is_valid=is_valid))
+
+
+def test_fixation_covering_the_prediction_settles_it():
+    blackboard, recorder = _pipeline()
+
+    _predict(blackboard, CommandType.FORWARD, timestamp=1.0)
+    _fixate(blackboard, FORWARD, start_time=0.9, end_time=1.2)
+
+    assert recorder.messages == [(PROVISIONAL, "FORWARD"), (TOPIC, "FORWARD")]
+
+    # the confirmed command is not pre-armed again
+    _predict(blackboard, CommandType.FORWARD, timestamp=1.3)
+    assert len(recorder.messages) == 2
+
+
+def test_mismatching_fixation_retracts():
+    blackboard, recorder = _pipeline()
+
+    _predict(blackboard, CommandType.FORWARD, timestamp=1.0)
+    _fixate(blackboard, LEFT, start_time=0.9, end_time=1.2)
+
+    assert recorder.messages == [(PROVISIONAL, "FORWARD"),
+                                 (PROVISIONAL, "RETRACT:FORWARD"),
+                                 (TOPIC, "LEFT")]
+
+
+def test_invalid_fixation_retracts():
+    blackboard, recorder = _pipeline()
+
+    _predict(blackboard, CommandType.FORWARD, timestamp=1.0)
+    _fixate(blackboard, FORWARD, start_time=0.9, end_time=1.2, is_valid=False)
+
+    assert recorder.messages == [(PROVISIONAL, "FORWARD"),
+                                 (PROVISIONAL, "RETRACT:FORWARD"),
+                                 (TOPIC, "STOP")]
+
+
+def test_fixation_ending_before_the_prediction_leaves_it_pending():
+    blackboard, recorder = _pipeline()
+
+    _predict(blackboard, CommandType.FORWARD, timestamp=1.0)
+    # window of the previous target, ended before the prediction was made
+    _fixate(blackboard, LEFT, start_time=0.4, end_time=0.9)
+    assert recorder.messages == [(PROVISIONAL, "FORWARD"), (TOPIC, "LEFT")]
+
+    # the later fixation still settles it, without a retraction
+    _fixate(blackboard, FORWARD, start_time=1.0, end_time=1.3)
+    assert recorder.messages == [(PROVISIONAL, "FORWARD"), (TOPIC, "LEFT"), (TOPIC, "FORWARD")]
+
+
+def test_changed_prediction_retracts_the_previous_one():
+    blackboard, recorder = _pipeline()
+
+    _predict(blackboard, CommandType.FORWARD, timestamp=1.0)
+    _predict(blackboard, CommandType.FORWARD, timestamp=1.05)
+    _predict(blackboard, CommandType.RIGHT, timestamp=1.1)
+    _fixate(blackboard, RIGHT, start_time=1.0, end_time=1.3)
+
+    assert recorder.messages == [(PROVISIONAL, "FORWARD"),
+                                 (PROVISIONAL, "RETRACT:FORWARD"),
+                                 (PROVISIONAL, "RIGHT"),
+                                 (TOPIC, "RIGHT")]
+
+
+def test_prediction_of_the_confirmed_command_stays_quiet():
+    blackboard, recorder = _pipeline()
+
+    _fixate(blackboard, LEFT, start_time=0.0, end_time=0.5)
+    _predict(blackboard, CommandType.FORWARD, timestamp=1.0)
+    # heading back to LEFT: nothing to retract or pre-arm yet
+    _predict(blackboard, CommandType.LEFT, timestamp=1.05)
+    assert recorder.messages == [(TOPIC, "LEFT"), (PROVISIONAL, "FORWARD")]
+
+    # the fixation settles the pending provisional command
+    _fixate(blackboard, LEFT, start_time=1.0, end_time=1.3)
+    assert recorder.messages == [(TOPIC, "LEFT"), (PROVISIONAL, "FORWARD"),
+                                 (PROVISIONAL, "RETRACT:FORWARD"), (TOPIC, "LEFT")]
+
+
+def test_weak_or_disabled_predictions_stay_quiet():
+    blackboard, recorder = _pipeline()
+    _predict(blackboard, CommandType.FORWARD, timestamp=1.0, confidence=0.5)
+    assert recorder.messages == []
+
+    blackboard, recorder = _pipeline(provisional_threshold=None)
+    _predict(blackboard, CommandType.FORWARD, timestamp=1.0)
+    _fixate(blackboard, FORWARD, start_time=0.9, end_time=1.2)
+    assert recorder.messages == [(TOPIC, "FORWARD")]
@@ -0,0 +1,67 @@
+import math
+
+from blackboard import Blackboard
+from early_commit_interpreter import EarlyCommitInterpreter
+from gaze_event import GazeEvent
+
+DT = 1 / 30
+NAN = (math.nan, math.nan)
+
+
+class _FixationRecorder:
+    """collects every fixation posted to the blackboard"""
+
+    def __init__(self):
+        self.fixations = []
+
+    def update(self, data):
+        if data.get("changed") == "current_fixation":
+            self.fixations.append(data["current_fixation"])
+
+
+def _pipeline(**kwargs):
+    blackboard = Blackboard(1920, 1080)
+    interpreter = EarlyCommitInterpreter(blackboard, **kwargs)
+    blackboard.add_observer(interpreter)
+    recorder = _FixationRecorder()
+    blackboard.add_observer(recorder)
+    return blackboard, recorder
+
+
+def _feed(blackboard, points, t0=0.0):
+    for i, (x, y) in enumerate(points):
+        blackboard.set_current_gaze(GazeEvent(x=x, y=y, timestamp=t0 + i * DT))
+
+
+def test_nan_samples_mid_dwell_are_skipped():
+    blackboard, recorder = _pipeline(commit_dwell=0.3, max_dwell=1.5)
+
+    # top zone (FORWARD) with a short run of dropped samples in the middle
+    forward = (0.5, 0.1)
+    _feed(blackboard, [forward] * 5 + [NAN] * 3)
+    assert recorder.fixations == []
+
+    # back in the zone, the dwell continues and commits well before the 1.5 s fallback
+    _feed(blackboard, [forward] * 8, t0=8 * DT)
+    assert len(recorder.fixations) == 1
+    fixation = recorder.fixations[0]
+    assert fixation.is_valid
+    assert math.isclose(fixation.mean_x, 0.5) and math.isclose(fixation.mean_y, 0.1)
+    assert fixation.end_time < 0.5
+
+
+def test_nan_samples_in_fallback_window_are_skipped():
+    blackboard, recorder = _pipeline(commit_dwell=0.3, max_dwell=1.5)
+
+    # hopping between FORWARD and LEFT never builds enough dwell to commit early,
+    # so only the max_dwell fallback window can produce the fixation
+    hop = [(0.5, 0.1), (0.1, 0.5)] * 10
+    points = hop + [NAN] * 3 + hop + hop
+    _feed(blackboard, points)
+
+    assert len(recorder.fixations) == 1
+    fixation = recorder.fixations[0]
+    assert not fixation.is_valid
+    assert all(math.isfinite(v) for v in (fixation.mean_x, fixation.mean_y,
+                                           fixation.std_x, fixation.std_y))
+    assert fixation.end_time - fixation.start_time >= 1.5
@@ -0,0 +1,84 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from blackboard import Blackboard
+from gaze_event import GazeEvent
+from gaze_filter import FILTERS, GazeFilterStage, make_filter
+
+DT = 1 / 30
+
+
+def _session(n=120, seed=0):
+    """fixation, saccade, fixation with some noise"""
+    rng = random.Random(seed)
+    ts, xs, ys = [], [], []
+    for i in range(n):
+        target = (0.3, 0.3) if i < n // 2 else (0.7, 0.6)
+        ts.append(i * DT)
+        xs.append(target[0] + rng.gauss(0, 0.02))
+        ys.append(target[1] + rng.gauss(0, 0.02))
+    return ts, xs, ys
+
+
+def _stream(gaze_filter, ts, xs, ys):
+    out = [gaze_filter.filter(x, y, t) for t, x, y in zip(ts, xs, ys)]
+    return np.array([p[0] for p in out]), np.array([p[1] for p in out])
+
+
+@pytest.mark.parametrize("name", sorted(FILTERS))
+def test_streaming_matches_batch(name):
+    ts, xs, ys = _session()
+    xs[40] = math.nan
+    ys[41] = math.inf
+
+    stream_x, stream_y = _stream(make_filter(name), ts, xs, ys)
+    batch_x, batch_y = make_filter(name).filter_batch(ts, xs, ys)
+    np.testing.assert_allclose(batch_x, stream_x, rtol=1e-12)
+    np.testing.assert_allclose(batch_y, stream_y, rtol=1e-12)
+
+    # K streams side by side, each like its own batch
+    other = _session(seed=1)
+    both_x, both_y = make_filter(name).filter_batch(ts, np.column_stack((xs, other[1])),
+                                                    np.column_stack((ys, other[2])))
+    np.testing.assert_allclose(both_x[:, 0], batch_x, rtol=1e-12)
+    np.testing.assert_allclose(both_y[:, 1], make_filter(name).filter_batch(*other)[1], rtol=1e-12)
+
+
+@pytest.mark.parametrize("name", sorted(FILTERS))
+def test_non_finite_samples_leave_the_state_alone(name):
+    ts, xs, ys = _session()
+    gaps = {10, 50, 51, 52, 90}
+    dropped_x = [math.nan if i in gaps else x for i, x in enumerate(xs)]
+
+    out_x, out_y = _stream(make_filter(name), ts, dropped_x, ys)
+    # the dropped samples come back as they went in, everything else stays finite
+    assert all(math.isnan(out_x[i]) for i in gaps)
+    keep = [i for i in range(len(ts)) if i not in gaps]
+    assert np.isfinite(out_x[keep]).all() and np.isfinite(out_y[keep]).all()
+
+    # same as never having seen them
+    ref_x, ref_y = _stream(make_filter(name), [ts[i] for i in keep], [xs[i] for i in keep],
+                           [ys[i] for i in keep])
+    np.testing.assert_allclose(out_x[keep], ref_x, rtol=1e-12)
+    np.testing.assert_allclose(out_y[keep], ref_y, rtol=1e-12)
+
+    # a session starting with dropped samples
+    lead_x, _ = make_filter(name).filter_batch(ts, [math.nan] * 3 + xs[3:], ys)
+    assert np.isnan(lead_x[:3]).all() and np.isfinite(lead_x[3:]).all()
+
+
+def test_stage_skips_non_finite_samples():
+    blackboard = Blackboard(1920, 1080)
+    blackboard.add_observer(GazeFilterStage(blackboard, make_filter("one_euro")))
+
+    blackboard.set_current_gaze(GazeEvent(x=0.5, y=0.5, timestamp=0.0))
+    first = blackboard.get_current_filtered_gaze()
+    blackboard.set_current_gaze(GazeEvent(x=math.nan, y=0.5, timestamp=DT))
+    assert blackboard.get_current_filtered_gaze() is first
+
+    blackboard.set_current_gaze(GazeEvent(x=0.52, y=0.5, timestamp=2 * DT))
+    filtered = blackboard.get_current_filtered_gaze()
+    assert math.isfinite(filtered.x) and math.isfinite(filtered.y)
@@ -0,0 +1,70 @@
+import math
+
+from blackboard import Blackboard
+from gaze_event import GazeEvent
+from gaze_predictor import GazePredictor
+from robot_command import CommandType
+
+DT = 1 / 30
+
+
+class _PredictionRecorder:
+    """collects every prediction posted to the blackboard"""
+
+    def __init__(self):
+        self.predictions = []
+
+    def update(self, data):
+        if data.get("changed") == "current_prediction":
+            self.predictions.append(data["current_prediction"])
+
+
+def test_nan_samples_are_ignored():
+    blackboard = Blackboard(1920, 1080)
+    blackboard.add_observer(GazePredictor(blackboard))
+    recorder = _PredictionRecorder()
+    blackboard.add_observer(recorder)
+
+    forward = (0.5, 0.1)
+    points = [forward] * 5 + [(math.nan, math.nan)] * 5 + [forward]
+    for i, (x, y) in enumerate(points):
+        blackboard.set_current_gaze(GazeEvent(x=x, y=y, timestamp=i * DT))
+
+    # no prediction for the dropped samples, and they leave the settled run intact
+    assert len(recorder.predictions) == 6
+    last = recorder.predictions[-1]
+    assert not last.in_saccade
+    assert last.command == CommandType.FORWARD
+    assert last.confidence == 1.0
+    assert math.isclose(last.x, 0.5) and math.isclose(last.y, 0.1)
+
+
+def _in_flight_predictions(points):
+    blackboard = Blackboard(1920, 1080)
+    blackboard.add_observer(GazePredictor(blackboard))
+    recorder = _PredictionRecorder()
+    blackboard.add_observer(recorder)
+    for i, (x, y) in enumerate(points):
+        blackboard.set_current_gaze(GazeEvent(x=x, y=y, timestamp=i * DT))
+    return [p for p in recorder.predictions if p.in_saccade]
+
+
+def test_straight_saccade_is_confident_about_its_landing():
+    left, right = (0.25, 0.5), (0.75, 0.5)
+    predictions = _in_flight_predictions([left] * 6 + [(0.5, 0.5), right] + [right] * 4)
+
+    assert predictions
+    best = max(predictions, key=lambda p: p.confidence)
+    assert best.command == CommandType.RIGHT
+    assert best.confidence > 0.8
+    # mid-flight, with half the way still to go, the evidence is weaker
+    assert predictions[0].confidence < best.confidence
+
+
+def test_zigzag_noise_is_not_confident():
+    zigzag = [(0.55, 0.3), (0.3, 0.55), (0.6, 0.35), (0.35, 0.6)] * 4
+    predictions = _in_flight_predictions([(0.45, 0.45)] * 6 + zigzag)
+
+    # the first jump looks like any saccade, once it doubles back the evidence collapses
+    assert len(predictions) > 2
+    assert max(p.confidence for p in predictions[1:]) < 0.5
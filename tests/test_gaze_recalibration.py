@@ -0,0 +1,68 @@
+import threading
+
+from fixation_event import FixationEvent
+from gaze_event import GazeEvent
+from gaze_recalibration import OnlineRecalibrator
+
+
+def test_reset_waits_for_the_fit_in_progress():
+    applied = []
+    entered = threading.Event()
+    gate = threading.Event()
+
+    def apply_correction(correction):
+        applied.append(correction)
+        if correction is not None:
+            # hold the worker inside its fit
+            entered.set()
+            gate.wait(5)
+
+    recalibrator = OnlineRecalibrator(apply_correction, min_targets=1)
+    try:
+        recalibrator.observe(0.52, 0.27, 0.52, 0.27, 0.5, 0.25)
+        assert entered.wait(5)
+        # measured on the old calibration, still queued when the reset comes
+        recalibrator.observe(0.53, 0.28, 0.53, 0.28, 0.5, 0.25)
+
+        resetter = threading.Thread(target=recalibrator.reset)
+        resetter.start()
+        resetter.join(0.2)
+        assert resetter.is_alive()
+
+        gate.set()
+        resetter.join(5)
+        assert not resetter.is_alive()
+        recalibrator.drain()
+
+        # the reset came last, nothing observed on the old calibration was applied after it
+        assert applied[-1] is None
+        metrics = recalibrator.metrics()
+        assert metrics["targets"] == 0
+        assert metrics["correction_offset"] == 0.0
+
+        # targets observed after the reset are fitted again
+        recalibrator.observe(0.52, 0.27, 0.52, 0.27, 0.5, 0.25)
+        recalibrator.drain()
+        assert recalibrator.metrics()["targets"] == 1
+        assert applied[-1] is not None
+    finally:
+        gate.set()
+        recalibrator.close()
+
+
+def test_reset_forgets_raw_gaze_from_the_old_calibration():
+    recalibrator = OnlineRecalibrator(lambda correction: None, min_targets=1)
+    try:
+        for i in range(10):
+            recalibrator.update({"changed": "current_gaze",
+                                 "current_gaze": GazeEvent(x=0.6, y=0.35, timestamp=i * 0.03)})
+        recalibrator.reset()
+
+        # a fixation spanning the pre-reset samples finds no raw gaze to pair with
+        fixation = FixationEvent(mean_x=0.52, mean_y=0.27, std_x=0.0, std_y=0.0,
+                                 start_time=0.0, end_time=0.3, is_valid=True)
+        recalibrator.update({"changed": "current_fixation", "current_fixation": fixation})
+        recalibrator.drain()
+        assert recalibrator.metrics()["targets"] == 0
+    finally:
+        recalibrator.close()
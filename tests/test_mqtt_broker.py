@@ -0,0 +1,135 @@
+import gc
+import logging
+import socket
+import struct
+
+import pytest
+
+from mqtt_broker import (CONNACK, CONNECT, PINGREQ, PINGRESP, PUBCOMP, PUBLISH, PUBREC, PUBREL,
+                         SUBACK, SUBSCRIBE, MqttBroker, _packet, topic_matches)
+
+
+def _string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return struct.pack("!H", len(data)) + data
+
+
+def _connect_packet(client_id: str) -> bytes:
+    # MQTT 3.1.1, clean session, no keepalive
+    return _packet(CONNECT, 0, _string("MQTT") + bytes([4, 0x02]) + struct.pack("!H", 0) + _string(client_id))
+
+
+def _connect(port: int, client_id: str) -> socket.socket:
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    sock.sendall(_connect_packet(client_id))
+    assert sock.recv(4) == bytes([CONNACK << 4, 2, 0, 0])
+    return sock
+
+
+def _recv_exactly(sock: socket.socket, n: int) -> bytes:
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        assert chunk, "connection closed"
+        data += chunk
+    return data
+
+
+def _read_packet(sock: socket.socket):
+    """(packet type, body) of the next packet, small packets only"""
+    first, length = _recv_exactly(sock, 2)
+    return first >> 4, _recv_exactly(sock, length)
+
+
+def test_topic_matches():
+    assert topic_matches("a/b", "a/b")
+    assert not topic_matches("a/b", "a/c")
+    assert topic_matches("a/+", "a/b")
+    assert not topic_matches("a/+", "a")
+    assert not topic_matches("a/+", "a/b/c")
+    assert topic_matches("a/#", "a/b/c")
+    # '#' also covers the parent level (MQTT 3.1.1 4.7.1.2)
+    assert topic_matches("a/#", "a")
+    assert topic_matches("#", "a")
+    assert not topic_matches("a/#", "b")
+
+
+def test_qos2_publish_is_forwarded_once_on_pubrel():
+    broker = MqttBroker("127.0.0.1", 0)
+    port = broker.start()
+    try:
+        with _connect(port, "sub") as sub, _connect(port, "pub") as pub:
+            sub.sendall(_packet(SUBSCRIBE, 0x02, struct.pack("!H", 1) + _string("gaze/#") + bytes([1])))
+            assert _read_packet(sub)[0] == SUBACK
+
+            publish = _string("gaze") + struct.pack("!H", 7) + b"FORWARD"
+            pub.sendall(_packet(PUBLISH, 2 << 1, publish))
+            assert _read_packet(pub) == (PUBREC, struct.pack("!H", 7))
+            # retransmission with the DUP flag before the PUBREL
+            pub.sendall(_packet(PUBLISH, 0x08 | 2 << 1, publish))
+            assert _read_packet(pub) == (PUBREC, struct.pack("!H", 7))
+            pub.sendall(_packet(PUBREL, 0x02, struct.pack("!H", 7)))
+            assert _read_packet(pub) == (PUBCOMP, struct.pack("!H", 7))
+
+            # everything the broker sent the subscriber before answering its ping
+            sub.sendall(_packet(PINGREQ, 0, b""))
+            received = []
+            while True:
+                packet_type, body = _read_packet(sub)
+                if packet_type == PINGRESP:
+                    break
+                received.append((packet_type, body))
+    finally:
+        broker.stop()
+
+    assert len(received) == 1
+    packet_type, body = received[0]
+    assert packet_type == PUBLISH and body.endswith(b"FORWARD")
+
+
+def test_start_raises_when_the_port_is_taken():
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+
+        with pytest.raises(OSError):
+            MqttBroker("127.0.0.1", port).start()
+
+
+def test_stop_closes_open_connections_cleanly(caplog):
+    broker = MqttBroker("127.0.0.1", 0)
+    port = broker.start()
+    with _connect(port, "idle") as sock:
+        with caplog.at_level(logging.ERROR, logger="asyncio"):
+            broker.stop()
+            gc.collect()
+        # the broker closed its side of the connection
+        assert sock.recv(1) == b""
+
+    assert "Task was destroyed but it is pending" not in caplog.text
+
+
+def test_truncated_packets_close_only_that_connection(caplog):
+    broker = MqttBroker("127.0.0.1", 0)
+    port = broker.start()
+    try:
+        with caplog.at_level(logging.ERROR, logger="asyncio"):
+            # CONNECT that stops right after the protocol name
+            with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+                sock.sendall(_packet(CONNECT, 0, _string("MQTT")))
+                assert sock.recv(1) == b""
+
+            # QoS 1 PUBLISH whose packet id is cut off
+            with _connect(port, "pub") as pub:
+                pub.sendall(_packet(PUBLISH, 1 << 1, _string("gaze") + b"\x00"))
+                assert pub.recv(1) == b""
+
+            # the broker keeps serving other clients
+            with _connect(port, "next") as sock:
+                sock.sendall(_packet(PINGREQ, 0, b""))
+                assert _read_packet(sock) == (PINGRESP, b"")
+    finally:
+        broker.stop()
+
+    assert caplog.text == ""
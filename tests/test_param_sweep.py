@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from command_generator import CommandGenerator
+from gaze_interpreter import GazeInterpreter
+from gaze_session import score_commands, synthetic_session
+from param_sweep import SweepConfig, sweep
+from session_replay import replay_session
+
+CONFIGS = [
+    SweepConfig(window_duration=0.3, min_samples=3, std_threshold=0.03),
+    SweepConfig(window_duration=0.6, min_samples=5, std_threshold=0.05),
+    SweepConfig(window_duration=1.0, min_samples=12, std_threshold=0.1),
+    SweepConfig(window_duration=0.5, min_samples=20, std_threshold=0.045),
+]
+
+
+def test_sweep_matches_the_replayed_pipeline():
+    sessions = [synthetic_session(duration=30.0, seed=seed, name=f"synthetic-{seed}") for seed in (1, 2, 3)]
+    # dropped frames in a recording: a single NaN and a short run of them
+    dropped = sessions[2]
+    dropped.xs = dropped.xs.copy()
+    dropped.ys = dropped.ys.copy()
+    dropped.xs[100] = np.nan
+    dropped.xs[400:405] = np.nan
+    dropped.ys[600] = np.inf
+    results = sweep(sessions, CONFIGS, workers=2)
+
+    for config, result in zip(CONFIGS, results):
+        assert result.config == config
+
+        fixations = valid = commands = false_commands = missed = targets = 0
+        latencies = []
+        for session in sessions:
+            replay = replay_session(session, lambda bb: [
+                GazeInterpreter(bb, window_duration=config.window_duration,
+                                min_samples=config.min_samples, std_threshold=config.std_threshold),
+                CommandGenerator(bb),
+            ])
+            fixations += len(replay.fixations)
+            valid += sum(f.is_valid for f in replay.fixations)
+
+            times, types = replay.confirmed()
+            score = score_commands(session, times, types)
+            commands += score.total_commands
+            false_commands += score.false_commands
+            missed += score.missed_targets
+            targets += score.missed_targets + len(score.latencies)
+            latencies += score.latencies
+
+        assert (result.fixations, result.valid_fixations) == (fixations, valid)
+        assert result.commands == commands
+        assert result.false_commands == false_commands
+        assert (result.missed_targets, result.targets) == (missed, targets)
+
+        assert latencies
+        assert result.latency_p50 == pytest.approx(np.percentile(latencies, 50))
+        assert result.latency_p90 == pytest.approx(np.percentile(latencies, 90))
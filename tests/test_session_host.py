@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+
+from gaze_session import GazeSession, save_session_csv
+from pipeline_session import PipelineSession, SessionConfig
+from robot_command import CommandType
+from session_host import SessionHost
+from session_query import SessionLogReader
+
+FORWARD = (0.5, 0.1)
+LEFT = (0.1, 0.5)
+
+
+def _steady_replay(tmp_path, name, point, duration=2.0, rate=30.0):
+    """csv of a gaze held on one point"""
+    timestamps = np.arange(0.0, duration, 1 / rate)
+    session = GazeSession(timestamps=timestamps, xs=np.full(len(timestamps), point[0]),
+                          ys=np.full(len(timestamps), point[1]), targets=[], name=name)
+    path = str(tmp_path / f"{name}.csv")
+    save_session_csv(session, path)
+    return path
+
+
+def _config(tmp_path, session_id, point, **kwargs):
+    return SessionConfig(session_id=session_id, replay_path=_steady_replay(tmp_path, session_id, point),
+                         replay_speed=10.0, poll_interval=0.01, early_commit=True, **kwargs)
+
+
+def test_sessions_drive_their_own_blackboards(tmp_path):
+    sessions = [PipelineSession(_config(tmp_path, "a", FORWARD)), PipelineSession(_config(tmp_path, "b", LEFT))]
+    assert sessions[0].blackboard is not sessions[1].blackboard
+    for session in sessions:
+        session.open()
+    try:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and any(s.metrics.snapshot()["commands"] == 0 for s in sessions):
+            for session in sessions:
+                session.step()
+            time.sleep(0.01)
+    finally:
+        for session in sessions:
+            session.close()
+
+    a, b = (s.blackboard for s in sessions)
+    assert (a.get_current_gaze().x, a.get_current_gaze().y) == FORWARD
+    assert (b.get_current_gaze().x, b.get_current_gaze().y) == LEFT
+    assert a.get_current_command().command == CommandType.FORWARD
+    assert b.get_current_command().command == CommandType.LEFT
+
+
+def test_host_runs_replay_sessions_side_by_side(tmp_path):
+    log_dir = str(tmp_path / "logs")
+    host = SessionHost(workers=1, threads_per_worker=2, metrics_interval=0.1)
+    host.add_session(_config(tmp_path, "a", FORWARD, log_dir=log_dir))
+    host.add_session(_config(tmp_path, "b", LEFT, log_dir=log_dir))
+    host.start()
+    try:
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            metrics = host.metrics()
+            if len(metrics) == 2 and all(m["commands"] > 0 for m in metrics.values()):
+                break
+            time.sleep(0.1)
+    finally:
+        host.stop()
+
+    metrics = host.metrics()
+    assert set(metrics) == {"a", "b"}
+    for m in metrics.values():
+        assert m["commands"] > 0
+        assert m["errors"] == 0
+
+    # both sessions share one worker process, each logged only its own gaze
+    reader = SessionLogReader(log_dir)
+    for session_id, point in (("a", FORWARD), ("b", LEFT)):
+        chunks = list(reader.scan("gaze", ["x", "y"], sessions=[session_id]))
+        assert chunks
+        for chunk in chunks:
+            np.testing.assert_allclose(chunk["x"], point[0], rtol=1e-6)
+            np.testing.assert_allclose(chunk["y"], point[1], rtol=1e-6)
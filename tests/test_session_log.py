@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+
+from gaze_event import GazeEvent
+from session_log import SessionLogWriter, column_path
+from session_query import SessionLogReader
+
+# all rows fall on the same UTC day
+T0 = 1_700_000_000.0
+DAY = "2023-11-14"
+
+
+def _write_gaze(root, rows):
+    writer = SessionLogWriter(root, flush_interval=60)
+    for i in rows:
+        writer.update({"changed": "current_gaze", "current_gaze": GazeEvent(x=i / 100, y=i / 1000, timestamp=T0 + i)})
+    writer.close()
+
+
+def test_append_after_torn_flush_keeps_rows_aligned(tmp_path):
+    root = str(tmp_path)
+    _write_gaze(root, range(5))
+
+    # a crash mid-flush: x got 3 rows (and half of a 4th), timestamp and y all 5
+    x_path = column_path(root, "default", DAY, "gaze", "x")
+    with open(x_path, "r+b") as f:
+        f.truncate(3 * 4 + 2)
+
+    _write_gaze(root, range(5, 8))
+
+    for name, itemsize in (("timestamp", 8), ("x", 4), ("y", 4)):
+        assert os.path.getsize(column_path(root, "default", DAY, "gaze", name)) == 6 * itemsize
+
+    chunk = next(SessionLogReader(root).scan("gaze", ["timestamp", "x", "y"]))
+    i = chunk["timestamp"] - T0
+    np.testing.assert_array_equal(i, [0, 1, 2, 5, 6, 7])
+    np.testing.assert_allclose(chunk["x"], i / 100, rtol=1e-6)
+    np.testing.assert_allclose(chunk["y"], i / 1000, rtol=1e-6)
+
+
+def test_partition_trimmed_only_once_per_writer(tmp_path):
+    root = str(tmp_path)
+    writer = SessionLogWriter(root, flush_interval=60)
+    for i in range(4):
+        writer.update({"changed": "current_gaze", "current_gaze": GazeEvent(x=0.5, y=0.5, timestamp=T0 + i)})
+        writer.flush()
+    writer.close()
+
+    chunk = next(SessionLogReader(root).scan("gaze", ["timestamp"]))
+    np.testing.assert_array_equal(chunk["timestamp"] - T0, [0, 1, 2, 3])
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+from blackboard import Blackboard
+from gaze_event import GazeEvent
+from startup_profile import StartupProfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("cv2", "eyetrax", "tkinter", "paho", "screeninfo")
+
+
+def test_importing_headless_loads_no_heavy_modules():
+    # a fresh interpreter, this one may already have them imported
+    check = ("import sys, headless; "
+             f"print(' '.join(m for m in {HEAVY!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", check], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+def test_profile_stamps_each_first_once():
+    profile = StartupProfile()
+    blackboard = Blackboard(1920, 1080)
+    blackboard.add_observer(profile)
+    profile.mark("pipeline built")
+
+    for i in range(3):
+        blackboard.set_current_gaze(GazeEvent(x=0.5, y=0.5, timestamp=i))
+
+    names = [name for name, _ in profile.marks()]
+    assert names == ["pipeline built", "first gaze"]
+    assert profile.time_to_first_command() is None
+    assert not profile.first_command.is_set()
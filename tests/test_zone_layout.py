@@ -0,0 +1,82 @@
+import math
+import random
+
+import numpy as np
+
+from robot_command import CommandType
+from zone_layout import ZoneLookup, _points_in_polygon, diagonal_layout
+
+RES = 64
+
+
+def _classify(layout, x, y):
+    """zone index straight from the polygons, without the grid"""
+    cx, cy = layout.center
+    if layout.dead_zone_radius > 0 and (x - cx) ** 2 + (y - cy) ** 2 <= layout.dead_zone_radius ** 2:
+        return len(layout.zones)
+    for index, zone in enumerate(layout.zones):
+        if _points_in_polygon(np.array([x]), np.array([y]), zone.polygon)[0]:
+            return index
+    return ZoneLookup.NO_ZONE
+
+
+def _near_boundary(layout, x, y):
+    """within one cell of a diagonal or the dead zone circle"""
+    cell = 1.0 / RES
+    cx, cy = layout.center
+    return (abs(x - y) < 2 * cell or abs(x + y - 1) < 2 * cell or
+            abs(math.hypot(x - cx, y - cy) - layout.dead_zone_radius) < 2 * cell)
+
+
+def test_grid_matches_direct_classification():
+    layout = diagonal_layout(dead_zone_radius=0.1, dead_zone_command=CommandType.STOP)
+    lookup = layout.compile(RES)
+
+    # every cell center is classified exactly like the polygons
+    centers = (np.arange(RES) + 0.5) / RES
+    points = [(x, y) for y in centers for x in centers]
+    expected = [_classify(layout, x, y) for x, y in points]
+    assert [lookup.zone_index(x, y) for x, y in points] == expected
+    assert lookup.zone_indices(points).tolist() == expected
+
+    # arbitrary points agree away from the zone boundaries
+    rng = random.Random(0)
+    points = [(rng.random(), rng.random()) for _ in range(2000)]
+    points = [p for p in points if not _near_boundary(layout, *p)]
+    expected = [_classify(layout, x, y) for x, y in points]
+    assert [lookup.zone_index(x, y) for x, y in points] == expected
+    assert lookup.zone_indices(points).tolist() == expected
+
+
+def test_cell_boundaries_and_screen_edges():
+    lookup = diagonal_layout().compile(RES)
+    forward, left, right, backward = range(4)
+
+    # a point on a cell boundary belongs to the cell after it
+    for k in range(RES):
+        edge = k / RES
+        assert lookup.zone_index(edge, 0.0) == lookup.zone_index(edge + 0.5 / RES, 0.5 / RES)
+
+    # the edges and anything past them clamp to the outermost cells
+    edges = {
+        (0.5, 0.0): forward, (0.5, -3.0): forward,
+        (0.0, 0.5): left, (-0.2, 0.5): left,
+        (1.0, 0.5): right, (7.0, 0.5): right,
+        (0.5, 1.0): backward, (0.5, 1.5): backward,
+    }
+    for (x, y), zone in edges.items():
+        assert lookup.zone_index(x, y) == zone
+    assert lookup.zone_indices(list(edges)).tolist() == list(edges.values())
+
+
+def test_non_finite_points_have_no_zone():
+    lookup = diagonal_layout().compile(RES)
+    bad = [(math.nan, 0.5), (0.5, math.nan), (math.inf, 0.5), (0.5, -math.inf), (math.nan, math.nan)]
+
+    for x, y in bad:
+        assert lookup.zone_index(x, y) is None
+        assert lookup.command_at(x, y) is None
+
+    points = [(0.5, 0.1)] + bad
+    assert lookup.zone_indices(points).tolist() == [0] + [ZoneLookup.NO_ZONE] * len(bad)
+    assert lookup.commands_at(points) == [CommandType.FORWARD] + [None] * len(bad)
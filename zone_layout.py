@@ -0,0 +1,249 @@
+import json
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from robot_command import CommandType
+
+
+Point = Tuple[float, float]
+
+
+@dataclass(frozen=True)
+class Zone:
+    """
+    one command region of the screen
+
+    polygon vertices are in normalized screen coordinates (0..1),
+    with y growing downward like the canvas
+    """
+    command: CommandType
+    polygon: Tuple[Point, ...]
+    # where the display draws the region name --> defaults to the polygon centroid
+    label_at: Optional[Point] = None
+
+    def label_point(self) -> Point:
+        """point used to draw the label of this zone"""
+        if self.label_at is not None:
+            return self.label_at
+
+        # area-weighted centroid of the polygon (shoelace formula)
+        area = 0.0
+        cx = 0.0
+        cy = 0.0
+        n = len(self.polygon)
+        for i in range(n):
+            x1, y1 = self.polygon[i]
+            x2, y2 = self.polygon[(i + 1) % n]
+            cross = x1 * y2 - x2 * y1
+            area += cross
+            cx += (x1 + x2) * cross
+            cy += (y1 + y2) * cross
+        if area == 0:
+            xs = [p[0] for p in self.polygon]
+            ys = [p[1] for p in self.polygon]
+            return (sum(xs) / n, sum(ys) / n)
+        return (cx / (3 * area), cy / (3 * area))
+
+
+@dataclass(frozen=True)
+class ZoneLayout:
+    """
+    data-only description of how the screen is split into command zones
+
+    - zones are tested in order, the first zone containing a point wins
+    - the dead zone is a circle (radius in normalized units) around center
+      that overrides every zone; dead_zone_command=None means "no command"
+    """
+    zones: Tuple[Zone, ...]
+    dead_zone_radius: float = 0.0
+    dead_zone_command: Optional[CommandType] = None
+    center: Point = (0.5, 0.5)
+
+    def compile(self, resolution: int = 256) -> "ZoneLookup":
+        """build the constant-time lookup grid for this layout"""
+        return ZoneLookup(self, resolution)
+
+    # --------- serialization ---------
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ZoneLayout":
+        zones = []
+        for z in data["zones"]:
+            label_at = z.get("label_at")
+            zones.append(Zone(command=CommandType(z["command"]),
+                              polygon=tuple((float(x), float(y)) for x, y in z["polygon"]),
+                              label_at=tuple(label_at) if label_at is not None else None))
+
+        dead_zone = data.get("dead_zone") or {}
+        dead_command = dead_zone.get("command")
+        return cls(zones=tuple(zones),
+                   dead_zone_radius=float(dead_zone.get("radius", 0.0)),
+                   dead_zone_command=CommandType(dead_command) if dead_command else None,
+                   center=tuple(data.get("center", (0.5, 0.5))))
+
+    def to_dict(self) -> Dict[str, Any]:
+        zones = []
+        for z in self.zones:
+            entry = {"command": z.command.value, "polygon": [list(p) for p in z.polygon]}
+            if z.label_at is not None:
+                entry["label_at"] = list(z.label_at)
+            zones.append(entry)
+        return {
+            "zones": zones,
+            "dead_zone": {
+                "radius": self.dead_zone_radius,
+                "command": self.dead_zone_command.value if self.dead_zone_command else None,
+            },
+            "center": list(self.center),
+        }
+
+
+def load_layout(path: str) -> ZoneLayout:
+    """read a ZoneLayout from a json file"""
+    with open(path, "r") as f:
+        return ZoneLayout.from_dict(json.load(f))
+
+
+def diagonal_layout(dead_zone_radius: float = 0.0,
+                    dead_zone_command: Optional[CommandType] = None) -> ZoneLayout:
+    """
+    the original layout: diagonals y = x and y = -x + 1 split the screen into 4 wedges
+      top wedge    --> FORWARD
+      left wedge   --> LEFT
+      right wedge  --> RIGHT
+      bottom wedge --> BACKWARD
+    """
+    c = (0.5, 0.5)
+    return ZoneLayout(
+        zones=(
+            Zone(CommandType.FORWARD, ((0.0, 0.0), (1.0, 0.0), c), label_at=(0.5, 0.25)),
+            Zone(CommandType.LEFT, ((0.0, 0.0), c, (0.0, 1.0)), label_at=(0.25, 0.5)),
+            Zone(CommandType.RIGHT, ((1.0, 0.0), (1.0, 1.0), c), label_at=(0.75, 0.5)),
+            Zone(CommandType.BACKWARD, ((0.0, 1.0), c, (1.0, 1.0)), label_at=(0.5, 0.75)),
+        ),
+        dead_zone_radius=dead_zone_radius,
+        dead_zone_command=dead_zone_command,
+    )
+
+
+def _points_in_polygon(px: np.ndarray, py: np.ndarray, polygon: Sequence[Point]) -> np.ndarray:
+    """
+    vectorized even-odd ray casting
+    uses the half-open rule so points on an edge shared by two polygons
+    belong to exactly one of them
+    """
+    inside = np.zeros(px.shape, dtype=bool)
+    n = len(polygon)
+    for i in range(n):
+        x1, y1 = polygon[i]
+        x2, y2 = polygon[(i + 1) % n]
+        crosses = (y1 > py) != (y2 > py)
+        if y1 == y2:
+            continue
+        x_intersect = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (px < x_intersect)
+    return inside
+
+
+class ZoneLookup:
+    """
+    a ZoneLayout compiled into a resolution x resolution grid of zone indices
+    so classifying a point is just two multiplications and an index
+    """
+
+    # grid value for points outside every zone
+    NO_ZONE = -1
+
+    def __init__(self, layout: ZoneLayout, resolution: int = 256):
+        self._layout = layout
+        self._resolution = resolution
+
+        # sample every cell at its center
+        centers = (np.arange(resolution, dtype=np.float64) + 0.5) / resolution
+        px, py = np.meshgrid(centers, centers)
+
+        grid = np.full((resolution, resolution), self.NO_ZONE, dtype=np.int16)
+        # paint in reverse so earlier zones win where polygons overlap
+        for index in reversed(range(len(layout.zones))):
+            grid[_points_in_polygon(px, py, layout.zones[index].polygon)] = index
+
+        # the dead zone gets its own index right after the real zones
+        self._dead_zone_index = len(layout.zones)
+        if layout.dead_zone_radius > 0:
+            cx, cy = layout.center
+            in_dead_zone = (px - cx) ** 2 + (py - cy) ** 2 <= layout.dead_zone_radius ** 2
+            grid[in_dead_zone] = self._dead_zone_index
+
+        self._grid = grid
+        # plain python rows are faster than numpy for single-point lookups
+        self._rows: List[List[int]] = grid.tolist()
+
+        # index --> CommandType, dead zone last, NO_ZONE (-1) wraps to a trailing None
+        self._commands: List[Optional[CommandType]] = [z.command for z in layout.zones]
+        self._commands.append(layout.dead_zone_command)
+        self._commands.append(None)
+
+    @property
+    def layout(self) -> ZoneLayout:
+        return self._layout
+
+    @property
+    def resolution(self) -> int:
+        return self._resolution
+
+    @property
+    def dead_zone_index(self) -> int:
+        return self._dead_zone_index
+
+    def command_for_index(self, index: Optional[int]) -> Optional[CommandType]:
+        """CommandType for a zone index returned by zone_index()/zone_indices()"""
+        if index is None:
+            return None
+        return self._commands[index]
+
+    # --------- single point ---------
+    def zone_index(self, x: float, y: float) -> Optional[int]:
+        """
+        zone index for one normalized point, points off screen are clamped to the edge
+        None for a NaN / infinite coordinate (e.g. a dropped gaze sample)
+        """
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return None
+        res = self._resolution
+        col = int(x * res)
+        row = int(y * res)
+        if col < 0:
+            col = 0
+        elif col >= res:
+            col = res - 1
+        if row < 0:
+            row = 0
+        elif row >= res:
+            row = res - 1
+        return self._rows[row][col]
+
+    def command_at(self, x: float, y: float) -> Optional[CommandType]:
+        """CommandType for one normalized point, None if the point maps to no command"""
+        return self.command_for_index(self.zone_index(x, y))
+
+    # --------- batch ---------
+    def zone_indices(self, centers) -> np.ndarray:
+        """
+        zone index for every row of an (N, 2) array of normalized (x, y) points
+        rows with a NaN / infinite coordinate get NO_ZONE
+        """
+        points = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        finite = np.isfinite(points).all(axis=1)
+        # non-finite values would cast to an arbitrary cell, look them up at 0 and mask afterwards
+        points = np.where(finite[:, None], points, 0.0)
+        res = self._resolution
+        cols = np.clip((points[:, 0] * res).astype(np.int64), 0, res - 1)
+        rows = np.clip((points[:, 1] * res).astype(np.int64), 0, res - 1)
+        return np.where(finite, self._grid[rows, cols], self.NO_ZONE).astype(self._grid.dtype)
+
+    def commands_at(self, centers) -> List[Optional[CommandType]]:
+        """CommandType (or None) for every row of an (N, 2) array of normalized points"""
+        commands = self._commands
+        return [commands[i] for i in self.zone_indices(centers).tolist()]